@@ -35,7 +35,7 @@
 # |                | GND    | GND       | —                      |                               |
 #
 # Notes:
-# - Rows use internal pull-ups; columns are outputs (idle HIGH).
+# - Rows use internal pull-ups; columns are outputs (idle HIGH; idle LOW with keypad_irq so a press raises a row IRQ).
 # - Ensure servo supply can source ≥2 A for MG995; add 470–1000 µF near servo.
 # - Share GND between Pico, servo supply, and buzzer.
 
@@ -122,6 +122,22 @@ def buzzer_off():
 def buzzer_toggle():
     buzzer.value(1 - buzzer.value())
 
+def buzzer_set(on):
+    if on:
+        buzzer_on()
+    else:
+        buzzer_off()
+
+# ---------- Background actuator sequences (optional) ----------
+# actuator_timeline.py (upload from Libraries/) runs the dispense from a Timer,
+# so the completion write happens while the servo/buzzer sequence plays.
+try:
+    from actuator_timeline import Timeline, beep_steps
+    act = Timeline(servo_angle, buzzer_set)
+    DISPENSE_STEPS = ((0, 180, None),) + beep_steps(5000, 200) + ((5000, 0, False),)
+except ImportError:
+    act = None
+
 # ---------- Wi-Fi & Firebase helpers ----------
 def wifi_connect():
     wlan = network.WLAN(network.STA_IF)
@@ -189,8 +205,24 @@ def rtdb_get(path, id_token=None):
         return None
 
 # ---------- Keypad scan: one key per physical press ----------
+# Preferred: keypad_irq.py (upload from Libraries/). Row IRQs wake a timer scan,
+# presses are debounced into a queue, and a held key never blocks the caller.
+try:
+    from keypad_irq import Keypad
+    keypad = Keypad(rows, cols, KEYS, debounce_ms=DEBOUNCE_MS)
+except ImportError:
+    keypad = None
+
+def flush_keys():
+    # session boundaries only: leftovers from the last customer must not feed the next one,
+    # while digits typed ahead of a prompt inside a session are kept
+    if keypad:
+        keypad.clear()
+
 def get_key_once():
-    # Drive each column LOW in turn; read rows (active LOW)
+    if keypad:
+        return keypad.get()
+    # Fallback: drive each column LOW in turn; read rows (active LOW)
     key = None
     for ci, _ in enumerate(cols):
         for j, cp in enumerate(cols):
@@ -332,9 +364,12 @@ def beep_for_ms(total_ms=5000, toggle_ms=200):
 
 def dispense_action(id_token=None):
     print('Dispensing... (servo 0->180, buzzer beeps 5s, back to 0)')
-    servo_angle(180)             # move out
-    beep_for_ms(5000, 200)       # 5 s audible feedback
-    servo_angle(0)               # retract
+    if act:
+        act.play(DISPENSE_STEPS) # same sequence, in the background
+    else:
+        servo_angle(180)         # move out
+        beep_for_ms(5000, 200)   # 5 s audible feedback
+        servo_angle(0)           # retract
     if id_token is not None:
         rtdb_put_string(TX_COMPLETED_PATH, '1', id_token=id_token)
     print('Transaction completed -> {} = "1"'.format(TX_COMPLETED_PATH))
@@ -397,6 +432,7 @@ def main():
 
     print_menu()
     last_written = None
+    flush_keys()                        # new session
 
     while True:
         k = get_key_once()
@@ -438,6 +474,7 @@ def main():
                     if result == 'verified':
                         withdrawal_amount_flow(id_token)
 
+                    flush_keys()        # attempt over: presses made during it don't pick the next method
                     print_menu()
                 else:
                     print('Write failed; will retry on next key.')
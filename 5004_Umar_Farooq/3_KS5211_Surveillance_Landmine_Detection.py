@@ -99,20 +99,34 @@ def right_motor(dir_):
     elif dir_ < 0: IN3.value(0); IN4.value(1)
     else:          IN3.value(0); IN4.value(0)
 
+# Cached driver (upload motor_driver.py from Libraries/): repeated commands and the
+# auto-start re-applies write nothing; a reversal coasts for DEADTIME_MS on a Timer.
+DEADTIME_MS = 8
+try:
+    from motor_driver import MotorDriver   # FWD/REV/COAST are +1/-1/0, as below
+    motors = MotorDriver([(IN1, IN2, None, False), (IN3, IN4, None, False)], deadtime_ms=DEADTIME_MS)
+except ImportError:
+    motors = None
+
+def _drive(l, r):
+    if motors: motors.drive((l, r))
+    else: left_motor(l); right_motor(r)
+
 def stop():
-    left_motor(0); right_motor(0)
+    if motors: motors.stop()
+    else: left_motor(0); right_motor(0)
 
 def forward():
-    left_motor(+1); right_motor(+1)
+    _drive(+1, +1)
 
 def backward():
-    left_motor(-1); right_motor(-1)
+    _drive(-1, -1)
 
 def left_pivot():
-    left_motor(+1); right_motor(-1)
+    _drive(+1, -1)
 
 def right_pivot():
-    left_motor(-1); right_motor(+1)
+    _drive(-1, +1)
 
 def apply_motion(cmd):
     if cmd == 'F': forward()
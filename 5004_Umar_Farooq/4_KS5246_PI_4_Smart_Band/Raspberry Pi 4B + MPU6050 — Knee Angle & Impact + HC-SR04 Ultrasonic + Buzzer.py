@@ -3,9 +3,13 @@ this code is working fine
 # File: pi_knee_ultra.py
 # Raspberry Pi 4B + MPU6050 — Knee Angle & Impact + HC-SR04 Ultrasonic + Buzzer
 
-import time, math
+import time, math, sys
 import board, busio, digitalio
 import adafruit_mpu6050
+try:
+    from ts_store import TimeSeriesStore   # copy ts_store.py from Pi_Pico_W/Micro_Python/Libraries/ next to this file
+except ImportError:
+    TimeSeriesStore = None
 
 # ───────── Wiring Summary ─────────
 # MPU6050: VCC→3V3 (Pin1), GND→GND (Pin6), SDA→GPIO2/Pin3, SCL→GPIO3/Pin5, AD0→GND (0x68)
@@ -35,6 +39,13 @@ SND_CM_PER_S        = 34300.0
 # Buzzer
 BUZZER_GPIO         = board.D12  # GPIO12 (Pin 32)   # [BUZZER]
 
+# History (ts_store ring files knee_1s.ts / knee_60s.ts / knee_600s.ts)
+# values: |A| (g), knee angle (deg), distance (cm, -1 = no echo); each tier keeps mean/min/max,
+# so the max of |A| is the peak impact of the period.
+# Dump:  python3 "<this file>" dump [1|60|600]
+HISTORY_BASE        = "knee"
+HISTORY_TIERS       = ((1, 3600), (60, 1440), (600, 1008))   # 1 h / 1 day / 1 week
+
 G0 = 9.80665  # m/s^2 per g
 
 # ───────── Ultrasonic helpers ─────────
@@ -72,7 +83,20 @@ def ultra_read_cm(trig, echo, samples=ULTRA_SAMPLES, timeout_s=ULTRA_TIMEOUT_S):
     vals.sort()
     return vals[len(vals)//2]
 
-def main():
+def open_history():
+    if TimeSeriesStore is None:
+        print("History disabled (ts_store.py not found)")
+        return None
+    return TimeSeriesStore(HISTORY_BASE, 3, tiers=HISTORY_TIERS)
+
+def dump_history(period):
+    db = open_history()
+    if db is None: return
+    print("seq,t,n,|A|_mean,angle_mean,dist_mean,|A|_min,angle_min,dist_min,|A|_max,angle_max,dist_max")
+    db.dump(period)
+    db.close()
+
+def main(db=None):
     # I2C + MPU
     i2c = busio.I2C(board.SCL, board.SDA)
     mpu = adafruit_mpu6050.MPU6050(i2c, address=I2C_ADDRESS)
@@ -157,6 +181,10 @@ def main():
         # Buzzer control                                               # [BUZZER]
         buzzer.value = obstacle                                        # [BUZZER]
 
+        # History: every loop, so the 1 s max keeps short impact peaks
+        if db:
+            db.add(time.time(), (a_mag_g, last_angle, -1.0 if math.isnan(last_dist_cm) else last_dist_cm))
+
         # Output
         now = time.time()
         if now >= next_t:
@@ -180,7 +208,13 @@ def main():
         time.sleep(0.002)
 
 if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "dump":
+        dump_history(int(sys.argv[2]) if len(sys.argv) > 2 else 60)
+        sys.exit(0)
+    db = open_history()
     try:
-        main()
+        main(db)
     except KeyboardInterrupt:
         print("\nExiting.")
+    finally:
+        if db: db.close()
@@ -27,6 +27,7 @@ DB_URL        = "https://waterdtection-default-rtdb.firebaseio.com"
 PATH_ROOT  = "/Toll_Gate"                 # bulk-read root
 PATH_VOLT  = "/Toll_Gate/Voltage"
 PATH_HEART = "Toll_Gate/logger_alive"
+PATH_HIST  = "/Toll_Gate/VoltageHistory"  # batched 1 min mean/min/max from flash
 
 # Pins (GPIO numbers)
 IN1_PIN, IN2_PIN, IN3_PIN, IN4_PIN = 2, 3, 4, 5
@@ -46,11 +47,16 @@ SENSOR_ACTIVE_LOW = 1
 GATE_ACTIVE_LOW   = 1
 
 # Cadences (tune for your setup)
-CONTROL_HZ        = 200                 # control loop target Hz
+CONTROL_HZ        = 200                 # control loop rate (hardware Timer with control_tick.py)
 CONTROL_DT_MS     = max(1, int(1000 // CONTROL_HZ))
 SENSOR_DEBOUNCE_N = 2
 STRICT_STOP_ON_LOST_LINE = True
 LOG_PERIOD_MS     = 500                 # voltage log
+HISTORY_BASE      = "/toll_volt"         # flash ring files /toll_volt_{1,60,600}s.ts (ts_store.py)
+HISTORY_TIERS     = ((1, 900), (60, 1440), (600, 1008))   # 15 min of s, 1 day of min, 1 week of 10 min
+HISTORY_UPLOAD_MS = 60000               # batched upload of new 1 min records
+HISTORY_BATCH     = 30                  # max records per upload
+NTP_RETRY_MS      = 30000               # history waits for a valid clock; retry NTP this often
 REMOTE_POLL_MS    = 50                  # fast remote reads (20 Hz)
 DISPLAY_MIN_MS    = 100                 # min gap between OLED refreshes
 HTTP_TIMEOUT_S    = 6                   # shorter timeout
@@ -89,8 +95,12 @@ led_off()
 # ---------- OLED ----------
 try:
     import ssd1306
+    try:
+        from ssd1306_dirty import SSD1306_DirtyI2C as OLED_I2C   # only changed pages go over I2C
+    except ImportError:
+        OLED_I2C = ssd1306.SSD1306_I2C
     i2c = I2C(0, sda=Pin(OLED_SDA_PIN), scl=Pin(OLED_SCL_PIN), freq=400000)
-    oled = ssd1306.SSD1306_I2C(OLED_WIDTH, OLED_HEIGHT, i2c)
+    oled = OLED_I2C(OLED_WIDTH, OLED_HEIGHT, i2c)
 except Exception as e:
     oled = None
     print("OLED init failed (continuing without display):", e)
@@ -115,10 +125,22 @@ def oled_draw(voltage, price):
     oled.show()
 
 # ---------- Motor & sensor helpers ----------
-def motors_stop():      IN1.value(0); IN2.value(0); IN3.value(0); IN4.value(0)
-def motors_forward():   IN1.value(0); IN2.value(1); IN3.value(0); IN4.value(1)
-def motors_turn_left(): IN1.value(0); IN2.value(1); IN3.value(0); IN4.value(0)
-def motors_turn_right():IN1.value(0); IN2.value(0); IN3.value(0); IN4.value(1)
+# Cached driver (upload motor_driver.py from Libraries/): the 200 Hz loop re-sends
+# the same command every tick, the driver only touches pins when it changes.
+# ENA/ENB are jumpered, forward is IN1=0/IN2=1 (inverted) on both channels.
+try:
+    from motor_driver import MotorDriver, FWD, COAST
+    motors = MotorDriver([(IN1, IN2, None, True), (IN3, IN4, None, True)])
+    def motors_stop():       motors.stop()
+    def motors_forward():    motors.drive((FWD, FWD))
+    def motors_turn_left():  motors.drive((FWD, COAST))
+    def motors_turn_right(): motors.drive((COAST, FWD))
+except ImportError:
+    motors = None
+    def motors_stop():      IN1.value(0); IN2.value(0); IN3.value(0); IN4.value(0)
+    def motors_forward():   IN1.value(0); IN2.value(1); IN3.value(0); IN4.value(1)
+    def motors_turn_left(): IN1.value(0); IN2.value(1); IN3.value(0); IN4.value(0)
+    def motors_turn_right():IN1.value(0); IN2.value(0); IN3.value(0); IN4.value(1)
 
 def _is_on(raw):  return (raw == 0) if SENSOR_ACTIVE_LOW else (raw == 1)
 def gate_ok():
@@ -202,23 +224,47 @@ def fb_get_root():
         if DEBUG: print("GET err on ROOT:", e); return None
 
 # ---------- Shared vars ----------
+# Core1 -> core0 state as one seqlock snapshot (upload seqlock.py from Libraries/):
+# the 200 Hz loop copies IR1/IR2/Servo/voltage in one lock-free read per tick, so a
+# Firebase round trip on core1 can never stall it. The price is only used by core1
+# (OLED) and `moving` is a single word, so neither needs a lock. Without the
+# module the original locks are used.
+S_IR1, S_IR2, S_SERVO, S_VOLT_MV = 0, 1, 2, 3
+try:
+    from array import array
+    from seqlock import SeqSnapshot
+    state = SeqSnapshot(4, (0, 1, 0, 0))       # IR1 neutral, IR2 allow, servo closed, 0 mV
+    snap = array('i', [0] * 4)                 # core0's copy, refreshed once per tick
+except ImportError:
+    state = None
+
 shared_lock = _thread.allocate_lock()
 shared_voltage = 0.0
 shared_price   = ""
 
 def set_shared(voltage=None, price_sentinel=False, price=None):
     global shared_voltage, shared_price
+    if state:                                  # core1 is the only writer and price reader
+        if voltage is not None: shared_voltage = voltage; state.write(S_VOLT_MV, int(voltage * 1000))
+        if price_sentinel:      shared_price   = price
+        return
     shared_lock.acquire()
     if voltage is not None: shared_voltage = voltage
     if price_sentinel:      shared_price   = price
     shared_lock.release()
 
 def get_shared():
+    if state: return shared_voltage, shared_price   # core1 only
     shared_lock.acquire(); v=shared_voltage; p=shared_price; shared_lock.release(); return v,p
 
 moving_lock = _thread.allocate_lock(); moving_flag=False
-def set_moving(v):  global moving_flag; moving_lock.acquire(); moving_flag=bool(v); moving_lock.release()
-def get_moving():   moving_lock.acquire(); m=moving_flag; moving_lock.release(); return m
+def set_moving(v):
+    global moving_flag
+    if state: moving_flag = bool(v); return
+    moving_lock.acquire(); moving_flag=bool(v); moving_lock.release()
+def get_moving():
+    if state: return moving_flag
+    moving_lock.acquire(); m=moving_flag; moving_lock.release(); return m
 
 # Remote states
 remote_lock = _thread.allocate_lock()
@@ -228,6 +274,12 @@ remote_servo= 0      # default closed
 
 def set_remote(ir2=None, servo=None, ir1=None):
     global remote_ir1, remote_ir2, remote_servo
+    if state:
+        state.begin()
+        if ir1   is not None: state.put(S_IR1, ir1)
+        if ir2   is not None: state.put(S_IR2, ir2)
+        if servo is not None: state.put(S_SERVO, servo)
+        state.end(); return
     remote_lock.acquire()
     if ir1   is not None: remote_ir1   = ir1
     if ir2   is not None: remote_ir2   = ir2
@@ -250,15 +302,82 @@ def _norm01(x):
     if isinstance(x, str):  return 1 if x.strip().strip('"').strip("'") == "1" else 0
     return None
 
+# ---------- Clock (NTP) ----------
+# The RTC restarts at the same epoch on every boot, so history timestamps are only
+# recorded once NTP has set it (or it still holds a synced time after a soft reset).
+try:
+    import ntptime
+except ImportError:
+    ntptime = None
+
+def clock_valid():
+    return time.gmtime()[0] >= 2024
+
+def clock_sync():
+    if ntptime and not clock_valid():
+        try:
+            ntptime.settime()
+            if DEBUG: print("[NTP] RTC set:", time.gmtime()[:6])
+        except Exception as e:
+            if DEBUG: print("[NTP] fail:", e)
+    return clock_valid()
+
+# ---------- Voltage history on flash (core1 only) ----------
+try:
+    from ts_store import TimeSeriesStore
+except ImportError:
+    TimeSeriesStore = None                 # no local history (upload ts_store.py from Libraries/)
+tsdb = None
+HIST_CURSOR = "upload"                     # persisted upload cursor: /toll_volt_upload.cur
+_dump_req = 0                              # set from the REPL ('d' = 1 s tier, 'm' = 1 min tier), served on core1
+
+def history_open():
+    global tsdb
+    if TimeSeriesStore is None: return
+    try:
+        tsdb = TimeSeriesStore(HISTORY_BASE, 1, tiers=HISTORY_TIERS)
+        print("[HIST] heads", [tsdb.head(p) for p, _ in HISTORY_TIERS])
+    except OSError as e:
+        print("[HIST] disabled:", e); tsdb = None
+
+def history_cursor():
+    """Upload cursor from flash: records not yet uploaded before a reboot still go up."""
+    c = tsdb.cursor(HIST_CURSOR)
+    return c if c <= tsdb.head(60) else 0  # ring was recreated
+
+def history_upload(cursor):
+    """PUT the 1 min records after cursor as one object; returns the new cursor (saved on flash)."""
+    recs = tsdb.read(60, after_seq=cursor, limit=HISTORY_BATCH)
+    if not recs: return cursor
+    batch = {}
+    for seq, t, n, mean, lo, hi in recs:
+        batch[str(t)] = [round(mean[0], 3), round(lo[0], 3), round(hi[0], 3), n]
+    if fb_put_path(PATH_HIST + "/" + str(recs[0][1]), batch):
+        cursor = recs[-1][0]
+        try: tsdb.set_cursor(HIST_CURSOR, cursor)
+        except OSError as e: print("[HIST] cursor save failed:", e)
+    return cursor                          # unchanged on failure: retried next period
+
+def history_dump():
+    global _dump_req
+    p = 1 if _dump_req == 1 else 60; _dump_req = 0
+    print("[HIST] seq,t,n,mean,min,max ({} s tier)".format(p))
+    tsdb.dump(p)
+
 # ---------- Core1: auth + logger + OLED + fast remote polling ----------
 def core1_task():
     print("[CORE1] start")
     wifi_connect_blocking()
+    clock_ok = clock_sync()                # before sign-in: TOKEN_EXPIRY is wall-clock time
     firebase_sign_in()
     fb_put_path(PATH_HEART, int(time.time()))
+    history_open()
 
     next_log    = ticks_ms()
     next_remote = ticks_ms()
+    next_hist   = ticks_ms() + HISTORY_UPLOAD_MS
+    next_ntp    = ticks_ms() + NTP_RETRY_MS
+    hist_cursor = history_cursor() if tsdb else 0
 
     # Caches to avoid extra work
     last_ir1 = None
@@ -313,7 +432,19 @@ def core1_task():
             val = round(random.uniform(4.0, 5.0), 2) if get_moving() else 0
             fb_put_path(PATH_VOLT, val)
             set_shared(voltage=val)
+            if tsdb and clock_ok: tsdb.add(time.time(), (val,))
             next_log = now + LOG_PERIOD_MS
+        if not clock_ok and ticks_diff(now, next_ntp) >= 0:
+            clock_ok = clock_sync()
+            if clock_ok: firebase_sign_in()    # TOKEN_EXPIRY was set on the old clock
+            next_ntp = now + NTP_RETRY_MS
+
+        # B2) History: batched upload of finished minutes, serial dumps
+        if tsdb:
+            if ticks_diff(now, next_hist) >= 0:
+                hist_cursor = history_upload(hist_cursor)
+                next_hist = now + HISTORY_UPLOAD_MS
+            if _dump_req: history_dump()
 
         # C) OLED (only when values changed / throttled inside oled_draw)
         v, p = get_shared()
@@ -326,9 +457,12 @@ def core1_task():
 _last_led = None
 def update_status_led():
     global _last_led
-    v, _ = get_shared()  # shared_voltage is updated when we log to PATH_VOLT
-    # Treat tiny values as zero (floating point safety). Adjust epsilon if needed.
-    is_on = 1 if (v is not None and abs(float(v)) > 1e-6) else 0
+    if state:
+        is_on = 1 if snap[S_VOLT_MV] != 0 else 0     # from this tick's snapshot
+    else:
+        v, _ = get_shared()  # shared_voltage is updated when we log to PATH_VOLT
+        # Treat tiny values as zero (floating point safety). Adjust epsilon if needed.
+        is_on = 1 if (v is not None and abs(float(v)) > 1e-6) else 0
 
     if is_on != _last_led:
         if is_on: led_on()
@@ -337,43 +471,108 @@ def update_status_led():
 
 
 # ---------- Core0: fast control ----------
+# With control_tick.py (Libraries/) a hardware Timer runs control_step() at
+# CONTROL_HZ via micropython.schedule and keeps period / exec / latency
+# histograms; type 'h' + Enter on the REPL for the report, 'r' to reset it.
+# The scheduled step may run between any two bytecodes of the main thread, so it
+# must not share a lock with it: the timer path needs seqlock.py too. Without
+# either module the ticks_ms + sleep loop is used.
+try:
+    from control_tick import ControlTick
+except ImportError:
+    ControlTick = None
+ctl = None
+_ctrl_dbg = bytearray(8)    # gate, IR2, Servo, allow, L, R, IR1, moving of the latest step
+
+def control_step():
+    left_on, right_on, rawL, rawR = debounced_states()
+
+    g_ok = gate_ok()
+    if state:
+        state.read(snap); ir1 = snap[S_IR1]; ir2 = snap[S_IR2]; servo = snap[S_SERVO]
+    else:
+        ir1, ir2, servo = get_remote_all()
+    allow_remote = (servo == 1) or (ir2 == 1)
+    allow = g_ok and allow_remote
+
+    moving = _ctrl_dbg[7]
+    if allow:
+        if left_on and right_on:        motors_forward(); moving = 1
+        elif left_on and not right_on:  motors_turn_left(); moving = 1
+        elif not left_on and right_on:  motors_turn_right(); moving = 1
+        else:
+            if STRICT_STOP_ON_LOST_LINE: motors_stop(); moving = 0
+    else:
+        motors_stop(); moving = 0
+    set_moving(moving)
+
+    # Update LED per requested rule
+    update_status_led()
+
+    d = _ctrl_dbg
+    d[0] = 1 if g_ok else 0; d[1] = ir2; d[2] = servo; d[3] = 1 if allow else 0
+    d[4] = 1 if left_on else 0; d[5] = 1 if right_on else 0
+    d[6] = ir1; d[7] = moving
+
+def print_status():
+    # only what the step recorded: no locks shared with the step
+    d = _ctrl_dbg
+    print("CTRL gate=%d IR1=%d IR2=%d Servo=%d allow=%d | L=%s R=%s | moving=%d | LED=%d | OLED=%sB/s" %
+          (d[0], d[6], d[1], d[2], d[3],
+           "ON" if d[4] else "OFF",
+           "ON" if d[5] else "OFF",
+           d[7],
+           1 if _last_led else 0,
+           getattr(oled, "bytes_per_s", "-")))
+    if ctl and ctl.missed:
+        print("CTRL missed deadlines:", ctl.missed)
+
+def _serial_poller():
+    try:
+        import sys, uselect
+        p = uselect.poll(); p.register(sys.stdin, uselect.POLLIN)
+        return p
+    except Exception:
+        return None
+
+def poll_keys(poller):
+    """REPL keys: h/r tick report/reset (timer mode), d/m dump the 1 s / 1 min voltage history."""
+    global _dump_req
+    if not (poller and poller.poll(0)): return
+    import sys
+    c = sys.stdin.read(1)
+    if ctl and c in ("h", "H"): ctl.report()
+    elif ctl and c in ("r", "R"): ctl.reset(); print("[TICK] histograms reset")
+    elif c in ("d", "D"): _dump_req = 1
+    elif c in ("m", "M"): _dump_req = 60
+
 def main():
+    global ctl
     print("=== Pico W: line follower + OLED + fast remote poll + Status LED ===")
     wifi_connect_blocking()
     try: _thread.start_new_thread(core1_task, ())
     except Exception as e: print("WARN: cannot start core1 thread:", e)
 
     last_status = 0
+    poller = _serial_poller()
+    if ControlTick and state:
+        ctl = ControlTick(CONTROL_HZ, control_step)
+        ctl.start()
+        while True:
+            now = ticks_ms()
+            if DEBUG and ticks_diff(now, last_status) >= STATUS_EVERY_MS:
+                last_status = now; print_status()
+            poll_keys(poller)
+            time.sleep_ms(20)
+
     while True:
         t0 = ticks_ms()
-        left_on, right_on, rawL, rawR = debounced_states()
-
-        g_ok = gate_ok()
-        ir2, servo = get_remote()
-        allow_remote = (servo == 1) or (ir2 == 1)
-        allow = g_ok and allow_remote
-
-        if allow:
-            if left_on and right_on:        motors_forward(); set_moving(True)
-            elif left_on and not right_on:  motors_turn_left(); set_moving(True)
-            elif not left_on and right_on:  motors_turn_right(); set_moving(True)
-            else:
-                if STRICT_STOP_ON_LOST_LINE: motors_stop(); set_moving(False)
-        else:
-            motors_stop(); set_moving(False)
-
-        # Update LED per requested rule
-        update_status_led()
+        control_step()
 
         if DEBUG and ticks_diff(t0, last_status) >= STATUS_EVERY_MS:
             last_status = t0
-            ir1_now = get_remote_ir1()
-            print("CTRL gate=%d IR1=%d IR2=%d Servo=%d allow=%d | L=%s R=%s | moving=%d | LED=%d" %
-                  (1 if g_ok else 0, ir1_now, ir2, servo, 1 if allow else 0,
-                   "ON" if left_on else "OFF",
-                   "ON" if right_on else "OFF",
-                   1 if get_moving() else 0,
-                   1 if _last_led else 0))
+            print_status()
+        poll_keys(poller)
 
         # keep target Hz
         elapsed = ticks_diff(ticks_ms(), t0)
@@ -384,6 +583,7 @@ def main():
 try:
     main()
 except Exception as e:
+    if ctl: ctl.stop()
     motors_stop()
     led_off()
     print("Fatal:", e)
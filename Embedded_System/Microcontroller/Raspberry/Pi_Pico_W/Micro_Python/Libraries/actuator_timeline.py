@@ -0,0 +1,86 @@
+# actuator_timeline.py — run (time, servo angle, buzzer) step lists in the background
+#
+# A step is (t_ms, angle, buzz): at t_ms after the sequence starts, set the servo
+# to `angle` and the buzzer to `buzz` (None leaves that actuator alone). A
+# periodic Timer applies due steps, so the caller returns immediately and can do
+# network I/O or keypad handling while the sequence runs. play() while busy
+# queues the new sequence behind the current one (a beep never cuts a dispense
+# short); stop() aborts everything.
+#
+#   from actuator_timeline import Timeline, beep_steps
+#   act = Timeline(servo_angle, buzzer_set)
+#   act.play(((0, 180, None),) + beep_steps(5000, 200) + ((5000, 0, False),))
+#   while act.busy(): ...                    # or act.wait(timeout_ms)
+
+import time
+from machine import Timer, disable_irq, enable_irq
+
+def beep_steps(total_ms, toggle_ms, t0=0):
+    """Buzzer on/off every toggle_ms for total_ms starting at t0, ending off."""
+    out = []; t = 0; on = True
+    while t < total_ms:
+        out.append((t0 + t, None, on)); on = not on; t += toggle_ms
+    out.append((t0 + total_ms, None, False))
+    return tuple(out)
+
+class Timeline:
+    def __init__(self, servo=None, buzzer=None, tick_ms=10, max_queue=4):
+        self._servo = servo; self._buzzer = buzzer
+        self.tick_ms = tick_ms; self.max_queue = max_queue
+        self._seq = None; self._i = 0; self._t0 = 0
+        self._queue = []
+        self._running = False
+        self._timer = Timer()
+        self._cb = self._tick                    # bind once
+        self.sequences = 0; self.dropped = 0
+
+    def _apply(self, step):
+        if step[1] is not None and self._servo: self._servo(step[1])
+        if step[2] is not None and self._buzzer: self._buzzer(step[2])
+
+    def _tick(self, t):
+        seq = self._seq
+        if seq is None: return
+        el = time.ticks_diff(time.ticks_ms(), self._t0)
+        i = self._i; n = len(seq)
+        while i < n and seq[i][0] <= el:
+            self._apply(seq[i]); i += 1
+        self._i = i
+        if i < n: return
+        self.sequences += 1
+        if self._queue:
+            self._seq = self._queue.pop(0); self._i = 0; self._t0 = time.ticks_ms()
+        else:
+            self._seq = None; self._running = False; self._timer.deinit()
+
+    def play(self, steps):
+        """Start steps now, or after the running/queued ones. Returns False if the queue is full."""
+        steps = tuple(sorted(steps, key=lambda s: s[0]))
+        st = disable_irq()                       # the last tick may be ending the sequence
+        if self._running:
+            ok = len(self._queue) < self.max_queue
+            if ok: self._queue.append(steps)
+            else: self.dropped += 1
+            enable_irq(st); return ok
+        enable_irq(st)
+        self._seq = steps; self._i = 0; self._t0 = time.ticks_ms(); self._running = True
+        self._tick(None)                         # t=0 steps apply immediately
+        if self._running:
+            self._timer.init(period=self.tick_ms, mode=Timer.PERIODIC, callback=self._cb)
+        return True
+
+    def busy(self):
+        return self._running
+
+    def wait(self, timeout_ms=-1):
+        """Block until idle (or timeout_ms); returns True if idle."""
+        t0 = time.ticks_ms()
+        while self._running:
+            if timeout_ms >= 0 and time.ticks_diff(time.ticks_ms(), t0) >= timeout_ms: return False
+            time.sleep_ms(self.tick_ms)
+        return True
+
+    def stop(self, servo=None, buzz=False):
+        """Abort the current and queued sequences, then set final actuator states."""
+        self._timer.deinit(); self._queue = []; self._seq = None; self._running = False
+        self._apply((0, servo, buzz))
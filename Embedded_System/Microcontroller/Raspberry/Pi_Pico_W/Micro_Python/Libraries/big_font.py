@@ -0,0 +1,46 @@
+# big_font.py — 2x/3x scaled text from the built-in 8x8 font, rendered once and blitted
+#
+# Each character is drawn once with framebuf's own 8x8 font, scaled up pixel by
+# pixel into its own MONO_VLSB FrameBuffer (the SSD1306 layout) and cached.
+# After that, text() is one blit per character. The glyphs for `chars` are built
+# up front; any other character is built the first time it is used.
+#
+#   from big_font import BigFont
+#   big = BigFont(2, chars="FACEPRNTSGDOCWHIM0123456789")   # 16x16 glyphs
+#   big.text(oled, "FACE", 0, 0)             # then oled.show()
+#   w = big.width("FACE")                    # 64 px
+#
+# Glyph pixels are drawn in colour 1 and the background is left untouched (blit
+# key 0), so draw on a cleared area.
+
+import framebuf
+
+class BigFont:
+    def __init__(self, scale=2, chars="", spacing=0):
+        self.scale = scale; self.size = 8 * scale; self.advance = 8 * scale + spacing
+        self._src = framebuf.FrameBuffer(bytearray(8), 8, 8, framebuf.MONO_HLSB)
+        self._cache = {}
+        for ch in chars: self.glyph(ch)
+
+    def glyph(self, ch):
+        g = self._cache.get(ch)
+        if g is None:
+            s = self.scale; n = self.size; src = self._src
+            src.fill(0); src.text(ch, 0, 0, 1)
+            g = framebuf.FrameBuffer(bytearray(n * ((n + 7) // 8)), n, n, framebuf.MONO_VLSB)
+            for y in range(8):
+                for x in range(8):
+                    if src.pixel(x, y): g.fill_rect(x * s, y * s, s, s, 1)
+            self._cache[ch] = g
+        return g
+
+    def text(self, fb, s, x, y):
+        for ch in s:
+            fb.blit(self.glyph(ch), x, y, 0)
+            x += self.advance
+
+    def width(self, s):
+        return len(s) * self.advance - (self.advance - self.size if s else 0)
+
+    def cached(self):
+        return len(self._cache)
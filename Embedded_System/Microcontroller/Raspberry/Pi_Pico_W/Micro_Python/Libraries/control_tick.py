@@ -0,0 +1,92 @@
+# control_tick.py — hardware-Timer driven control step with period / execution-time histograms
+#
+# A hard Timer IRQ at `hz` only timestamps the tick and micropython.schedule()s
+# the step, so the step itself runs in normal (allocating, exception-safe)
+# context right after the IRQ, independent of whatever the main thread is doing
+# in between. If the previous step is still pending or running when the next
+# tick fires, that tick is a missed deadline (`missed`) and is dropped, not
+# queued behind it.
+#
+# Histograms (array 'I', bin_us wide, last bin = overflow):
+#   period  step start -> next step start   (ideal: one bin at 1e6/hz)
+#   exec    step duration
+#   latency IRQ -> step start               (schedule delay)
+#
+#   from control_tick import ControlTick
+#   ct = ControlTick(200, control_step)      # 200 Hz
+#   ct.start() ... ct.report() ... ct.reset() ... ct.stop()
+
+import time, micropython
+from array import array
+from machine import Timer
+
+micropython.alloc_emergency_exception_buf(100)
+
+class ControlTick:
+    def __init__(self, hz, step, bin_us=250, bins=40):
+        self.hz = hz; self.step = step
+        self.bin_us = bin_us; self.bins = bins
+        self.period = array('I', [0] * bins)
+        self.exec = array('I', [0] * bins)
+        self.latency = array('I', [0] * bins)
+        self.ticks = 0; self.missed = 0; self.steps = 0
+        self.exec_us_max = 0
+        self._pending = False; self._irq_us = 0; self._last = -1
+        self._timer = Timer()
+        self._irq_cb = self._irq; self._run_cb = self._run      # bind once: no alloc in the IRQ
+
+    def _bin(self, h, us):
+        b = us // self.bin_us
+        h[b if b < self.bins else self.bins - 1] += 1
+
+    # ---------- IRQ side ----------
+    def _irq(self, t):
+        self.ticks += 1
+        if self._pending:
+            self.missed += 1; return
+        self._pending = True; self._irq_us = time.ticks_us()
+        try: micropython.schedule(self._run_cb, 0)
+        except RuntimeError: self._pending = False; self.missed += 1
+
+    # ---------- scheduled step ----------
+    def _run(self, _):
+        t0 = time.ticks_us()
+        self._bin(self.latency, time.ticks_diff(t0, self._irq_us))
+        if self._last >= 0: self._bin(self.period, time.ticks_diff(t0, self._last))
+        self._last = t0
+        try:
+            self.step()
+        finally:
+            us = time.ticks_diff(time.ticks_us(), t0)
+            self._bin(self.exec, us)
+            if us > self.exec_us_max: self.exec_us_max = us
+            self.steps += 1; self._pending = False
+
+    # ---------- control ----------
+    def start(self):
+        self._last = -1
+        try:
+            self._timer.init(freq=self.hz, mode=Timer.PERIODIC, callback=self._irq_cb, hard=True)
+        except TypeError:                        # ports without hard= are already hard/soft-safe
+            self._timer.init(freq=self.hz, mode=Timer.PERIODIC, callback=self._irq_cb)
+
+    def stop(self):
+        self._timer.deinit()
+
+    def reset(self):
+        for h in (self.period, self.exec, self.latency):
+            for i in range(self.bins): h[i] = 0
+        self.ticks = self.missed = self.steps = self.exec_us_max = 0; self._last = -1
+
+    def _line(self, name, h):
+        w = self.bin_us
+        cells = ["{}-{}:{}".format(i * w, (i + 1) * w, c) for i, c in enumerate(h) if c]
+        if h[self.bins - 1]: cells[-1] = ">={}:{}".format((self.bins - 1) * w, h[self.bins - 1])
+        print("  {:<8}".format(name), " ".join(cells) if cells else "-")
+
+    def report(self):
+        print("[TICK] {} Hz  ticks {}  steps {}  missed {}  exec max {} us  (bins us)".format(
+            self.hz, self.ticks, self.steps, self.missed, self.exec_us_max))
+        self._line("period", self.period)
+        self._line("exec", self.exec)
+        self._line("latency", self.latency)
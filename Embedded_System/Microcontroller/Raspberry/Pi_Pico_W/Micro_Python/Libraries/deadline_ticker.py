@@ -0,0 +1,56 @@
+# deadline_ticker.py — drift-free periodic tick on absolute deadlines, with overrun accounting
+#
+# `work(); time.sleep(1)` makes every tick 1 s + work. Here each tick ends at a
+# deadline on a fixed grid (start + n * period_ms): wait() sleeps only what is
+# left of the current period, so N ticks take N periods however long the work
+# was, as long as it fits on average.
+#
+# A tick that runs late by less than one period is caught up by the next one
+# (its deadline is still on the grid). A tick that overruns by whole periods
+# returns how many periods it consumed, so countdowns subtract real time instead
+# of stretching the phase. left_ms() lets the caller defer optional work (e.g. an
+# upload) when the current period is nearly used up.
+#
+#   from deadline_ticker import DeadlineTicker
+#   tk = DeadlineTicker(1000)
+#   remaining = 30
+#   while remaining > 0:
+#       do_tick(remaining)
+#       if tk.left_ms() > 500: upload()
+#       remaining -= tk.wait()
+#   print(tk.stats())
+
+import time
+
+class DeadlineTicker:
+    def __init__(self, period_ms):
+        self.period_ms = period_ms
+        self.deadline = time.ticks_add(time.ticks_ms(), period_ms)
+        self.ticks = 0; self.overruns = 0; self.skipped = 0
+        self.late_ms_max = 0; self.slack_ms_min = period_ms
+
+    def start(self):
+        """Put the current deadline one period from now (after a long pause)."""
+        self.deadline = time.ticks_add(time.ticks_ms(), self.period_ms)
+
+    def left_ms(self):
+        return time.ticks_diff(self.deadline, time.ticks_ms())
+
+    def wait(self):
+        """Sleep to the current deadline and move it on. Returns the periods consumed (>= 1)."""
+        left = self.left_ms(); k = 1
+        if left >= 0:
+            if left < self.slack_ms_min: self.slack_ms_min = left
+            time.sleep_ms(left)
+        else:
+            late = -left; self.overruns += 1; self.slack_ms_min = 0
+            if late > self.late_ms_max: self.late_ms_max = late
+            k += late // self.period_ms           # whole periods lost are skipped, not replayed
+            self.skipped += k - 1
+        self.deadline = time.ticks_add(self.deadline, k * self.period_ms)
+        self.ticks += k
+        return k
+
+    def stats(self):
+        return "ticks {} overruns {} skipped {} late max {} ms slack min {} ms".format(
+            self.ticks, self.overruns, self.skipped, self.late_ms_max, self.slack_ms_min)
@@ -0,0 +1,62 @@
+# envelope.py — integer-only baseline / envelope / min-max tracker for any ADC signal
+#
+# Replaces per-sample float EMAs like
+#     base += 0.001 * (x - base);  env += 0.05 * (abs(x - base) - env)
+# with shift-based EMAs on fixed-point ints (FRAC fraction bits), so update()
+# does no heap allocation on MicroPython (all values stay small ints).
+#
+#   tr = EnvelopeTracker(base_shift=10, env_shift=4, decim=50, init=adc.read_u16() >> 6)
+#   if tr.update(x):                         # True every `decim` samples
+#       print(tr.out_base >> FRAC, tr.out_env >> FRAC, tr.out_min, tr.out_max)
+#   tr.snapshot()                            # or latch the window on your own clock
+#
+# alpha = 2**-shift: shift 10 ~ 0.001, shift 4 ~ 0.06, shift 5 ~ 0.03.
+
+FRAC = 8
+
+class EnvelopeTracker:
+    __slots__ = ("base_shift", "env_shift", "_rb", "_re", "decim", "base", "env", "lo", "hi", "n",
+                 "out_base", "out_env", "out_min", "out_max", "samples")
+
+    def __init__(self, base_shift=10, env_shift=4, decim=0, init=0):
+        self.base_shift = base_shift; self.env_shift = env_shift
+        self._rb = (1 << base_shift) >> 1; self._re = (1 << env_shift) >> 1   # round, don't floor
+        self.decim = decim                    # 0: only snapshot() latches outputs
+        self.base = init << FRAC; self.env = 0
+        self.lo = 0x3FFFFFFF; self.hi = -0x3FFFFFFF; self.n = 0
+        self.out_base = self.base; self.out_env = 0; self.out_min = init; self.out_max = init
+        self.samples = 0
+
+    def update(self, x):
+        """Feed one sample (int). Returns True when a decimated output was latched."""
+        xb = x << FRAC
+        b = self.base + ((xb - self.base + self._rb) >> self.base_shift); self.base = b
+        d = xb - b
+        if d < 0: d = -d
+        self.env += (d - self.env + self._re) >> self.env_shift
+        if x < self.lo: self.lo = x
+        if x > self.hi: self.hi = x
+        self.samples += 1
+        n = self.n + 1
+        if n == self.decim:
+            self.snapshot(); return True
+        self.n = n
+        return False
+
+    def feed(self, buf, n=-1):
+        """update() over buf[:n]; returns the number of outputs latched."""
+        k = 0
+        for i in range(len(buf) if n < 0 else n):
+            if self.update(buf[i]): k += 1
+        return k
+
+    def snapshot(self):
+        """Latch base/env/min/max of the current window into out_* and start a new window."""
+        self.out_base = self.base; self.out_env = self.env
+        if self.hi >= self.lo:
+            self.out_min = self.lo; self.out_max = self.hi
+        self.lo = 0x3FFFFFFF; self.hi = -0x3FFFFFFF; self.n = 0
+
+    def reset(self, init=0):
+        self.base = init << FRAC; self.env = 0
+        self.lo = 0x3FFFFFFF; self.hi = -0x3FFFFFFF; self.n = 0
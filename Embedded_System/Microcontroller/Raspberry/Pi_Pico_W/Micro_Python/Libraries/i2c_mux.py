@@ -0,0 +1,119 @@
+# i2c_mux.py — PCA9548A / TCA9548A channel manager with switch caching and timing
+#
+# The mux latches the new channel mask at the STOP of the control-byte write, so
+# a select needs no settle delay. select() remembers the active channel and only
+# writes when it changes (`switches` vs `skipped`); after a bus error the cached
+# channel is forgotten so the next select always rewrites it.
+#
+# show_all() flushes a set of displays (one per channel) in a single sweep,
+# starting with the channel that is already selected, and records the sweep
+# time in sweep_us / sweep_us_max.
+#
+#   from i2c_mux import I2CMux
+#   mux = I2CMux(i2c)                        # 0x70
+#   mux.select(2); oled2 = SSD1306_I2C(128, 64, i2c)
+#   mux.show_all({0: oled0, 1: oled1, 2: oled2, 3: oled3})
+#   print(mux.sweep_us, mux.sweep_us_max, mux.switches, mux.skipped)
+#
+# DisplayPool keeps one initialised display per channel (built once, with the
+# channel selected) and redraws a screen only when its value changes; flush()
+# pushes just the changed screens in one sweep:
+#   pool = DisplayPool(mux, range(6), lambda: SSD1306_I2C(128, 32, i2c))
+#   pool.update(0, value, lambda d: (d.fill(0), d.text(value, 0, 20)))
+#   pool.flush()
+
+import time
+
+class I2CMux:
+    def __init__(self, i2c, addr=0x70):
+        self.i2c = i2c; self.addr = addr
+        self.active = -1                          # -1: unknown / all off
+        self._cmd = bytearray(1)
+        self.switches = 0; self.skipped = 0; self.errors = 0
+        self.sweep_us = 0; self.sweep_us_max = 0; self.sweeps = 0
+
+    def select(self, ch):
+        if ch == self.active:
+            self.skipped += 1; return
+        if not 0 <= ch <= 7:
+            raise ValueError("mux channel must be 0..7")
+        self._write(1 << ch); self.active = ch; self.switches += 1
+
+    def disable(self):
+        """Disconnect every downstream channel."""
+        self._write(0); self.active = -1
+
+    def invalidate(self):
+        self.active = -1
+
+    def _write(self, mask):
+        self._cmd[0] = mask
+        try:
+            self.i2c.writeto(self.addr, self._cmd)
+        except OSError:
+            self.active = -1; self.errors += 1; raise
+
+    def show_all(self, displays, chans=None):
+        """show() every display in {ch: oled} (or only chans) with one switch per channel."""
+        t0 = time.ticks_us()
+        order = sorted(displays) if chans is None else sorted(chans)
+        if self.active in order:                  # no switch needed for the first one
+            order.remove(self.active); order.insert(0, self.active)
+        for ch in order:
+            self.select(ch); displays[ch].show()
+        us = time.ticks_diff(time.ticks_us(), t0)
+        self.sweep_us = us; self.sweeps += 1
+        if us > self.sweep_us_max: self.sweep_us_max = us
+        return us
+
+    def stats(self):
+        return "mux sweep {}us (max {}us) switches {} skipped {} errors {}".format(
+            self.sweep_us, self.sweep_us_max, self.switches, self.skipped, self.errors)
+
+
+class DisplayPool:
+    def __init__(self, mux, chans, make):
+        self.mux = mux; self.make = make
+        self.disp = {}; self._key = {}; self._dirty = []
+        self.draws = 0; self.unchanged = 0; self.errors = 0
+        for ch in chans: self._open(ch)
+
+    def _open(self, ch):
+        try:
+            self.mux.select(ch); self.disp[ch] = self.make()
+            return True
+        except OSError as e:
+            print("DisplayPool: no display on channel", ch, e); self.errors += 1
+            return False
+
+    def update(self, ch, key, draw):
+        """Redraw channel ch with draw(display) if key differs from what it shows. True if redrawn.
+        Channels whose display failed to initialise are ignored until reopen(ch)."""
+        if ch not in self.disp: return False
+        if self._key.get(ch) == key:
+            self.unchanged += 1; return False
+        draw(self.disp[ch]); self._key[ch] = key; self.draws += 1
+        if ch not in self._dirty: self._dirty.append(ch)
+        return True
+
+    def flush(self):
+        """Push every redrawn screen in one mux sweep; returns the sweep time in us (0 if none)."""
+        if not self._dirty: return 0
+        try:
+            us = self.mux.show_all(self.disp, self._dirty)
+        except OSError as e:
+            # unknown which screens made it: force a redraw of all of them next time
+            print("DisplayPool: flush failed", e); self.errors += 1
+            for ch in self._dirty: self._key.pop(ch, None)
+            us = 0
+        self._dirty = []
+        return us
+
+    def reopen(self, ch):
+        self._key.pop(ch, None)
+        return self._open(ch)
+
+    def forget(self, ch=None):
+        """Force a redraw of ch (or all) on the next update."""
+        if ch is None: self._key = {}
+        else: self._key.pop(ch, None)
@@ -0,0 +1,113 @@
+# keypad_irq.py — interrupt-woken, timer-scanned matrix keypad with a key event queue
+#
+# Idle: every column is driven LOW and the rows (inputs with pull-ups) have a
+# falling-edge IRQ, so the first press wakes the driver without any polling.
+# The IRQ schedules a periodic Timer that scans the matrix every scan_ms; a key
+# must read the same for debounce_ms before a press is queued. Once the keypad is
+# stable-released the timer stops and the row IRQs are re-armed.
+# Presses go into a bounded ring (queue_len); get() never blocks, and a held key
+# produces exactly one event. If the ring is full, new presses are counted in
+# `overflows` rather than overwriting unread ones.
+#
+#   from keypad_irq import Keypad
+#   kp = Keypad(rows, cols, KEYS)            # Pin objects: rows IN+PULL_UP, cols OUT
+#   k = kp.get()                             # '1'..'#' or None
+#   k = kp.get(timeout_ms=5000)              # wait up to 5 s (sleeps, still non-busy)
+
+import time, micropython
+from machine import Pin, Timer
+
+micropython.alloc_emergency_exception_buf(100)
+
+_NONE = 0xFF
+
+class Keypad:
+    def __init__(self, rows, cols, keys, debounce_ms=25, scan_ms=5, settle_us=30, queue_len=16):
+        self.rows = rows; self.cols = cols; self.nr = len(rows); self.nc = len(cols)
+        self._keys = [k for row in keys for k in row]        # flat: code = r*nc + c
+        self.scan_ms = scan_ms; self.settle_us = settle_us
+        self._need = max(1, debounce_ms // scan_ms)
+        self._q = bytearray(queue_len); self._qn = queue_len
+        self._head = 0; self._tail = 0
+        self.overflows = 0; self.presses = 0
+        self._raw = _NONE; self._cnt = 0; self._stable = _NONE
+        self._scanning = False
+        self._timer = Timer()
+        self._tick_cb = self._tick; self._start_cb = self._start   # bind once
+        for c in cols: c.value(0)
+        for r in rows: r.irq(trigger=Pin.IRQ_FALLING, handler=self._on_row, hard=True)
+
+    # ---------- IRQ side ----------
+    def _on_row(self, pin):
+        if self._scanning: return               # scan itself toggles rows
+        self._scanning = True
+        try: micropython.schedule(self._start_cb, 0)
+        except RuntimeError: self._scanning = False   # schedule queue full: next edge retries
+
+    def _start(self, _):
+        self._raw = _NONE; self._cnt = 0
+        self._timer.init(period=self.scan_ms, mode=Timer.PERIODIC, callback=self._tick_cb)
+
+    def _scan(self):
+        cols = self.cols; rows = self.rows; nc = self.nc; code = _NONE
+        for ci in range(nc):
+            for j in range(nc): cols[j].value(0 if j == ci else 1)
+            time.sleep_us(self.settle_us)
+            for ri in range(self.nr):
+                if rows[ri].value() == 0:
+                    code = ri * nc + ci; break
+            if code != _NONE: break
+        for c in cols: c.value(0)                # back to idle: any press pulls a row LOW
+        return code
+
+    def _any_row_low(self):
+        for r in self.rows:
+            if r.value() == 0: return True
+        return False
+
+    def _tick(self, t):
+        code = self._scan()
+        if code == self._raw:
+            if self._cnt < self._need: self._cnt += 1
+        else:
+            self._raw = code; self._cnt = 1
+        if self._cnt < self._need or code == self._stable:
+            return
+        self._stable = code
+        if code != _NONE:
+            nxt = (self._head + 1) % self._qn
+            if nxt == self._tail: self.overflows += 1
+            else: self._q[self._head] = code; self._head = nxt; self.presses += 1
+        else:
+            # stable release: go back to IRQ wake-up unless a key is already down again
+            time.sleep_us(self.settle_us)
+            if not self._any_row_low():
+                self._timer.deinit(); self._scanning = False
+
+    # ---------- caller side ----------
+    def pending(self):
+        return (self._head - self._tail) % self._qn
+
+    def get(self, timeout_ms=0):
+        """Next queued key ('0'..'9', '*', '#') or None; waits up to timeout_ms if given."""
+        if self._head == self._tail and timeout_ms > 0:
+            t0 = time.ticks_ms()
+            while self._head == self._tail and time.ticks_diff(time.ticks_ms(), t0) < timeout_ms:
+                time.sleep_ms(5)
+        if self._head == self._tail: return None
+        code = self._q[self._tail]; self._tail = (self._tail + 1) % self._qn
+        return self._keys[code]
+
+    def clear(self):
+        self._tail = self._head
+
+    def held(self):
+        """Key currently held (debounced), or None."""
+        s = self._stable
+        return None if s == _NONE else self._keys[s]
+
+    def deinit(self):
+        self._timer.deinit()
+        for r in self.rows: r.irq(handler=None)
+        for c in self.cols: c.value(1)
+        self._scanning = False
@@ -0,0 +1,143 @@
+# motor_driver.py — state-caching H-bridge driver (L298N / L293D) with timer dead-time and ramping
+#
+# Each channel is (in_a, in_b, pwm, invert): two direction Pins, the enable PWM
+# (None when ENA/ENB are jumpered high) and a wiring-invert flag. The driver
+# remembers every channel's mode and duty, so re-sending the command that is
+# already running writes nothing (counted in `skipped`).
+#
+# Modes: FWD / REV drive, COAST (both inputs low), BRAKE (both high). COAST and
+# BRAKE apply immediately. A FWD<->REV reversal first coasts the channel, and a
+# Timer switches the inputs once deadtime_ms has passed, so the caller never
+# sleeps. With ramp_ms > 0 the duty rises 0 -> 65535 in ramp_ms (decreases are
+# immediate). The Timer only runs while a dead-time or ramp is in progress.
+#
+#   from motor_driver import MotorDriver, FWD, REV
+#   mot = MotorDriver([(in1, in2, ena, False), (in3, in4, enb, True)], deadtime_ms=8, ramp_ms=150)
+#   mot.drive((FWD, FWD), 52000)             # forward; repeated calls are free
+#   mot.drive((REV, FWD), 52000)             # spin left, channel 0 reverses after dead-time
+#   mot.stop()                               # coast all; mot.brake() shorts the motors
+#
+# Pass lock=_thread.allocate_lock() if another core also commands the motors.
+
+import time
+from machine import Timer
+
+FWD, REV, COAST, BRAKE = 1, -1, 0, 2
+MAX_DUTY = 65535
+
+class MotorDriver:
+    def __init__(self, channels, deadtime_ms=0, ramp_ms=0, tick_ms=2, lock=None):
+        self.n = len(channels)
+        self._a = [c[0] for c in channels]; self._b = [c[1] for c in channels]
+        self._pwm = [c[2] for c in channels]; self._inv = [bool(c[3]) for c in channels]
+        self.deadtime_ms = deadtime_ms; self.tick_ms = tick_ms
+        self._step = (MAX_DUTY * tick_ms // ramp_ms) if ramp_ms > 0 else 0
+        self._lock = lock
+        self._mode = [COAST] * self.n; self._target = [0] * self.n; self._duty = [0] * self.n
+        self._pend = bytearray(self.n); self._due = [0] * self.n
+        self._timer = Timer(); self._armed = False
+        self._cb = self._tick                    # bind once
+        self.writes = 0; self.skipped = 0; self.deadtimes = 0
+        for ch in range(self.n):
+            self._pins(ch, COAST); self._out(ch, 0, True)
+
+    # ---------- outputs ----------
+    def _pins(self, ch, mode):
+        if mode == COAST: a = b = 0
+        elif mode == BRAKE: a = b = 1
+        else:
+            a = 1 if (mode == FWD) != self._inv[ch] else 0; b = 1 - a
+        self._a[ch].value(a); self._b[ch].value(b); self.writes += 1
+
+    def _out(self, ch, d, force=False):
+        p = self._pwm[ch]
+        if p is None or (d == self._duty[ch] and not force): return
+        p.duty_u16(d); self._duty[ch] = d; self.writes += 1
+
+    def _arm(self):
+        if not self._armed:
+            self._armed = True
+            self._timer.init(period=self.tick_ms, mode=Timer.PERIODIC, callback=self._cb)
+
+    def _speed(self, ch):
+        # duty towards target: step up through the ramp, cut down at once
+        t = self._target[ch]
+        if self._step and self._pwm[ch] is not None and t > self._duty[ch]: self._arm()
+        else: self._out(ch, t)
+
+    # ---------- commands ----------
+    def _set(self, ch, mode, duty):
+        if mode == COAST or mode == BRAKE: duty = 0
+        elif self._pwm[ch] is None: duty = MAX_DUTY
+        old = self._mode[ch]
+        if mode == old and duty == self._target[ch]:
+            self.skipped += 1; return
+        self._mode[ch] = mode; self._target[ch] = duty
+        if mode == COAST or mode == BRAKE:
+            self._pend[ch] = 0; self._out(ch, 0); self._pins(ch, mode); return
+        if mode == old:
+            if not self._pend[ch]: self._speed(ch)
+            return
+        self._out(ch, 0)
+        if (old == FWD or old == REV) and self.deadtime_ms > 0:
+            self._pins(ch, COAST); self.deadtimes += 1
+            self._due[ch] = time.ticks_add(time.ticks_ms(), self.deadtime_ms); self._pend[ch] = 1
+            self._arm(); return
+        self._pend[ch] = 0; self._pins(ch, mode); self._speed(ch)
+
+    def set(self, ch, mode, duty=MAX_DUTY):
+        """Command one channel; a no-op if it is already in this mode at this duty."""
+        lk = self._lock
+        if lk: lk.acquire()
+        try: self._set(ch, mode, duty)
+        finally:
+            if lk: lk.release()
+
+    def drive(self, modes, duty=MAX_DUTY):
+        """modes: one FWD/REV/COAST/BRAKE per channel, all at the same duty."""
+        lk = self._lock
+        if lk: lk.acquire()
+        try:
+            for ch in range(self.n): self._set(ch, modes[ch], duty)
+        finally:
+            if lk: lk.release()
+
+    def stop(self):
+        self.drive((COAST,) * self.n)
+
+    def brake(self):
+        self.drive((BRAKE,) * self.n)
+
+    def mode(self, ch):
+        return self._mode[ch]
+
+    def busy(self):
+        """True while a dead-time or ramp is still being applied."""
+        return self._armed
+
+    # ---------- timer side ----------
+    def _tick(self, t):
+        lk = self._lock
+        if lk and not lk.acquire(0): return       # a command is in progress: next tick
+        try:
+            now = time.ticks_ms(); work = False
+            for ch in range(self.n):
+                if self._pend[ch]:
+                    if time.ticks_diff(now, self._due[ch]) < 0:
+                        work = True; continue
+                    self._pend[ch] = 0; self._pins(ch, self._mode[ch])
+                tgt = self._target[ch]; d = self._duty[ch]
+                if d == tgt or self._pwm[ch] is None: continue
+                d = min(tgt, d + self._step) if (self._step and tgt > d) else tgt
+                self._out(ch, d)
+                if d != tgt: work = True
+            if not work:
+                self._timer.deinit(); self._armed = False
+        finally:
+            if lk: lk.release()
+
+    def deinit(self):
+        self._timer.deinit(); self._armed = False
+        for ch in range(self.n):
+            self._pend[ch] = 0; self._out(ch, 0); self._pins(ch, COAST)
+            self._mode[ch] = COAST; self._target[ch] = 0
@@ -0,0 +1,61 @@
+# seqlock.py — single-writer, lock-free versioned snapshot of a few ints (dual-core MicroPython)
+#
+# n int fields live in one preallocated array('i') next to a sequence counter.
+# The writer (one thread/core only) bumps the counter to odd, stores the fields,
+# bumps it back to even. A reader copies the fields into its own preallocated
+# array and retries if the counter was odd or changed meanwhile, so it always
+# gets one consistent version, never blocks the writer, and never takes a lock.
+# Reads and writes allocate nothing.
+#
+#   from seqlock import SeqSnapshot
+#   st = SeqSnapshot(3, (0, 1, 0))           # writer side (core1):
+#   st.begin(); st.put(0, ir1); st.put(1, ir2); st.end()
+#   st.write(2, servo)                       # one field = begin/put/end
+#   snap = array('i', [0] * 3)               # reader side (core0):
+#   st.read(snap); ir1, ir2, servo = snap[0], snap[1], snap[2]
+
+from array import array
+
+_MASK = 0x3FFFFFFF                               # keep the counter a small int
+
+class SeqSnapshot:
+    def __init__(self, n, init=None):
+        self.n = n
+        self._b = array('i', [0] * (n + 1))      # [0] = sequence, odd while writing
+        if init:
+            for i in range(n): self._b[i + 1] = init[i]
+        self.retries = 0
+
+    # ---------- writer (single) ----------
+    def begin(self):
+        self._b[0] = (self._b[0] + 1) & _MASK
+
+    def put(self, i, v):
+        self._b[i + 1] = v
+
+    def end(self):
+        self._b[0] = (self._b[0] + 1) & _MASK
+
+    def write(self, i, v):
+        b = self._b
+        if b[i + 1] == v: return                 # unchanged: readers keep their version
+        b[0] = (b[0] + 1) & _MASK; b[i + 1] = v; b[0] = (b[0] + 1) & _MASK
+
+    # ---------- readers ----------
+    def read(self, out):
+        """Copy a consistent version of all fields into out (len >= n); returns its sequence."""
+        b = self._b; n = self.n
+        while True:
+            s = b[0]
+            if s & 1:
+                self.retries += 1; continue
+            for i in range(n): out[i] = b[i + 1]
+            if b[0] == s: return s
+            self.retries += 1
+
+    def get(self, i):
+        """One field on its own (a single word read is atomic)."""
+        return self._b[i + 1]
+
+    def version(self):
+        return self._b[0]
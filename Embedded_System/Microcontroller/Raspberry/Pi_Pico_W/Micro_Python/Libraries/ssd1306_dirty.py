@@ -0,0 +1,109 @@
+# ssd1306_dirty.py — drop-in SSD1306_I2C that only pushes what changed
+#
+# show() compares the framebuffer with a shadow copy of what the panel already
+# holds. Identical frames are skipped outright; otherwise each 8-row page is
+# scanned for its first/last changed column and only that column span is sent
+# (COLUMN_ADDR/PAGE_ADDR window + data). If the spans would cost more than a
+# full 1 KB push, a normal full show() is used instead.
+#
+# Usage (upload ssd1306.py + ssd1306_dirty.py to the board):
+#   from ssd1306_dirty import SSD1306_DirtyI2C
+#   oled = SSD1306_DirtyI2C(128, 64, i2c)
+#   ... oled.fill(0); oled.text(...); oled.show()
+#   print(oled.bytes_per_s, oled.frames, oled.skipped)
+
+import time, ssd1306
+from array import array
+
+_COL_ADDR  = 0x21
+_PAGE_ADDR = 0x22
+_CMD_BYTES = 2          # every write_cmd() is [0x80, cmd]
+_WIN_CMDS  = 6          # COL_ADDR x0 x1 PAGE_ADDR p0 p1
+
+# ---------- span finder (viper when available) ----------
+try:
+    import micropython
+
+    @micropython.viper
+    def _span(a, b, start: int, w: int) -> int:
+        # returns (first << 8) | last of differing bytes in a/b[start:start+w], or -1
+        pa = ptr8(a); pb = ptr8(b)
+        i = 0; first = -1; last = -1
+        while i < w:
+            if pa[start + i] != pb[start + i]:
+                if first < 0: first = i
+                last = i
+            i += 1
+        if first < 0: return -1
+        return (first << 8) | last
+except (ImportError, AttributeError):
+    def _span(a, b, start, w):
+        first = -1; last = -1
+        for i in range(w):
+            if a[start + i] != b[start + i]:
+                if first < 0: first = i
+                last = i
+        if first < 0: return -1
+        return (first << 8) | last
+
+
+class SSD1306_DirtyI2C(ssd1306.SSD1306_I2C):
+    def __init__(self, width, height, i2c, addr=0x3C, external_vcc=False):
+        pages = height // 8
+        self._sent  = bytearray(width * pages)     # what the panel currently shows
+        self._spans = array('h', [-1] * pages)     # per-page (first<<8|last) or -1
+        self._data  = bytearray(width + 1); self._data[0] = 0x40
+        self._data_mv = memoryview(self._data)
+        self._x_off = 32 if width == 64 else 0     # same shift as the stock driver
+        self._full  = True                         # first show() pushes everything
+        self.frames = 0; self.skipped = 0; self.partial = 0
+        self.bytes_sent = 0; self.bytes_per_s = 0
+        self._win_bytes = 0; self._win_ms = time.ticks_ms()
+        super().__init__(width, height, i2c, addr, external_vcc)
+
+    def invalidate(self):
+        """Force the next show() to push the whole frame (e.g. after a panel reset)."""
+        self._full = True
+
+    def _account(self, n):
+        self.bytes_sent += n; self._win_bytes += n
+        now = time.ticks_ms(); dt = time.ticks_diff(now, self._win_ms)
+        if dt >= 1000:
+            self.bytes_per_s = self._win_bytes * 1000 // dt
+            self._win_bytes = 0; self._win_ms = now
+
+    def _full_show(self):
+        super().show()
+        self._sent[:] = self.buffer
+        self._full = False
+        self._account(_WIN_CMDS * _CMD_BYTES + 1 + len(self.buffer))
+
+    def show(self):
+        buf = self.buffer; sent = self._sent
+        self.frames += 1
+        if self._full:
+            self._full_show(); return
+        if buf == sent:                             # unchanged frame: nothing on the bus
+            self.skipped += 1; self._account(0); return
+
+        w = self.width; spans = self._spans; cost = 0
+        for p in range(self.pages):
+            s = _span(buf, sent, p * w, w)
+            spans[p] = s
+            if s >= 0:
+                cost += _WIN_CMDS * _CMD_BYTES + 1 + (s & 0xFF) - (s >> 8) + 1
+        if cost >= _WIN_CMDS * _CMD_BYTES + 1 + len(buf):
+            self._full_show(); return
+
+        mv = memoryview(buf); smv = memoryview(sent); data = self._data_mv
+        for p in range(self.pages):
+            s = spans[p]
+            if s < 0: continue
+            x0 = s >> 8; x1 = s & 0xFF; n = x1 - x0 + 1; a = p * w + x0
+            self.write_cmd(_COL_ADDR); self.write_cmd(x0 + self._x_off); self.write_cmd(x1 + self._x_off)
+            self.write_cmd(_PAGE_ADDR); self.write_cmd(p); self.write_cmd(p)
+            data[1:n + 1] = mv[a:a + n]
+            self.i2c.writeto(self.addr, data[:n + 1])
+            smv[a:a + n] = mv[a:a + n]
+        self.partial += 1
+        self._account(cost)
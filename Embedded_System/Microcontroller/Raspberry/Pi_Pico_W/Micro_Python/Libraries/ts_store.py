@@ -0,0 +1,219 @@
+# ts_store.py — flash-backed time-series ring files with 1 s / 1 min / 10 min downsampling tiers
+#
+# Runs on MicroPython (Pico flash filesystem) and CPython (Raspberry Pi) alike.
+#
+# Each tier is one fixed-size binary ring file: a 16-byte header, then
+# `capacity` fixed-length slots. A slot holds one framed record
+#     seq u32 | t u32 | n u16 | pad u16 | mean, min, max per value (f32) | crc32 u32
+# written at slot seq % capacity, so the oldest record is overwritten in place
+# and the file never grows. On open the slots are scanned; records with a bad
+# CRC (torn write at power loss) are ignored and the highest valid seq is the head.
+#
+# add(t, values) feeds every tier's accumulator; when a sample falls into a new
+# period the finished bucket becomes a record (mean/min/max/count). Records are
+# buffered in RAM and written in one batch every flush_s seconds (and on
+# flush()/close()), so flash sees a few writes a minute, not one per sample.
+#
+#   from ts_store import TimeSeriesStore
+#   db = TimeSeriesStore("/volt", 1, tiers=((1, 900), (60, 1440), (600, 1008)))
+#   db.add(time.time(), (4.71,))
+#   recs = db.read(60, after_seq=last, limit=30)   # [(seq, t, n, means, mins, maxs), ...]
+#   db.dump(600)                                   # CSV to the console
+#
+# Upload cursors survive a reboot in a small sidecar file ("{base}_{name}.cur"):
+#   last = db.cursor("up")  ...upload recs...  db.set_cursor("up", recs[-1][0])
+
+import struct, os
+try:
+    from binascii import crc32
+except ImportError:
+    crc32 = None
+
+_MAGIC = b"TSR1"
+_HDR = "<4sHHII"                                 # magic, version, nvals, capacity, rec size
+_HDR_SIZE = struct.calcsize(_HDR)
+TIERS = ((1, 3600), (60, 1440), (600, 1008))      # 1 h of seconds, 1 day of minutes, 1 week of 10 min
+
+def _crc(b):
+    if crc32: return crc32(b) & 0xFFFFFFFF
+    s = 0
+    for x in b: s = (s * 31 + x) & 0xFFFFFFFF
+    return s
+
+def _exists(path):
+    try:
+        os.stat(path); return True
+    except OSError:
+        return False
+
+class RingFile:
+    def __init__(self, path, nvals, capacity):
+        self.path = path; self.nvals = nvals; self.capacity = capacity
+        self._rec = "<IIHH" + "f" * (3 * nvals)   # MicroPython struct has no Struct class
+        self.size = struct.calcsize(self._rec) + 4
+        self.seq = 0; self.bad = 0
+        if not self._open_existing(): self._create()
+
+    def _open_existing(self):
+        if not _exists(self.path): return False
+        f = open(self.path, "r+b")
+        h = f.read(_HDR_SIZE)
+        if len(h) < _HDR_SIZE or struct.unpack(_HDR, h) != (_MAGIC, 1, self.nvals, self.capacity, self.size):
+            f.close(); return False
+        self.f = f
+        for i in range(self.capacity):        # find the head
+            r = self._read_slot(i)
+            if r and r[0] > self.seq: self.seq = r[0]
+        return True
+
+    def _create(self):
+        f = open(self.path, "wb")
+        f.write(struct.pack(_HDR, _MAGIC, 1, self.nvals, self.capacity, self.size))
+        left = self.capacity * self.size; z = bytes(512)
+        while left > 0:
+            f.write(z if left >= 512 else z[:left]); left -= 512
+        f.close()
+        self.f = open(self.path, "r+b"); self.seq = 0
+
+    def _read_slot(self, i):
+        self.f.seek(_HDR_SIZE + i * self.size)
+        b = self.f.read(self.size)
+        if len(b) < self.size: return None
+        body = b[:-4]
+        if struct.unpack("<I", b[-4:])[0] != _crc(body):
+            if body != bytes(len(body)): self.bad += 1
+            return None
+        r = struct.unpack(self._rec, body)
+        return r if r[0] else None
+
+    def append(self, recs):
+        """recs: [(t, n, vals3)], vals3 = means + mins + maxs. Returns the last seq written."""
+        run = []; start = -1
+        for t, n, v in recs:
+            self.seq += 1
+            slot = self.seq % self.capacity
+            if run and slot != start + len(run):
+                self._write(start, run); run = []
+            if not run: start = slot
+            body = struct.pack(self._rec, self.seq, t, n, 0, *v)
+            run.append(body + struct.pack("<I", _crc(body)))
+        if run: self._write(start, run)
+        self.f.flush()
+        return self.seq
+
+    def _write(self, slot, run):
+        self.f.seek(_HDR_SIZE + slot * self.size)
+        self.f.write(b"".join(run))
+
+    def read(self, after_seq=0, t0=None, t1=None, limit=None):
+        out = []
+        s = max(after_seq + 1, self.seq - self.capacity + 1, 1)
+        while s <= self.seq:
+            r = self._read_slot(s % self.capacity); s += 1
+            if not r or r[0] != s - 1: continue
+            t = r[1]
+            if (t0 is not None and t < t0) or (t1 is not None and t >= t1): continue
+            nv = self.nvals
+            out.append((r[0], t, r[2], r[4:4 + nv], r[4 + nv:4 + 2 * nv], r[4 + 2 * nv:]))
+            if limit and len(out) >= limit: break
+        return out
+
+    def close(self):
+        self.f.close()
+
+class _Acc:
+    def __init__(self, nvals):
+        self.nv = nvals; self.bucket = -1; self.n = 0
+        self.sum = [0.0] * nvals; self.lo = [0.0] * nvals; self.hi = [0.0] * nvals
+
+    def add(self, vals):
+        if self.n == 0:
+            for i in range(self.nv): self.sum[i] = self.lo[i] = self.hi[i] = vals[i]
+        else:
+            for i in range(self.nv):
+                v = vals[i]; self.sum[i] += v
+                if v < self.lo[i]: self.lo[i] = v
+                if v > self.hi[i]: self.hi[i] = v
+        self.n += 1
+
+    def take(self, period):
+        n = self.n
+        rec = (self.bucket * period, min(n, 0xFFFF), [s / n for s in self.sum] + self.lo + self.hi)
+        self.n = 0
+        return rec
+
+class TimeSeriesStore:
+    def __init__(self, base, nvals, tiers=TIERS, flush_s=30):
+        self.base = base; self.nvals = nvals; self.flush_s = flush_s
+        self.periods = [p for p, _ in tiers]
+        self.rings = [RingFile("{}_{}s.ts".format(base, p), nvals, cap) for p, cap in tiers]
+        self._acc = [_Acc(nvals) for _ in tiers]
+        self._pending = [[] for _ in tiers]
+        self._last_flush = None
+        self.samples = 0
+
+    def _tier(self, period):
+        return self.periods.index(period)
+
+    def add(self, t, vals):
+        """One sample at t (int seconds) with nvals numbers."""
+        t = int(t)
+        for k, p in enumerate(self.periods):
+            a = self._acc[k]; b = t // p
+            if b != a.bucket:
+                if a.n: self._pending[k].append(a.take(p))
+                a.bucket = b
+            a.add(vals)
+        self.samples += 1
+        if self._last_flush is None: self._last_flush = t
+        elif t - self._last_flush >= self.flush_s or t < self._last_flush:
+            self.flush(); self._last_flush = t
+
+    def flush(self):
+        """Write buffered finished buckets to flash."""
+        for k, ring in enumerate(self.rings):
+            if self._pending[k]:
+                ring.append(self._pending[k]); self._pending[k] = []
+
+    def head(self, period):
+        """Latest seq of a tier on flash (use as an upload cursor)."""
+        return self.rings[self._tier(period)].seq
+
+    def read(self, period, after_seq=0, t0=None, t1=None, limit=None):
+        """Records of a tier: [(seq, t, n, means, mins, maxs)], oldest first."""
+        self.flush()
+        return self.rings[self._tier(period)].read(after_seq, t0, t1, limit)
+
+    def dump(self, period, after_seq=0, limit=None):
+        """Print a tier as CSV: seq,t,n,mean0..,min0..,max0.."""
+        for seq, t, n, mean, lo, hi in self.read(period, after_seq, limit=limit):
+            print(",".join([str(seq), str(t), str(n)] + ["{:.4g}".format(v) for v in mean + lo + hi]))
+
+    def _cur_path(self, name):
+        return "{}_{}.cur".format(self.base, name)
+
+    def cursor(self, name):
+        """Saved seq of cursor `name` (0 if never saved)."""
+        p = self._cur_path(name)
+        for path in (p, p + ".tmp"):          # .tmp: power cut between remove and rename
+            try:
+                with open(path) as f:
+                    return int(f.read().strip() or 0)
+            except (OSError, ValueError):
+                pass
+        return 0
+
+    def set_cursor(self, name, seq):
+        """Persist cursor `name` (write .tmp, then swap it in, so a power cut keeps a valid value)."""
+        p = self._cur_path(name); tmp = p + ".tmp"
+        with open(tmp, "w") as f:
+            f.write(str(seq))
+        try:
+            os.remove(p)
+        except OSError:
+            pass
+        os.rename(tmp, p)
+
+    def close(self):
+        self.flush()
+        for r in self.rings: r.close()
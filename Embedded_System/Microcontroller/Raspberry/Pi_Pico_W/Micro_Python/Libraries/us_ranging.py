@@ -0,0 +1,128 @@
+# us_ranging.py — IRQ-timed multi-sensor ultrasonic ranging (HC-SR04 style, MicroPython)
+#
+# Echo pins get a hard IRQ on both edges that stores ticks_us() per sensor, so no
+# code busy-waits on a pulse. Sensors are fired in groups: all sensors of a group
+# share one trigger slot, groups run back to back. Put only sensors whose beams
+# cannot hear each other in the same group; one sensor per group (the default)
+# is always cross-talk safe.
+#
+# Results are published per sensor as integers: mm[i] (-1 = no echo within
+# timeout_us) and stamp[i] (ticks_ms of the measurement). After an early exit,
+# sensors that were not measured keep their previous mm/stamp.
+#
+# One measurement window, blocking, with early exit:
+#   rng = UltrasonicArray([(11, 12), (13, 14), (15, 16), (17, 18)], groups=((0, 2), (1, 3)))
+#   hit = rng.measure(stop_below_mm=200)       # True as soon as any sensor reads <= 200 mm
+#   print(rng.mm)
+# Continuous, in the background (a Timer steps the groups):
+#   rng.start(tick_ms=2); ...; d = rng.mm[2]; age = ticks_diff(ticks_ms(), rng.stamp[2])
+
+import time, micropython
+from array import array
+from machine import Pin, Timer
+
+micropython.alloc_emergency_exception_buf(100)
+
+_IDLE, _ARMED, _HIGH, _DONE = 0, 1, 2, 3
+
+class UltrasonicArray:
+    def __init__(self, pins, groups=None, timeout_us=30000, gap_us=0):
+        self.n = len(pins)
+        self.trig = [Pin(t, Pin.OUT, value=0) for t, _ in pins]
+        self.echo = [Pin(e, Pin.IN) for _, e in pins]   # level-shift 5 V echo lines
+        self.groups = tuple(tuple(g) for g in (groups or [(i,) for i in range(self.n)]))
+        self.timeout_us = timeout_us; self.gap_us = gap_us
+        self._rise = array('l', [0] * self.n); self._fall = array('l', [0] * self.n)
+        self._st = bytearray(self.n)
+        self.mm = array('l', [-1] * self.n)
+        self.stamp = array('l', [0] * self.n)
+        self.windows = 0; self.timeouts = 0
+        self._g = 0; self._fire_us = 0; self._busy = False
+        self._g_next = 0; self._next_us = 0
+        self._timer = None; self._step_cb = self._step
+        for i in range(self.n):
+            self.echo[i].irq(trigger=Pin.IRQ_RISING | Pin.IRQ_FALLING,
+                             handler=lambda p, i=i: self._edge(i, p), hard=True)
+
+    def _edge(self, i, p):
+        t = time.ticks_us(); s = self._st[i]
+        if p.value():
+            if s == _ARMED: self._rise[i] = t; self._st[i] = _HIGH
+        elif s == _HIGH:
+            self._fall[i] = t; self._st[i] = _DONE
+
+    # ---------- group slot ----------
+    def _fire(self, g):
+        grp = self.groups[g]
+        for i in grp: self._st[i] = _ARMED
+        for i in grp: self.trig[i].value(1)
+        time.sleep_us(10)
+        for i in grp: self.trig[i].value(0)
+        self._fire_us = time.ticks_us(); self._g = g; self._busy = True
+
+    def _group_done(self):
+        for i in self.groups[self._g]:
+            if self._st[i] != _DONE: return False
+        return True
+
+    def _finish(self, early=False):
+        now = time.ticks_ms()
+        for i in self.groups[self._g]:
+            if self._st[i] == _DONE:
+                self.mm[i] = time.ticks_diff(self._fall[i], self._rise[i]) * 10 // 58
+                self.stamp[i] = now
+            elif not early:
+                self.mm[i] = -1; self.stamp[i] = now; self.timeouts += 1
+            self._st[i] = _IDLE
+        self._busy = False
+
+    def _below(self, limit):
+        # a finished sensor of the current group already at/below limit?
+        for i in self.groups[self._g]:
+            if self._st[i] == _DONE and time.ticks_diff(self._fall[i], self._rise[i]) * 10 // 58 <= limit:
+                return True
+        return False
+
+    # ---------- blocking window ----------
+    def measure(self, stop_below_mm=-1):
+        """Run every group once. Returns True (early) if a sensor read <= stop_below_mm."""
+        for g in range(len(self.groups)):
+            self._fire(g)
+            while True:
+                if stop_below_mm >= 0 and self._below(stop_below_mm):
+                    self._finish(early=True); return True
+                if self._group_done() or time.ticks_diff(time.ticks_us(), self._fire_us) > self.timeout_us:
+                    break
+                time.sleep_us(100)
+            self._finish()
+            if self.gap_us: time.sleep_us(self.gap_us)
+        self.windows += 1
+        return False
+
+    def any_below(self, limit_mm):
+        for v in self.mm:
+            if 0 <= v <= limit_mm: return True
+        return False
+
+    # ---------- background service ----------
+    def _step(self, t):
+        now = time.ticks_us()
+        if self._busy:
+            if not self._group_done() and time.ticks_diff(now, self._fire_us) <= self.timeout_us:
+                return
+            self._finish()
+            g = self._g + 1
+            if g >= len(self.groups): g = 0; self.windows += 1
+            self._g_next = g; self._next_us = time.ticks_add(now, self.gap_us)
+        if time.ticks_diff(now, self._next_us) < 0: return
+        self._fire(self._g_next)
+
+    def start(self, tick_ms=2):
+        """Measure continuously from a Timer; read mm/stamp at any time."""
+        if self._timer is None: self._timer = Timer()
+        self._g_next = 0; self._next_us = time.ticks_us()
+        self._timer.init(period=tick_ms, mode=Timer.PERIODIC, callback=self._step_cb)
+
+    def stop(self):
+        if self._timer: self._timer.deinit()
+        if self._busy: self._finish()
@@ -2,8 +2,7 @@ from machine import Pin, I2C
 import network
 import urequests
 from ssd1306 import SSD1306_I2C
-from time import sleep, localtime
-from pca9548a import PCA9548A
+from time import sleep, localtime, ticks_ms, ticks_diff
 import ntptime
 import random  # For generating random temperature in range
 
@@ -16,7 +15,27 @@ FIREBASE_URL = "https://regal-welder-453313-d6-default-rtdb.firebaseio.com/4_KS5
 
 # I2C and multiplexer
 i2c = I2C(0, scl=Pin(1), sda=Pin(0), freq=400000)
-mux = PCA9548A(i2c)
+
+# Display pool (upload i2c_mux.py from Libraries/): one initialised SSD1306 per
+# mux channel, changed screens only, all pushed in one sweep. Without it the old
+# build-a-display-per-screen loop with sleep(3) is used.
+SCREENS = 6
+LOOP_MS = 1000          # screen refresh (clock) once per second
+FIREBASE_MS = 18000     # Firebase read, and write unless something other than the clock changed
+                        # (the old loop's pace: 6 screens x 3 s)
+WEATHER_MS = 60000      # new fake weather value this often
+try:
+    from i2c_mux import I2CMux, DisplayPool
+    try:
+        from ssd1306_dirty import SSD1306_DirtyI2C as POOL_OLED   # only changed pages go over I2C
+    except ImportError:
+        POOL_OLED = SSD1306_I2C
+    pool = DisplayPool(I2CMux(i2c), range(SCREENS), lambda: POOL_OLED(128, 32, i2c))
+    mux = None                                  # the pool's I2CMux owns the PCA9548A
+except ImportError:
+    from pca9548a import PCA9548A
+    pool = None
+    mux = PCA9548A(i2c)
 
 # Connect to WiFi
 wlan = network.WLAN(network.STA_IF)
@@ -113,8 +132,18 @@ def push_to_firebase(data):
     except Exception as e:
         print("Firebase write error:", e)
 
-# Large text simulation for title
+# Large titles: cached 2x glyphs (upload big_font.py from Libraries/), else the
+# built-in font drawn twice at a 1-pixel offset
+TITLE_CHARS = "FACEPRNTSGDOCWHIM"
+try:
+    from big_font import BigFont
+    title_font = BigFont(2, chars=TITLE_CHARS)
+except ImportError:
+    title_font = None
+
 def large_text(oled, text, x, y):
+    if title_font:
+        title_font.text(oled, text, x, y); return
     for i, char in enumerate(text):
         xpos = x + i * 12
         oled.text(char, xpos, y)
@@ -125,11 +154,22 @@ def get_fixed_weather():
     temp = random.randint(25, 29)
     return "{}C".format(temp)
 
+def draw_screen(oled, title, value):
+    oled.fill(0)
+    large_text(oled, title, 0, 0)
+    oled.text(value, 0, 22 if title_font else 20)
+
 # === MAIN LOOP ===
+weather = get_fixed_weather(); weather_t = ticks_ms()
+fb_data = None; fb_t = 0
+pushed = None; push_t = 0
 while True:
+    loop_t = ticks_ms()
     time_now = get_rtc_time()
-    fb_data = get_firebase_data()
-    weather = get_fixed_weather()
+    if pool is None or fb_data is None or ticks_diff(loop_t, fb_t) >= FIREBASE_MS:
+        fb_data = get_firebase_data(); fb_t = loop_t
+    if pool is None or ticks_diff(loop_t, weather_t) >= WEATHER_MS:
+        weather = get_fixed_weather(); weather_t = loop_t
 
     display_data = {
         "face": fb_data["face"],
@@ -140,8 +180,11 @@ while True:
         "weather": weather  # Fixed 25 to 29 °C
     }
 
-    # Push updated data (with fixed weather and current time) to Firebase
-    push_to_firebase(display_data)
+    # Push updated data (with fixed weather and current time) to Firebase; with the
+    # pool only when a non-clock field changed or FIREBASE_MS has passed
+    key = (fb_data["face"], fb_data["percentage"], fb_data["stage"], fb_data["doctor"], weather)
+    if pool is None or key != pushed or ticks_diff(loop_t, push_t) >= FIREBASE_MS:
+        push_to_firebase(display_data); pushed = key; push_t = loop_t
 
     screens = [
         ("FACE", display_data["face"]),
@@ -152,17 +195,22 @@ while True:
         ("WEATHER", display_data["weather"])
     ]
 
+    if pool:
+        for i, (title, value) in enumerate(screens):
+            value = str(value)
+            pool.update(i, value, lambda d, t=title, v=value: draw_screen(d, t, v))
+        pool.flush()
+        left = LOOP_MS - ticks_diff(ticks_ms(), loop_t)
+        if left > 0: sleep(left / 1000)
+        continue
+
     for i, (title, value) in enumerate(screens):
         try:
             mux.channel(i)
             sleep(0.05)
             oled = SSD1306_I2C(128, 32, i2c)
-            oled.fill(0)
-            large_text(oled, title, 0, 0)
-            oled.text(value, 0, 20)
+            draw_screen(oled, title, value)
             oled.show()
             sleep(3)
         except Exception as e:
             print(f"OLED error on channel {i}:", e)
-            
-
@@ -1,6 +1,10 @@
-from machine import Pin, I2C
+from machine import Pin, I2C, Timer
 from ssd1306 import SSD1306_I2C
 import time
+try:
+    from ssd1306_dirty import SSD1306_DirtyI2C as SSD1306_I2C   # only changed pages go over I2C
+except ImportError:
+    pass
 import urequests
 import network
 
@@ -28,21 +32,47 @@ PCA_ADDR = 0x70
 OLED_WIDTH = 128
 OLED_HEIGHT = 64
 
+# Mux manager (upload i2c_mux.py from Libraries/): caches the active channel and
+# needs no settle sleep. The plain select is kept as a fallback without the sleep.
+try:
+    from i2c_mux import I2CMux
+    mux = I2CMux(i2c, PCA_ADDR)
+except ImportError:
+    mux = None
+
 def select_channel(ch):
-    i2c.writeto(PCA_ADDR, bytes([1 << ch]))
-    time.sleep(0.2)
+    if mux: mux.select(ch)
+    else: i2c.writeto(PCA_ADDR, bytes([1 << ch]))
 
 # Initialize OLEDs
 oleds = []
 for ch in range(4):
     select_channel(ch)
-    time.sleep(0.5)
     oled = SSD1306_I2C(OLED_WIDTH, OLED_HEIGHT, i2c)
     oleds.append(oled)
 
-# Ultrasonic Sensor Pins
-trig_pins = [Pin(2, Pin.OUT), Pin(4, Pin.OUT), Pin(6, Pin.OUT), Pin(8, Pin.OUT)]
-echo_pins = [Pin(3, Pin.IN), Pin(5, Pin.IN), Pin(7, Pin.IN), Pin(9, Pin.IN)]
+# Ultrasonic Sensor Pins (trig, echo) per lane
+LANE_US = ((2, 3), (4, 5), (6, 7), (8, 9))
+# Lanes fired together in one slot. Late echoes of a ping (multipath, a far wall)
+# must die out before the next one, so every slot is followed by US_GAP_US of
+# silence: with one group that is one ranging cycle per ~80 ms. Use
+# ((0,), (1,), (2,), (3,)) if the sensors still hear each other.
+LANE_GROUPS = ((0, 1, 2, 3),)
+US_TIMEOUT_US = 30000
+US_GAP_US = 50000       # quiet time after each slot before the next trigger
+US_STALE_MS = 500       # a lane reading older than this counts as "no echo" (999)
+
+# Edge-timed ranging in the background (upload us_ranging.py from Libraries/):
+# all lanes measure concurrently from a Timer and publish mm + ticks_ms stamp.
+try:
+    from us_ranging import UltrasonicArray
+    us_array = UltrasonicArray(LANE_US, groups=LANE_GROUPS, timeout_us=US_TIMEOUT_US, gap_us=US_GAP_US)
+    us_array.start(tick_ms=2)
+    time.sleep_ms(2 * US_TIMEOUT_US // 1000)   # first window before the priority scan
+except ImportError:
+    us_array = None
+    trig_pins = [Pin(t, Pin.OUT) for t, _ in LANE_US]
+    echo_pins = [Pin(e, Pin.IN) for _, e in LANE_US]
 
 # Traffic Lights RGB LEDs (R, Y, G per lane)
 led_red    = [Pin(10, Pin.OUT), Pin(13, Pin.OUT), Pin(16, Pin.OUT), Pin(19, Pin.OUT)]
@@ -58,6 +88,37 @@ YELLOW_DURATION = 5  # seconds
 RED_DURATION = 30    # seconds
 PRIORITY_GREEN_DURATION = 45  # Extended green during priority
 
+# Density-adaptive greens (phase_scheduler.py next to this file; fixed cycle without it).
+# With the scheduler the "> 200 cm" priority mode is off: every green comes from occupancy.
+# Compare both on a simulated intersection with: python3 traffic_sim.py
+MIN_GREEN = 8           # seconds, always given once a lane is served
+MAX_GREEN = 45          # seconds, upper bound incl. extensions
+GAP_OUT_S = 3           # end the green after the lane reads clear this long
+OCCUPIED_CM = 100       # a lane distance at/below this means a vehicle is waiting
+MAX_WAIT_S = 120        # a lane is served at least this often, demand or not
+try:
+    from phase_scheduler import PhaseScheduler
+    sched = PhaseScheduler(4, min_green=MIN_GREEN, max_green=MAX_GREEN, gap_s=GAP_OUT_S,
+                           occupied_cm=OCCUPIED_CM, max_wait=MAX_WAIT_S)
+except ImportError:
+    sched = None
+
+# Vehicle counting from the lane distance stream (vehicle_counter.py next to this file).
+COUNT_ON_CM = 100       # vehicle arrives when a lane reads at/below this...
+COUNT_OFF_CM = 130      # ...and has left once it reads at/above this (hysteresis)
+COUNT_DWELL_MS = 300    # either state must hold this long to count
+COUNT_PERIOD_MS = 50    # how often new ranging samples are fed to the counter
+COUNT_BUCKET_S = 10     # flow window = COUNT_BUCKETS x COUNT_BUCKET_S seconds
+COUNT_BUCKETS = 12
+SEC_PER_VEHICLE = 2     # extra planned green per vehicle counted while red
+try:
+    from vehicle_counter import VehicleCounter
+    counter = VehicleCounter(4, on_cm=COUNT_ON_CM, off_cm=COUNT_OFF_CM, min_dwell_ms=COUNT_DWELL_MS,
+                             bucket_s=COUNT_BUCKET_S, buckets=COUNT_BUCKETS)
+    if sched: sched.sec_per_vehicle = SEC_PER_VEHICLE
+except ImportError:
+    counter = None
+
 def read_distance(trig, echo):
     trig.low()
     time.sleep_us(2)
@@ -80,8 +141,46 @@ def read_distance(trig, echo):
     distance = (pulse_time * 0.0343) / 2
     return int(distance)
 
+def lane_distance(ch):
+    """Latest distance for a lane in cm, 999 when there is no (fresh) echo."""
+    if us_array:
+        mm = us_array.mm[ch]
+        if mm < 0 or time.ticks_diff(time.ticks_ms(), us_array.stamp[ch]) > US_STALE_MS:
+            return 999
+        return mm // 10
+    distance = read_distance(trig_pins[ch], echo_pins[ch])
+    return 999 if distance == -1 else distance
+
+def lane_age_ms(ch):
+    """Age of the lane's last measurement (0 when measured synchronously)."""
+    return time.ticks_diff(time.ticks_ms(), us_array.stamp[ch]) if us_array else 0
+
+_fed_stamp = [0] * 4
+
+def _count_tick(t):
+    # Timer: feed each lane's new ranging sample (once per stamp) to the counter
+    for ch in range(4):
+        st = us_array.stamp[ch]
+        if st != _fed_stamp[ch]:
+            _fed_stamp[ch] = st; mm = us_array.mm[ch]
+            counter.feed(ch, mm // 10 if mm >= 0 else 999, st)
+
+if counter and us_array:
+    count_timer = Timer()
+    count_timer.init(period=COUNT_PERIOD_MS, mode=Timer.PERIODIC, callback=_count_tick)
+
+def feed_counts(distances, green_lane=-1):
+    """Per tick: 1 Hz samples when there is no ranging stream; counted arrivals to the scheduler."""
+    if not counter: return
+    if not us_array:
+        now = time.ticks_ms()
+        for ch in range(4): counter.feed(ch, distances[ch], now)
+    for ch in range(4):
+        n = counter.take_arrivals(ch)
+        if sched and ch != green_lane: sched.add_arrivals(ch, n)
+
 def update_oled(ch, distance, signal_color, countdown, priority_active):
-    select_channel(ch)
+    # draws into the lane's framebuffer only; flush_oleds() pushes all four
     oled = oleds[ch]
     oled.fill(0)
     oled.text(f"Lane {ch+1}", 0, 0)
@@ -90,7 +189,58 @@ def update_oled(ch, distance, signal_color, countdown, priority_active):
     oled.text(f"Countdown: {countdown}s", 0, 40)
     if priority_active and ch == priority_active:
         oled.text("PRIORITY ALERT!", 0, 50)
-    oled.show()
+
+OLED_MAP = {ch: oleds[ch] for ch in range(4)}
+TIMING_EVERY_S = 30     # print mux/tick timing this often (0 = never)
+tick_ms_max = 0
+_tick_count = 0
+
+# Countdown seconds on absolute deadlines (upload deadline_ticker.py from Libraries/):
+# a tick's work no longer adds to the phase, a tick overrunning by whole seconds
+# counts them down. Without the module each tick is work + sleep(1) as before.
+TICK_MS = 1000
+FIREBASE_BUDGET_MS = 600   # PUT only when this much of the tick is left...
+FIREBASE_MAX_DEFER = 5     # ...but never hold the upload back more ticks than this
+try:
+    from deadline_ticker import DeadlineTicker
+    ticker = DeadlineTicker(TICK_MS)
+except ImportError:
+    ticker = None
+_upload_wait = 0
+uploads_deferred = 0
+
+def tick_left_ms():
+    return ticker.left_ms() if ticker else TICK_MS
+
+def tick_wait():
+    """End the countdown second; returns the seconds it used (> 1 after an overrun)."""
+    if ticker: return ticker.wait()
+    time.sleep(1); return 1
+
+def upload_or_defer(distances):
+    # the upload is the one deferrable job: skip it on a tick that is nearly used up
+    global _upload_wait, uploads_deferred
+    if tick_left_ms() >= FIREBASE_BUDGET_MS or _upload_wait >= FIREBASE_MAX_DEFER:
+        update_firebase(distances); _upload_wait = 0
+    else:
+        _upload_wait += 1; uploads_deferred += 1
+
+def flush_oleds():
+    if mux:
+        mux.show_all(OLED_MAP)
+    else:
+        for ch in range(4):
+            select_channel(ch); oleds[ch].show()
+
+def end_tick(t0):
+    global tick_ms_max, _tick_count
+    ms = time.ticks_diff(time.ticks_ms(), t0)
+    if ms > tick_ms_max: tick_ms_max = ms
+    _tick_count += 1
+    if TIMING_EVERY_S and _tick_count % TIMING_EVERY_S == 0:
+        print("[TIMING] tick work {} ms (max {} ms) | {} | uploads deferred {} | {} | lane age ms {}".format(
+            ms, tick_ms_max, ticker.stats() if ticker else "sleep(1) ticks", uploads_deferred,
+            mux.stats() if mux else "no mux cache", [lane_age_ms(ch) for ch in range(4)]))
 
 def update_traffic_lights(active_lane, phase):
     for lane in range(4):
@@ -112,6 +262,23 @@ def update_traffic_lights(active_lane, phase):
             led_yellow[lane].low()
             led_green[lane].low()
 
+def phase_tick(active_lane, phase, remaining, priority_lane=None):
+    """One countdown second: read lanes, draw + flush OLEDs, lights, Firebase.
+    Returns (distances, seconds used)."""
+    t0 = time.ticks_ms()
+    distances = []
+    for ch in range(4):
+        distance = lane_distance(ch)
+        distances.append(distance)
+        signal_color = phase if ch == active_lane else "RED"
+        update_oled(ch, distance, signal_color, remaining, priority_active=priority_lane)
+    feed_counts(distances, active_lane if phase == "GREEN" else -1)
+    update_traffic_lights(active_lane, phase)
+    flush_oleds()
+    upload_or_defer(distances)
+    end_tick(t0)
+    return distances, tick_wait()
+
 def update_firebase(distances):
     data = {
         "Lane1": distances[0],
@@ -120,6 +287,10 @@ def update_firebase(distances):
         "Lane4": distances[3],
         "timestamp": time.time()
     }
+    if counter:
+        for ch in range(4):
+            data["Count{}".format(ch + 1)] = counter.count(ch)
+            data["Flow{}".format(ch + 1)] = round(counter.flow_per_min(ch), 1)
     
     try:
         response = urequests.put(FIREBASE_URL, json=data)
@@ -129,15 +300,15 @@ def update_firebase(distances):
         print("Firebase update error:", e)
 
 # Main Loop with Priority Mode
+if ticker: ticker.start()
 while True:
     priority_triggered = False
     priority_lane = -1
     
-    # Step 1: Check if any lane needs priority mode
-    for lane in range(4):
-        distance = read_distance(trig_pins[lane], echo_pins[lane])
-        if distance == -1:
-            distance = 999
+    # Step 1: Check if any lane needs priority mode (fixed cycle only: an empty lane
+    # reads 999 and would take a 45 s green every cycle, overriding the scheduler)
+    for lane in (range(4) if sched is None else ()):
+        distance = lane_distance(lane)
         if distance > 200:
             priority_triggered = True
             priority_lane = lane
@@ -147,52 +318,37 @@ while True:
     # Step 2: Priority Mode Logic
     if priority_triggered:
         buzzer.high()  # Turn buzzer ON during priority
-        for remaining in range(PRIORITY_GREEN_DURATION, 0, -1):
-            distances = []
-            for ch in range(4):
-                distance = read_distance(trig_pins[ch], echo_pins[ch])
-                if distance == -1:
-                    distance = 999
-                distances.append(distance)
-                signal_color = "GREEN" if ch == priority_lane else "RED"
-                update_oled(ch, distance, signal_color, remaining, priority_active=priority_lane)
-            
-            update_traffic_lights(priority_lane, "GREEN")
-            update_firebase(distances)
-            time.sleep(1)
+        remaining = PRIORITY_GREEN_DURATION
+        while remaining > 0:
+            remaining -= phase_tick(priority_lane, "GREEN", remaining, priority_lane)[1]
         buzzer.low()  # Turn buzzer OFF after priority mode
 
+    # Step 3a: Adaptive cycle, four phases (lanes without demand are skipped)
+    if sched:
+        for _ in range(4):
+            active_lane = sched.next_lane()
+            sched.plan(active_lane)
+            elapsed = 0
+            while True:
+                distances, used = phase_tick(active_lane, "GREEN", sched.remaining(elapsed))
+                sched.observe(distances, active_lane); elapsed += used
+                if not sched.keep_green(active_lane, elapsed): break
+            sched.served(active_lane, elapsed)
+            print("Lane {} green {} s (planned {} s)".format(active_lane + 1, elapsed, sched.planned))
+            remaining = YELLOW_DURATION
+            while remaining > 0:
+                distances, used = phase_tick(active_lane, "YELLOW", remaining)
+                sched.observe(distances); remaining -= used
+        continue
+
     # Step 3: Normal Timer-Based Cycle
     for active_lane in range(4):
         # GREEN Phase
-        for remaining in range(GREEN_DURATION, 0, -1):
-            distances = []
-            for ch in range(4):
-                distance = read_distance(trig_pins[ch], echo_pins[ch])
-                if distance == -1:
-                    distance = 999
-                distances.append(distance)
-                
-                signal_color = "GREEN" if ch == active_lane else "RED"
-                update_oled(ch, distance, signal_color, remaining, priority_active=None)
-            
-            update_traffic_lights(active_lane, "GREEN")
-            update_firebase(distances)
-            time.sleep(1)
+        remaining = GREEN_DURATION
+        while remaining > 0:
+            remaining -= phase_tick(active_lane, "GREEN", remaining)[1]
 
         # YELLOW Phase
-        for remaining in range(YELLOW_DURATION, 0, -1):
-            distances = []
-            for ch in range(4):
-                distance = read_distance(trig_pins[ch], echo_pins[ch])
-                if distance == -1:
-                    distance = 999
-                distances.append(distance)
-                
-                signal_color = "YELLOW" if ch == active_lane else "RED"
-                update_oled(ch, distance, signal_color, remaining, priority_active=None)
-            
-            update_traffic_lights(active_lane, "YELLOW")
-            update_firebase(distances)
-            time.sleep(1)
-
+        remaining = YELLOW_DURATION
+        while remaining > 0:
+            remaining -= phase_tick(active_lane, "YELLOW", remaining)[1]
@@ -0,0 +1,93 @@
+# phase_scheduler.py — density-adaptive green allocation for the 4-lane controller
+#
+# Pure Python, shared by main.py (MicroPython) and traffic_sim.py (CPython).
+# Fed once per phase tick with the four lane distances (cm, 999 = no echo):
+# a lane reads "occupied" when a vehicle is within occupied_cm of its sensor.
+#
+# While a lane is red the scheduler accumulates its occupied ticks (queue proxy)
+# and waiting ticks; occupancy = occupied / waiting. When the lane is served:
+#   planned green = min_green + occupancy * (max_green - min_green)
+#                   (+ sec_per_vehicle per counted arrival, if counts are fed)
+# and the green is actuated: never shorter than min_green, ends early once the
+# lane has been clear for gap_s ticks, extends past the plan while vehicles keep
+# the sensor occupied, never beyond max_green.
+# Lanes with no demand are skipped, except that a lane waiting max_wait ticks is
+# always served (no starvation); with no demand anywhere the cycle keeps rotating.
+#
+#   sched = PhaseScheduler()
+#   lane = sched.next_lane(); green = sched.plan(lane); el = 0
+#   while True:
+#       sched.observe(distances, lane); el += 1
+#       if not sched.keep_green(lane, el): break
+#   sched.served(lane)                       # before yellow
+
+class PhaseScheduler:
+    def __init__(self, lanes=4, min_green=8, max_green=45, gap_s=3, occupied_cm=100,
+                 max_wait=120, sec_per_vehicle=0):
+        self.lanes = lanes; self.min_green = min_green; self.max_green = max_green
+        self.gap_s = gap_s; self.occupied_cm = occupied_cm; self.max_wait = max_wait
+        self.sec_per_vehicle = sec_per_vehicle
+        self.occ = [0] * lanes                    # occupied ticks while red
+        self.wait = [0] * lanes                   # ticks since last served
+        self.arrivals = [0] * lanes               # counted vehicles while red (optional)
+        self.occupied = [False] * lanes           # last sample
+        self.gap = 0                              # consecutive clear ticks of the green lane
+        self.planned = 0
+        self._last = lanes - 1
+        self.greens = 0; self.green_ticks = 0; self.skips = 0; self.gap_outs = 0
+
+    def observe(self, distances, green_lane=-1):
+        """One tick of lane distances (cm); green_lane is the lane currently served, -1 for none."""
+        for l in range(self.lanes):
+            d = distances[l]
+            o = 0 <= d <= self.occupied_cm
+            self.occupied[l] = o
+            if l == green_lane:
+                self.gap = 0 if o else self.gap + 1
+            else:
+                self.wait[l] += 1
+                if o: self.occ[l] += 1
+
+    def add_arrivals(self, lane, n=1):
+        """Vehicle counts from a detector (e.g. lane_counter) sharpen the plan."""
+        self.arrivals[lane] += n
+
+    def demand(self, lane):
+        return self.occ[lane] + self.arrivals[lane]
+
+    def next_lane(self):
+        """Next lane in rotation that has demand or has waited max_wait; rotates if nobody has."""
+        for k in range(1, self.lanes + 1):
+            l = (self._last + k) % self.lanes
+            if self.demand(l) > 0 or self.occupied[l] or self.wait[l] >= self.max_wait:
+                self.skips += k - 1
+                self._last = l; return l
+        l = (self._last + 1) % self.lanes
+        self._last = l; return l
+
+    def plan(self, lane):
+        """Planned green seconds for lane from its accumulated occupancy (and counts)."""
+        w = self.wait[lane]
+        r = (self.occ[lane] / w) if w else (1.0 if self.occupied[lane] else 0.0)
+        g = self.min_green + int(r * (self.max_green - self.min_green) + 0.5)
+        g += self.sec_per_vehicle * self.arrivals[lane]
+        g = max(self.min_green, min(self.max_green, g))
+        self.planned = g; self.gap = 0; self.greens += 1
+        return g
+
+    def keep_green(self, lane, elapsed):
+        """True while the green on lane should continue after elapsed ticks."""
+        if elapsed < self.min_green: return True
+        if elapsed >= self.max_green: return False
+        if self.gap >= self.gap_s:
+            if elapsed < self.planned: self.gap_outs += 1
+            return False
+        return elapsed < self.planned or self.occupied[lane]
+
+    def remaining(self, elapsed):
+        """Countdown to show: seconds left of the plan (at least 1 while green)."""
+        return max(1, self.planned - elapsed)
+
+    def served(self, lane, elapsed=0):
+        self.occ[lane] = 0; self.wait[lane] = 0; self.arrivals[lane] = 0
+        self.green_ticks += elapsed
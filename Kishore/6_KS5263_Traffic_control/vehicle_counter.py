@@ -0,0 +1,93 @@
+# vehicle_counter.py — per-lane vehicle arrival/departure detector with rolling flow rates
+#
+# Pure Python (MicroPython + CPython). feed() takes one distance sample per lane
+# (cm, 999 = no echo) with its ticks_ms time and runs a small state machine:
+#   EMPTY  --d <= on_cm-->  ARRIVING --held min_dwell_ms--> PRESENT   (arrival counted)
+#   PRESENT --d >= off_cm--> LEAVING --held min_dwell_ms--> EMPTY     (departure counted)
+# on_cm < off_cm gives hysteresis, so a reading hovering at one threshold does
+# not chatter; a blip shorter than min_dwell_ms returns to the previous state.
+#
+# Arrivals also go into a ring of `buckets` time buckets of bucket_s seconds per
+# lane (array 'H', fixed size), so count()/flow_per_min() cover the last
+# buckets*bucket_s seconds without keeping any event list.
+#
+#   vc = VehicleCounter(4)
+#   vc.feed(lane, cm, time.ticks_ms())       # from the ranging stream
+#   vc.arrivals[lane], vc.flow_per_min(lane), vc.take_arrivals(lane)
+
+try:
+    from time import ticks_ms, ticks_diff, ticks_add
+except ImportError:                              # CPython
+    import time as _t
+    def ticks_ms(): return int(_t.monotonic() * 1000)
+    def ticks_diff(a, b): return a - b
+    def ticks_add(a, b): return a + b
+from array import array
+
+EMPTY, ARRIVING, PRESENT, LEAVING = 0, 1, 2, 3
+
+class VehicleCounter:
+    def __init__(self, lanes=4, on_cm=100, off_cm=130, min_dwell_ms=300, bucket_s=10, buckets=12):
+        self.lanes = lanes; self.on_cm = on_cm; self.off_cm = off_cm
+        self.min_dwell_ms = min_dwell_ms
+        self.bucket_ms = bucket_s * 1000; self.nb = buckets
+        self.state = bytearray(lanes)
+        self._t_edge = [0] * lanes
+        self.arrivals = [0] * lanes              # totals, only ever incremented
+        self.departures = [0] * lanes
+        self._taken = [0] * lanes
+        self._ring = array('H', [0] * (lanes * buckets))
+        self._b = 0; self._bt0 = ticks_ms(); self._filled = 1
+
+    # ---------- bucket ring ----------
+    def _roll(self, t):
+        while ticks_diff(t, self._bt0) >= self.bucket_ms:
+            self._bt0 = ticks_add(self._bt0, self.bucket_ms)
+            self._b = (self._b + 1) % self.nb
+            if self._filled < self.nb: self._filled += 1
+            for l in range(self.lanes): self._ring[l * self.nb + self._b] = 0
+
+    # ---------- detector ----------
+    def feed(self, lane, cm, t):
+        """One sample; returns 1 on a counted arrival, -1 on a departure, else 0."""
+        self._roll(t)
+        s = self.state[lane]
+        if s == EMPTY:
+            if 0 <= cm <= self.on_cm: self.state[lane] = ARRIVING; self._t_edge[lane] = t
+        elif s == ARRIVING:
+            if not 0 <= cm <= self.on_cm: self.state[lane] = EMPTY
+            elif ticks_diff(t, self._t_edge[lane]) >= self.min_dwell_ms:
+                self.state[lane] = PRESENT; self.arrivals[lane] += 1
+                self._ring[lane * self.nb + self._b] += 1
+                return 1
+        elif s == PRESENT:
+            if cm < 0 or cm >= self.off_cm: self.state[lane] = LEAVING; self._t_edge[lane] = t
+        else:  # LEAVING
+            if 0 <= cm < self.off_cm: self.state[lane] = PRESENT
+            elif ticks_diff(t, self._t_edge[lane]) >= self.min_dwell_ms:
+                self.state[lane] = EMPTY; self.departures[lane] += 1
+                return -1
+        return 0
+
+    def present(self, lane):
+        return self.state[lane] >= PRESENT
+
+    # ---------- readers ----------
+    def take_arrivals(self, lane):
+        """Arrivals since the previous take (safe against a feed() from a timer in between)."""
+        tot = self.arrivals[lane]; n = tot - self._taken[lane]; self._taken[lane] = tot
+        return n
+
+    def count(self, lane):
+        """Arrivals within the ring window (buckets * bucket_s, less right after boot)."""
+        base = lane * self.nb; n = 0
+        for i in range(self.nb): n += self._ring[base + i]
+        return n
+
+    def window_s(self, now=None):
+        """Seconds the ring currently covers (current bucket counted as partial)."""
+        cur = ticks_diff(ticks_ms() if now is None else now, self._bt0)
+        return ((self._filled - 1) * self.bucket_ms + max(cur, 1)) / 1000
+
+    def flow_per_min(self, lane, now=None):
+        return self.count(lane) * 60 / self.window_s(now)
@@ -3,6 +3,7 @@
 #   READ : direction   <-- lower-case key
 #   WRITE: Ultrasonic, Metal, Rerouting, Temperature, Humidity
 # - 10 Hz Metal+Ultrasonic PATCH, 5 Hz Direction poll, 2 s DHT
+# - Obstacle reroute runs as a step planner: polling, DHT and abort stay live
 # - Per-motor invert (Motor-B inverted) + dead-time for reliable reverse
 # - All RTDB writes are STRINGS
 
@@ -33,7 +34,11 @@ DHT_PERIOD_MS  = 2000
 # Print ultrasonic distance to terminal
 PRINT_DISTANCE = True  # set False to silence distance logs
 
-# Reroute sequence on obstacle
+# Reroute sequence on obstacle (action, seconds), run step by step from the main loop.
+# An obstacle seen during a "front" step restarts it (at most MAX_REROUTE_RESTARTS
+# times, then the rover stops and stays blocked until the sensor reads clear or a
+# new command arrives); a new 'S' from Firebase aborts it.
+MAX_REROUTE_RESTARTS = 3
 SEQ = [
     ("back", 2.0),
     ("left", 1.7),
@@ -57,6 +62,7 @@ METAL_PIN = 14; METAL_ACTIVE_LOW = True
 MOTOR_A_INVERT = False
 MOTOR_B_INVERT = True      # <-- keep True so Motor-2 works in F/B and Right spin
 DEADTIME_MS    = 8         # brief coast before changing direction
+RAMP_MS        = 120       # 0 -> full duty ramp time (0 = step), needs motor_driver.py
 SPEED_DUTY     = 52000     # 0..65535 PWM
 
 # ===== Wi-Fi =====
@@ -152,6 +158,15 @@ in3 = Pin(IN3_PIN, Pin.OUT); in4 = Pin(IN4_PIN, Pin.OUT)
 ena = PWM(Pin(ENA_PIN)); enb = PWM(Pin(ENB_PIN))
 ena.freq(1000); enb.freq(1000)
 
+# Cached driver (upload motor_driver.py from Libraries/): repeated commands are
+# free and dead-time runs on a Timer. Falls back to the sleeping helpers below.
+try:
+    from motor_driver import MotorDriver, FWD, REV
+    motors = MotorDriver([(in1, in2, ena, MOTOR_A_INVERT), (in3, in4, enb, MOTOR_B_INVERT)],
+                         deadtime_ms=DEADTIME_MS, ramp_ms=RAMP_MS)
+except ImportError:
+    motors = None; FWD, REV = 1, -1
+
 def _drive_pair(in_a, in_b, pwm, forward, invert, duty):
     if invert:
         forward = not forward
@@ -161,44 +176,70 @@ def _drive_pair(in_a, in_b, pwm, forward, invert, duty):
     in_a(a); in_b(b); pwm.duty_u16(duty)
 
 def m_stop():
+    if motors: motors.stop(); return
     ena.duty_u16(0); enb.duty_u16(0)
     in1(0); in2(0); in3(0); in4(0)
 
 def set_motor_a(forward, duty): _drive_pair(in1, in2, ena, forward, MOTOR_A_INVERT, duty)
 def set_motor_b(forward, duty): _drive_pair(in3, in4, enb, forward, MOTOR_B_INVERT, duty)
 
-def m_front(duty): set_motor_a(True, duty);  set_motor_b(True, duty)
-def m_back(duty):  set_motor_a(False, duty); set_motor_b(False, duty)
-def m_left(duty):  set_motor_a(False, duty); set_motor_b(True, duty)   # spin left
-def m_right(duty): set_motor_a(True, duty);  set_motor_b(False, duty)  # spin right
-
-def move_for(action, secs, fb, duty, push_every_ms=200):
-    fn = m_stop
-    if   action == "front": fn = lambda d: m_front(d)
-    elif action == "back":  fn = lambda d: m_back(d)
-    elif action == "left":  fn = lambda d: m_left(d)
-    elif action == "right": fn = lambda d: m_right(d)
-    fn(duty)
-    t0 = time.ticks_ms(); last = t0
-    while time.ticks_diff(time.ticks_ms(), t0) < int(secs * 1000):
-        now = time.ticks_ms()
-        if time.ticks_diff(now, last) >= push_every_ms:
-            try:
-                ultra_cm = measure_distance_cm()
-                # ---- distance print during reroute ----
-                if PRINT_DISTANCE:
-                    if ultra_cm is None:
-                        print("DIST: -- (no echo)")
-                    else:
-                        print("DIST: {:.1f} cm".format(ultra_cm))
-                ul = "1" if (ultra_cm is not None and ultra_cm <= ULTRA_THRESHOLD_CM) else "0"
-                m  = "1" if metal_detected() else "0"
-                fb.patch(BASE_PATH, {"Ultrasonic": ul, "Metal": m})
-            except:
-                pass
-            last = now
-        time.sleep(0.01)
-    m_stop()
+def _drive(a, b, duty):
+    if motors: motors.drive((a, b), duty)
+    else: set_motor_a(a == FWD, duty); set_motor_b(b == FWD, duty)
+
+def m_front(duty): _drive(FWD, FWD, duty)
+def m_back(duty):  _drive(REV, REV, duty)
+def m_left(duty):  _drive(REV, FWD, duty)   # spin left
+def m_right(duty): _drive(FWD, REV, duty)   # spin right
+
+_MOVES = {"front": m_front, "back": m_back, "left": m_left, "right": m_right}
+
+# ===== Reroute planner (non-blocking) =====
+class ReroutePlanner:
+    """Steps through SEQ from ticks_ms timestamps; the main loop calls poll() every pass."""
+    def __init__(self, seq, duty, max_restarts=MAX_REROUTE_RESTARTS):
+        self.seq = seq; self.duty = duty; self.max_restarts = max_restarts
+        self.i = -1; self.t_end = 0; self.restarts = 0
+        self.blocked = False                 # latched after max_restarts: stay stopped
+        self.runs = self.aborts = 0
+
+    def active(self):
+        return self.i >= 0
+
+    def action(self):
+        return self.seq[self.i][0] if self.i >= 0 else None
+
+    def _enter(self, now):
+        action, secs = self.seq[self.i]
+        _MOVES.get(action, lambda d: m_stop())(self.duty)
+        self.t_end = time.ticks_add(now, int(secs * 1000))
+
+    def start(self, now):
+        """Begin the sequence. Refused (False) while blocked."""
+        if self.blocked: return False
+        self.i = 0; self.restarts = 0; self.runs += 1; self._enter(now); return True
+
+    def restart(self, now):
+        """New obstacle mid-sequence: back off from the first step. False (and blocked) once max_restarts is spent."""
+        if self.restarts >= self.max_restarts:
+            self.abort(); self.blocked = True; return False
+        self.restarts += 1; self.i = 0; self._enter(now); return True
+
+    def unblock(self):
+        self.blocked = False; self.restarts = 0
+
+    def abort(self):
+        self.i = -1; self.aborts += 1; m_stop()
+
+    def poll(self, now):
+        """Advance when the current step is due. Returns True when the sequence just completed."""
+        if self.i < 0 or time.ticks_diff(now, self.t_end) < 0:
+            return False
+        self.i += 1
+        if self.i >= len(self.seq):
+            self.i = -1; m_stop(); return True
+        self._enter(now)   # step time counts from now: a late poll doesn't shorten the next move
+        return False
 
 # ===== Safe PATCH =====
 _last_warn = 0
@@ -229,15 +270,16 @@ def main():
 
     last_sensor = last_dir = last_dht = 0
     last_ultra_str = last_metal_str = None
-    direction = "S"; rerouting = False
+    direction = "S"
     duty = SPEED_DUTY
+    planner = ReroutePlanner(SEQ, duty)
 
     m_stop(); relay_set(False)
 
     while True:
         now = time.ticks_ms()
 
-        # --- 10 Hz Metal + Ultrasonic (batched) ---
+        # --- 10 Hz Metal + Ultrasonic (batched), also while rerouting ---
         if time.ticks_diff(now, last_sensor) >= SENSOR_PUSH_MS:
             ultra_cm = measure_distance_cm()
             # ---- distance print in normal loop ----
@@ -253,12 +295,23 @@ def main():
                 last_ultra_str = ultra_str; last_metal_str = metal_str
             last_sensor = now
 
-            # Obstacle → run fixed reroute sequence
-            if (ultra_str == "1") and not rerouting:
-                rerouting = True; safe_patch(fb, {"Rerouting":"1"})
-                for action, secs in SEQ:
-                    move_for(action, secs, fb, duty, push_every_ms=200)
-                safe_patch(fb, {"Rerouting":"0"}); rerouting = False; m_stop(); continue
+            # Obstacle → start the reroute sequence, or restart it if we drove into another one.
+            # Once blocked, stay stopped until the path reads clear (or a new command, below).
+            if ultra_str == "1":
+                if planner.blocked:
+                    pass
+                elif not planner.active():
+                    planner.start(now); safe_patch(fb, {"Rerouting":"1"})
+                elif planner.action() == "front":
+                    if not planner.restart(now):
+                        print("Reroute: still blocked after {} restarts, stopping".format(planner.max_restarts))
+                        safe_patch(fb, {"Rerouting":"0"})
+            elif planner.blocked:
+                planner.unblock(); print("Reroute: path clear, unblocked")
+
+        # --- reroute steps (non-blocking) ---
+        if planner.poll(time.ticks_ms()):
+            safe_patch(fb, {"Rerouting":"0"})
 
         # --- 2 s DHT + relay ---
         if time.ticks_diff(now, last_dht) >= DHT_PERIOD_MS:
@@ -268,21 +321,33 @@ def main():
                 relay_set(t > TEMP_RELAY_THRESHOLD_C)
             last_dht = now
 
-        # --- 5 Hz Direction polling (when not rerouting) ---
-        if (not rerouting) and (time.ticks_diff(now, last_dir) >= DIR_POLL_MS):
+        # --- 5 Hz Direction polling (while rerouting only a new 'S' is acted on) ---
+        if time.ticks_diff(now, last_dir) >= DIR_POLL_MS:
+            fetched = True
             try:
                 v = fb.get("{}/direction".format(BASE_PATH))  # lower-case key
-                direction = v[0].upper() if isinstance(v, str) and v else "S"
+                cmd = v[0].upper() if isinstance(v, str) and v else "S"
             except Exception as e:
-                print("GET direction fail:", e); direction = "S"
+                # a failed GET stops the motors but is not a user command
+                print("GET direction fail:", e); cmd = "S"; fetched = False
             last_dir = now
-
-            # Standard mapping from Firebase: F, B, L, R, S
-            if   direction == "F": m_front(duty)
-            elif direction == "B": m_back(duty)
-            elif direction == "L": m_left(duty)
-            elif direction == "R": m_right(duty)
-            else: m_stop()
+            new_cmd = fetched and cmd != direction
+            if fetched: direction = cmd
+
+            if planner.active():
+                if new_cmd and cmd == "S":
+                    planner.abort(); safe_patch(fb, {"Rerouting":"0"})
+            elif planner.blocked and not new_cmd:
+                m_stop()
+            else:
+                if planner.blocked:
+                    planner.unblock(); print("Reroute: unblocked by command", cmd)
+                # Standard mapping from Firebase: F, B, L, R, S
+                if cmd == "F": m_front(duty)
+                elif cmd == "B": m_back(duty)
+                elif cmd == "L": m_left(duty)
+                elif cmd == "R": m_right(duty)
+                else: m_stop()
 
         time.sleep(0.01)
 
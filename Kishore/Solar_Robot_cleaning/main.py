@@ -11,7 +11,8 @@
 #   /Solar_pannel_cleaning/Percentage  -> 0..100 (relay split thresholds)
 #   /Solar_pannel_cleaning/Ultrasonic  -> 0|1 (written by this script)
 
-import time, ujson as json
+import time, ujson as json, _thread
+from array import array
 from machine import Pin, PWM, time_pulse_us
 import network
 import urequests as requests
@@ -41,6 +42,8 @@ POLL_MS                = 500
 HTTP_TIMEOUT           = 10
 US_CHECK_INTERVAL_MS   = 250     # how often to sample ultrasonics
 US_TIMEOUT_US          = 30000   # echo timeout (≈ 5 m max)
+SAFETY_PERIOD_MS       = 40      # core1 safety loop: sample + brake decision every period
+SAFETY_REPORT_MS       = 10000   # print the obstacle->brake latency histogram this often
 
 # Obstacle threshold (trigger at or below this distance)
 OBSTACLE_ON_CM = 20
@@ -63,6 +66,8 @@ PWM_FREQ       = 1000
 DEFAULT_SPEED  = 70
 MOTOR_A_INVERT = False
 MOTOR_B_INVERT = False
+DEADTIME_MS    = 5       # coast between F<->B reversals (motor_driver.py only)
+RAMP_MS        = 150     # 0 -> full duty ramp time, 0 = step (motor_driver.py only)
 
 # ========= 2-Channel Relay wiring =========
 RELAY1_PIN       = 8   # Relay-1 IN -> GP8
@@ -80,6 +85,9 @@ US_CFG = [
     {"name":"US3", "trig":15, "echo":16},
     {"name":"US4", "trig":17, "echo":18},
 ]
+# Sensors fired in the same slot (indices into US_CFG). Only group sensors whose
+# beams cannot reach each other; ((0,), (1,), (2,), (3,)) is strictly one at a time.
+US_GROUPS = ((0, 2), (1, 3))
 
 # ========= Setup motors =========
 ena = PWM(Pin(ENA_PIN)); ena.freq(PWM_FREQ)
@@ -129,13 +137,31 @@ class USonic:
         # distance(cm) = (duration_us * 0.0343) / 2
         return dur * 0.01715
 
-usonics = [USonic(c["trig"], c["echo"]) for c in US_CFG]
+# IRQ edge-timed ranging (upload us_ranging.py from Libraries/); sequential USonic otherwise
+try:
+    from us_ranging import UltrasonicArray
+    us_array = UltrasonicArray([(c["trig"], c["echo"]) for c in US_CFG],
+                               groups=US_GROUPS, timeout_us=US_TIMEOUT_US)
+    usonics = []
+except ImportError:
+    us_array = None
+    usonics = [USonic(c["trig"], c["echo"]) for c in US_CFG]
 
 # ========= Motor helpers =========
+# Cached driver (upload motor_driver.py from Libraries/): repeated commands write
+# nothing, dead-time/ramp run on a Timer. The lock lets core1 brake() safely.
+try:
+    from motor_driver import MotorDriver, FWD, REV
+    motors = MotorDriver([(in1, in2, ena, MOTOR_A_INVERT), (in3, in4, enb, MOTOR_B_INVERT)],
+                         deadtime_ms=DEADTIME_MS, ramp_ms=RAMP_MS, lock=_thread.allocate_lock())
+except ImportError:
+    motors = None
+
 def _duty_from_percent(p):
     p = max(0, min(100, int(p))); return int(65535 * p // 100)
 
 def set_speed(percent):
+    if motors: return                     # the driver applies duty with each move
     d = _duty_from_percent(percent)
     ena.duty_u16(d); enb.duty_u16(d)
 
@@ -147,25 +173,26 @@ def _motor_b(forward: bool):
     fwd = (forward ^ MOTOR_B_INVERT)
     in3.value(1 if fwd else 0); in4.value(0 if fwd else 1)
 
+def _move(a_fwd, b_fwd):
+    if motors:
+        motors.drive((FWD if a_fwd else REV, FWD if b_fwd else REV), _duty_from_percent(DEFAULT_SPEED))
+    else:
+        set_speed(DEFAULT_SPEED); _motor_a(a_fwd); _motor_b(b_fwd)
+
 def brake():
+    if motors: motors.brake(); return
     in1.value(1); in2.value(1); in3.value(1); in4.value(1)
     ena.duty_u16(0); enb.duty_u16(0)
 
 def coast():
+    if motors: motors.stop(); return
     in1.value(0); in2.value(0); in3.value(0); in4.value(0)
     ena.duty_u16(0); enb.duty_u16(0)
 
-def forward():
-    set_speed(DEFAULT_SPEED); _motor_a(True);  _motor_b(True)
-
-def backward():
-    set_speed(DEFAULT_SPEED); _motor_a(False); _motor_b(False)
-
-def left():
-    set_speed(DEFAULT_SPEED); _motor_a(False); _motor_b(True)
-
-def right():
-    set_speed(DEFAULT_SPEED); _motor_a(True);  _motor_b(False)
+def forward():  _move(True, True)
+def backward(): _move(False, False)
+def left():     _move(False, True)
+def right():    _move(True, False)
 
 # ========= Wi-Fi =========
 def wifi_connect(timeout_s=20):
@@ -323,6 +350,8 @@ def execute_direction(val):
     if not val: return
     c = str(val).strip().upper()
     if not c: return
+    if safety_obstacle and c != "S":
+        print("[ACT] Direction", c, "refused: obstacle"); return
     print("[ACT] Direction =", c)
     if   c == "F": forward()
     elif c == "B": backward()
@@ -361,14 +390,61 @@ def update_relays(det_val, pct_val):
 # ========= Ultrasonic safety =========
 def any_obstacle_cm(threshold_cm=OBSTACLE_ON_CM):
     """Return True if ANY ultrasonic reading is <= threshold."""
+    if us_array:
+        # one window over all groups; returns as soon as any echo is within threshold
+        return us_array.measure(stop_below_mm=int(threshold_cm * 10))
     for us in usonics:
         cm = us.read_cm()
         if cm is not None and cm <= threshold_cm:
             return True
     return False
 
+# ========= Safety core (core1) =========
+# Core1 samples the ultrasonics every SAFETY_PERIOD_MS and brakes on its own; the
+# network loop on core0 only reads safety_obstacle (current state) and
+# safety_events (obstacle onsets, only ever incremented) to mirror them to Firebase
+# and restore motion when clear. Both are single ints written by core1 only, so no
+# lock. A core0 pass takes POLL_MS plus an HTTP round trip, so an obstacle can come
+# and go between two passes: the changed counter still tells core0 that core1
+# braked, and it runs the override + restore for it.
+# Latency per obstacle event = brake time - start of the previous (clear) window,
+# i.e. the worst case for an obstacle that appeared right after that window.
+LAT_BIN_MS = 10
+lat_hist = array('H', [0] * 16)          # last bin: >= 150 ms
+safety_obstacle = 0
+safety_events = 0
+safety_run = True
+safety_on_core1 = False
+safety_overruns = 0
+
+def safety_core():
+    global safety_obstacle, safety_events, safety_overruns
+    next_t = time.ticks_ms(); prev_start = time.ticks_us()
+    while safety_run:
+        start = time.ticks_us()
+        if any_obstacle_cm(OBSTACLE_ON_CM):
+            brake()
+            if not safety_obstacle:
+                ms = time.ticks_diff(time.ticks_us(), prev_start) // 1000
+                lat_hist[min(ms // LAT_BIN_MS, len(lat_hist) - 1)] += 1
+                safety_obstacle = 1
+                safety_events += 1           # after the flag: a new count implies flag was set
+        else:
+            safety_obstacle = 0
+        prev_start = start
+        next_t = time.ticks_add(next_t, SAFETY_PERIOD_MS)
+        d = time.ticks_diff(next_t, time.ticks_ms())
+        if d > 0: time.sleep_ms(d)
+        else: safety_overruns += 1; next_t = time.ticks_ms()
+
+def print_safety_report():
+    bins = ["{}-{}:{}".format(i * LAT_BIN_MS, (i + 1) * LAT_BIN_MS, c) for i, c in enumerate(lat_hist) if c]
+    print("[SAFE] obstacle->brake ms", " ".join(bins) if bins else "(no events)",
+          " overruns:", safety_overruns)
+
 # ========= Main =========
 def main():
+    global safety_on_core1
     set_speed(DEFAULT_SPEED); coast()
     relay_all_off()
 
@@ -412,6 +488,14 @@ def main():
         fb_put(PATH_USONIC_FLAG, last_us_flag)
 
     last_us_check = 0
+    last_report = time.ticks_ms()
+    seen_events = 0
+
+    try:
+        _thread.start_new_thread(safety_core, ()); safety_on_core1 = True
+        print("[SAFE] Obstacle braking on core1 every", SAFETY_PERIOD_MS, "ms")
+    except Exception as e:
+        print("[SAFE] WARN: cannot start core1 thread, checking in main loop:", e)
 
     while True:
         if not network.WLAN(network.STA_IF).isconnected():
@@ -441,44 +525,58 @@ def main():
 
         # Ultrasonic: sample periodically; enforce override
         now = time.ticks_ms()
-        if time.ticks_diff(now, last_us_check) >= US_CHECK_INTERVAL_MS:
-            obstacle = any_obstacle_cm(OBSTACLE_ON_CM)
+        if safety_on_core1 and time.ticks_diff(now, last_report) >= SAFETY_REPORT_MS:
+            last_report = now; print_safety_report()
+        if safety_on_core1 or time.ticks_diff(now, last_us_check) >= US_CHECK_INTERVAL_MS:
+            # core1 already braked; here we only mirror the flag and handle restore
+            if safety_on_core1:
+                events = safety_events; obstacle = safety_obstacle      # counter first (see core1)
+                onset = events != seen_events; seen_events = events
+            else:
+                obstacle = any_obstacle_cm(OBSTACLE_ON_CM); onset = False
             flag = 1 if obstacle else 0
 
-            # Write Ultrasonic flag only on change
-            if flag != last_us_flag:
-                fb_put(PATH_USONIC_FLAG, flag)
-                last_us_flag = flag
-                print(f"[US] Obstacle flag -> {flag}")
-
-                if flag == 1:
-                    # Enter override: force stop + show "S" in DB
-                    if last_dir != "S":
-                        fb_put(PATH_DIRECTION, "S")
-                        last_dir = "S"
-                    brake()
-                else:
-                    # Exit override: restore last non-stop direction automatically
-                    # If DB currently shows "S", push back the previous direction
-                    dir_current = str(fb_get(PATH_DIRECTION)).strip('"').upper() if True else last_dir
-                    if dir_current == "S":
-                        fb_put(PATH_DIRECTION, last_non_stop_dir)
-                        last_dir = last_non_stop_dir
-                        execute_direction(last_non_stop_dir)
+            # An obstacle that appeared and cleared since the last pass: core1 braked a
+            # moving robot, so go through the override and straight into the restore.
+            flags = (1, 0) if (onset and flag == 0 and last_us_flag == 0 and last_dir != "S") else (flag,)
+            for flag in flags:
+                # Write Ultrasonic flag only on change
+                if flag != last_us_flag:
+                    fb_put(PATH_USONIC_FLAG, flag)
+                    last_us_flag = flag
+                    print(f"[US] Obstacle flag -> {flag}")
+
+                    if flag == 1:
+                        # Enter override: force stop + show "S" in DB
+                        if last_dir != "S":
+                            fb_put(PATH_DIRECTION, "S")
+                            last_dir = "S"
+                        brake()
                     else:
-                        # If user already changed it while stopped, honor that
-                        execute_direction(dir_current)
-                        last_dir = dir_current
+                        # Exit override: restore last non-stop direction automatically
+                        # If DB currently shows "S", push back the previous direction
+                        dir_current = str(fb_get(PATH_DIRECTION)).strip('"').upper() if True else last_dir
+                        if dir_current == "S":
+                            fb_put(PATH_DIRECTION, last_non_stop_dir)
+                            last_dir = last_non_stop_dir
+                            execute_direction(last_non_stop_dir)
+                        else:
+                            # If user already changed it while stopped, honor that
+                            execute_direction(dir_current)
+                            last_dir = dir_current
 
-            else:
-                # No change in flag: maintain state. If still blocked, ensure motors are braked.
-                if last_us_flag == 1:
-                    brake()
+                else:
+                    # No change in flag: maintain state. If still blocked, ensure motors are braked.
+                    if last_us_flag == 1:
+                        brake()
 
             last_us_check = now
 
         time.sleep_ms(POLL_MS)
 
 if __name__ == "__main__":
-    main()
+    try:
+        main()
+    finally:
+        safety_run = False
 
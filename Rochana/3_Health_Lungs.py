@@ -3,7 +3,8 @@
 # Features: Wi-Fi, DHT11, SOUND/CO2/Alcohol, MAX HR/SpO2 (10 s calibration + latched),
 # Firebase RTDB, OLED status page, serial print of HR/SpO2/BP, graceful Stop.
 
-import network, time, sys, gc
+import network, time, sys, gc, micropython
+from array import array
 try:
     import ujson as json
 except ImportError:
@@ -14,6 +15,8 @@ try:
 except Exception:
     import requests
 import dht
+from lungs_pipeline import (VitalsEstimator, CalibrationFSM, SoundClassifier, VS,
+                            CaptureWriter, REC_EDGE, REC_TICK, SOUND_NONE)
 
 # Shorter socket timeouts help Thonny's Stop
 try:
@@ -26,6 +29,10 @@ try:
     import ssd1306
 except ImportError:
     raise RuntimeError("ssd1306.py missing. Upload the driver to the board.")
+try:
+    from ssd1306_dirty import SSD1306_DirtyI2C as OLED_I2C   # sends only changed pages
+except ImportError:
+    OLED_I2C = ssd1306.SSD1306_I2C
 
 # ===================== USER CONFIG =====================
 WIFI_SSID      = "health"
@@ -69,24 +76,13 @@ FB_CHECK_MS   = 200
 ALERT_POLL_MS = 2000
 OLED_MIN_MS   = 300
 
-# Sound thresholds & codes
-COUGH_BURST_COUNT = 1
-TB_BURST_MIN      = 6
-ASTHMATIC_MS      = 10000
-BURST_GAP_MS      = 1200
-DEBOUNCE_MS       = 80
+# Sound (classifier thresholds & codes live in lungs_pipeline.py)
 SOUND_EVENT_MIN_GAP_MS = 2500
-COUGH_CONFIRM_MS  = 6000
+SOUND_RING_SIZE   = 64      # power of two; sound edges buffered between loop passes
 
-SOUND_NONE  = 0
-SOUND_COUGH = 1
-SOUND_TB    = 2
-SOUND_ASTHMA= 3
-
-# HR limits & calibration window
-HR_MIN = 60
-HR_MAX = 130
-CAL_WINDOW_MS = 10000
+# Capture mode: log raw red/IR samples + sound edges to flash for vitals_replay.py
+CAPTURE_PATH      = None    # e.g. "/vitals.cap"; None = off
+CAPTURE_MAX_BYTES = 512 * 1024
 
 # ===================== STATE/INIT =====================
 sta = network.WLAN(network.STA_IF)
@@ -99,13 +95,36 @@ i2c_max  = I2C(I2C0_ID, sda=Pin(SDA0_PIN), scl=Pin(SCL0_PIN), freq=100_000)   #
 print("I2C1 (OLED) scan:", [hex(x) for x in i2c_oled.scan()], "  (expect ['0x3c'])")
 print("I2C0 (MAX)  scan:", [hex(x) for x in i2c_max.scan()],  "  (expect ['0x57'])")
 
-oled = ssd1306.SSD1306_I2C(OLED_W, OLED_H, i2c_oled, addr=OLED_I2C_ADDR)
+oled = OLED_I2C(OLED_W, OLED_H, i2c_oled, addr=OLED_I2C_ADDR)
 
 sound_pin = Pin(SOUND_PIN, Pin.IN, Pin.PULL_UP)
 co2_pin   = Pin(CO2_PIN,   Pin.IN, Pin.PULL_UP)
 alco_pin  = Pin(ALCO_PIN,  Pin.IN, Pin.PULL_UP)
 _sensor_dht = dht.DHT11(Pin(DHT_PIN))
 
+# ===== Sound edge capture (Pin.irq -> preallocated ring of ticks_ms stamps) =====
+# The IRQ only stamps rising edges; the main loop drains them in batches, so a
+# slow loop pass (DHT, HTTP) can no longer hide or merge bursts.
+micropython.alloc_emergency_exception_buf(100)
+_SND_MASK = SOUND_RING_SIZE - 1
+_snd_ts = array('L', [0] * SOUND_RING_SIZE)
+_snd_head = 0       # written only by the IRQ   (free-running, wraps at 0xFFFF)
+_snd_tail = 0       # written only by main loop (free-running, wraps at 0xFFFF)
+_snd_dropped = 0    # edges overwritten before the loop could read them
+
+def _on_sound_edge(pin):
+    global _snd_head
+    h = _snd_head
+    _snd_ts[h & _SND_MASK] = time.ticks_ms()
+    _snd_head = (h + 1) & 0xFFFF
+
+def sound_irq_start():
+    sound_pin.irq(trigger=Pin.IRQ_RISING, handler=_on_sound_edge, hard=True)
+
+def sound_irq_stop():
+    try: sound_pin.irq(handler=None)
+    except Exception: pass
+
 # ===== Minimal MAX3010x driver (SpO2 mode: Red + IR) =====
 class MAX3010X:
     REG_INTR_STATUS_1   = 0x00
@@ -212,21 +231,12 @@ def fb_get(path):
 _last_oled_ms = 0
 _alert_text = "-"
 
-_sound_count = 0; _in_burst = False; _burst_last_ms = 0; _last_sound_ms = 0
-_last_sound_event_ms = 0; _last_sound_event_code = SOUND_NONE
 _last_sound_write_ms = 0; _last_sent_sound = 0
-_pending_cough = False; _pending_cough_ms = 0
 
-heartRate_live = 0; spo2_live = 0; systolic_live = 0; diastolic_live = 0
-heartRate_latched = 0; spo2_latched = 0; systolic_latched = 0; diastolic_latched = 0; have_latched = False
-
-last_ir = 0; hr_peak = False; last_beat_ms = 0; tempHR = 80
-
-last_BP_ms = 0; target_sys = 118; target_dia = 78; cur_sys = 120; cur_dia = 80
-
-class VitalsState: NO_FINGER=0; CALIBRATING=1; FROZEN=2
-vitals_state = VitalsState.NO_FINGER; cal_start_ms = 0
-sumHR=0; cntHR=0; sumSp=0; cntSp=0; sumSy=0; cntSy=0; sumDi=0; cntDi=0
+vit = VitalsEstimator(FINGER_IR_THRESHOLD)   # live HR / SpO2 / BP
+cal = CalibrationFSM()                       # 10 s window -> latched values
+snd = SoundClassifier()                      # cough / TB / asthma
+capture = None
 
 _last_co2=-1; _last_alc=-1; _last_temp=-1000; _last_hum=-1000
 _last_sys=-1; _last_dia=-1; _last_hr=-1; _last_sp=-1
@@ -258,15 +268,16 @@ def oled_stopped():
         pass
 
 def update_oled(temperature, humidity):
-    global _last_oled_ms, vitals_state, cal_start_ms, have_latched, _alert_text
+    global _last_oled_ms
     now = time.ticks_ms()
     if time.ticks_diff(now, _last_oled_ms) < OLED_MIN_MS: return
     _last_oled_ms = now
 
+    have_latched = cal.have_latched
     LEFT_X = 0; RIGHT_X = 68; y=0
     oled.fill(0)
-    if vitals_state == VitalsState.CALIBRATING:
-        secs = time.ticks_diff(now, cal_start_ms)//1000
+    if cal.state == VS.CALIBRATING:
+        secs = time.ticks_diff(now, cal.cal_start_ms)//1000
         oled.text("CALIBRATION {}/10s".format(secs), LEFT_X, y)
     elif have_latched:
         oled.text("CALIBRATION OK", LEFT_X, y)
@@ -275,14 +286,14 @@ def update_oled(temperature, humidity):
     y+=12
 
     oled.text("HR:", LEFT_X, y)
-    oled.text(str(heartRate_latched)+"bpm" if (have_latched and heartRate_latched>0) else "NA", LEFT_X+22, y)
+    oled.text(str(cal.hr)+"bpm" if (have_latched and cal.hr>0) else "NA", LEFT_X+22, y)
     oled.text("SpO2:", RIGHT_X, y)
-    oled.text(str(spo2_latched)+"%" if (have_latched and spo2_latched>0) else "NA", RIGHT_X+30, y)
+    oled.text(str(cal.spo2)+"%" if (have_latched and cal.spo2>0) else "NA", RIGHT_X+30, y)
     y+=12
 
     oled.text("BP:", LEFT_X, y)
-    if have_latched and systolic_latched>0 and diastolic_latched>0:
-        oled.text("{}/{} mmHg".format(systolic_latched, diastolic_latched), LEFT_X+20, y)
+    if have_latched and cal.systolic>0 and cal.diastolic>0:
+        oled.text("{}/{} mmHg".format(cal.systolic, cal.diastolic), LEFT_X+20, y)
     else:
         oled.text("NA", LEFT_X+20, y)
     y+=12
@@ -307,124 +318,37 @@ def read_dht_safely():
     except Exception:
         return None, None
 
-def simulate_bp():
-    global last_BP_ms, target_sys, target_dia, cur_sys, cur_dia, heartRate_live, systolic_live, diastolic_live
-    now = time.ticks_ms()
-    if time.ticks_diff(now, last_BP_ms) > 10000:
-        hrAdj = 0
-        if heartRate_live > 0:
-            hrAdj = max(-20, min(55, heartRate_live - 75))
-        target_sys = 118 + (hrAdj // 6) + _rand_range(-3, 3)
-        target_dia = 78  + _rand_range(-2, 2)
-        last_BP_ms = now
-    if cur_sys < target_sys: cur_sys += 1
-    elif cur_sys > target_sys: cur_sys -= 1
-    if cur_dia < target_dia: cur_dia += 1
-    elif cur_dia > target_dia: cur_dia -= 1
-    systolic_live = cur_sys; diastolic_live = cur_dia
-
-_rng = 1234567
-def _rand():
-    global _rng
-    _rng = (1103515245*_rng + 12345) & 0x7FFFFFFF
-    return _rng
-def _rand_range(a,b):
-    return a + (_rand() % (b - a + 1))
-
-def read_max3010x_vitals():
-    """Read one sample from MAX (on I2C0), update live HR/SpO2, simulate BP."""
-    global last_ir, hr_peak, last_beat_ms, tempHR, heartRate_live, spo2_live
+def read_max3010x_vitals(now):
+    """Read one sample from MAX (on I2C0) and step live HR/SpO2/BP; record it when capturing."""
     if not max30105_ok:
-        heartRate_live = 0; spo2_live = 0; return
+        vit.no_sensor()
+        if capture: capture.mark(REC_TICK, now)
+        return
     try:
         red, ir = particle.read_sample()
     except OSError:
+        if capture: capture.mark(REC_TICK, now)
         return
-
-    if ir < FINGER_IR_THRESHOLD:
-        heartRate_live = 0; spo2_live = 0; last_ir = ir; return
-
-    # Simple peak detection -> HR
-    if ir > last_ir and not hr_peak:
-        hr_peak = True
-    elif ir < last_ir and hr_peak:
-        now = time.ticks_ms()
-        ibi = time.ticks_diff(now, last_beat_ms)
-        if 300 < ibi < 2000:
-            newHR = int(60000 / ibi)
-            if HR_MIN <= newHR <= HR_MAX:
-                tempHR = newHR
-        last_beat_ms = now; hr_peak = False
-    last_ir = ir
-
-    heartRate_live = tempHR if (HR_MIN <= tempHR <= HR_MAX) else 0
-
-    # Rough SpO2 (ratio-of-ratios)
-    spo2_live = 0
-    if ir > 0:
-        ratio = red / ir
-        est = 110 - int(25.0 * ratio)
-        if est < 90: est = 90
-        if est > 99: est = 99
-        spo2_live = est
-
-    simulate_bp()
-
-# ===================== CALIBRATION FSM =====================
-class VS: NO_FINGER=0; CALIBRATING=1; FROZEN=2
-
-def update_calibration_state(finger_present):
-    global vitals_state, cal_start_ms, have_latched
-    global sumHR, cntHR, sumSp, cntSp, sumSy, cntSy, sumDi, cntDi
-    global heartRate_latched, spo2_latched, systolic_latched, diastolic_latched
-
-    now = time.ticks_ms()
-    if vitals_state == VS.NO_FINGER:
-        if finger_present:
-            vitals_state = VS.CALIBRATING
-            cal_start_ms = now
-            sumHR=cntHR=sumSp=cntSp=sumSy=cntSy=sumDi=cntDi=0
-            print("⏱️ Calibration started (10s)...")
-    elif vitals_state == VS.CALIBRATING:
-        if not finger_present:
-            vitals_state = VS.NO_FINGER; print("⚠️ Finger removed — calibration aborted.")
-        else:
-            if heartRate_live>0: sumHR += heartRate_live; cntHR += 1
-            if spo2_live>0:      sumSp += spo2_live;      cntSp += 1
-            if systolic_live>0 and diastolic_live>0:
-                sumSy += systolic_live; cntSy += 1
-                sumDi += diastolic_live; cntDi += 1
-            if time.ticks_diff(now, cal_start_ms) >= CAL_WINDOW_MS:
-                heartRate_latched = (sumHR + (cntHR//2))//cntHR if cntHR>0 else 0
-                if not (HR_MIN <= heartRate_latched <= HR_MAX): heartRate_latched = 0
-                spo2_latched = (sumSp + (cntSp//2))//cntSp if cntSp>0 else 0
-                if cntSy>0 and cntDi>0:
-                    systolic_latched  = (sumSy + (cntSy//2))//cntSy
-                    diastolic_latched = (sumDi + (cntDi//2))//cntDi
-                else:
-                    systolic_latched = diastolic_latched = 0
-                have_latched = True; vitals_state = VS.FROZEN
-                print("✅ Calibration complete — values latched.")
-    elif vitals_state == VS.FROZEN:
-        if not finger_present:
-            vitals_state = VS.NO_FINGER; print("👆 Finger removed — holding last calibrated values.")
-
-# ===================== SOUND CLASSIFICATION =====================
-def classify_and_reset_burst():
-    global _in_burst, _sound_count, _pending_cough, _pending_cough_ms
-    global _last_sound_event_ms, _last_sound_event_code
-    if not _in_burst: return
-    if _sound_count >= TB_BURST_MIN:
-        print("🔴 Detected: TB (>= {} highs)".format(TB_BURST_MIN))
-        _last_sound_event_ms = time.ticks_ms(); _last_sound_event_code = SOUND_TB
-        if _pending_cough: _pending_cough = False; print("↪️ TB overrides pending cough")
-    elif _sound_count == COUGH_BURST_COUNT:
-        if not _pending_cough:
-            _pending_cough = True; _pending_cough_ms = time.ticks_ms()
-            print("🟠 Cough candidate ({} highs) — checking for TB...".format(COUGH_BURST_COUNT))
-    elif _sound_count == 1 or (_sound_count>COUGH_BURST_COUNT and _sound_count<TB_BURST_MIN):
-        print("ℹ️ Sound burst: {} highs (no label)".format(_sound_count))
-    _sound_count = 0; _in_burst = False
+    if capture: capture.sample(now, red, ir)
+    vit.update(red, ir, now)
+
+# ===================== SOUND =====================
+def drain_sound_edges(now):
+    """Classify every edge captured since the last call, in order, then apply timeouts at now."""
+    global _snd_tail, _snd_dropped
+    head = _snd_head
+    n = (head - _snd_tail) & 0xFFFF
+    if n > SOUND_RING_SIZE:
+        _snd_dropped += n - SOUND_RING_SIZE
+        print("⚠️ Sound ring overrun, dropped:", _snd_dropped)
+        _snd_tail = (head - SOUND_RING_SIZE) & 0xFFFF; n = SOUND_RING_SIZE
+    t = _snd_tail
+    for _ in range(n):
+        ts = _snd_ts[t & _SND_MASK]
+        if capture: capture.mark(REC_EDGE, ts)
+        snd.edge(ts); t = (t + 1) & 0xFFFF
+    _snd_tail = t
+    snd.timeouts(now)
 
 # ===================== WIFI =====================
 def oled_wifi_connecting(ssid, dots):
@@ -471,13 +395,13 @@ def print_vitals_serial(finger_present):
         return
     _last_vitals_print_ms = now
 
-    if finger_present and have_latched and \
-       (heartRate_latched > 0) and (spo2_latched > 0) and \
-       (systolic_latched > 0) and (diastolic_latched > 0):
-        hr  = heartRate_latched
-        sp  = spo2_latched
-        sysv = systolic_latched
-        diav = diastolic_latched
+    if finger_present and cal.have_latched and \
+       (cal.hr > 0) and (cal.spo2 > 0) and \
+       (cal.systolic > 0) and (cal.diastolic > 0):
+        hr  = cal.hr
+        sp  = cal.spo2
+        sysv = cal.systolic
+        diav = cal.diastolic
     else:
         hr = sp = sysv = diav = 0
 
@@ -485,6 +409,11 @@ def print_vitals_serial(finger_present):
 
 # ===================== CLEANUP =====================
 def cleanup():
+    sound_irq_stop()
+    try:
+        if capture: capture.close(); print("Capture saved:", CAPTURE_PATH)
+    except Exception:
+        pass
     try:
         if max30105_ok:
             particle.shutdown()
@@ -502,9 +431,7 @@ def cleanup():
 
 # ===================== MAIN =====================
 def main():
-    global _alert_text, _in_burst, _sound_count, _burst_last_ms, _last_sound_ms
-    global _pending_cough, _pending_cough_ms, _last_sound_event_ms, _last_sound_event_code
-    global _last_sound_write_ms, _last_sent_sound
+    global _alert_text, _last_sound_write_ms, _last_sent_sound, capture
 
     if not wifi_connect(): return
 
@@ -515,29 +442,19 @@ def main():
 
     last_fb_ms = time.ticks_ms(); last_alert_ms = time.ticks_ms()
     print("🌡️ Pico W Environmental + Sound + Vitals Monitor Ready")
+    if CAPTURE_PATH:
+        try:
+            capture = CaptureWriter(CAPTURE_PATH, FINGER_IR_THRESHOLD, CAPTURE_MAX_BYTES)
+            print("⏺️ Capturing raw vitals + sound edges ->", CAPTURE_PATH)
+        except OSError as e:
+            print("Capture disabled:", e)
+    sound_irq_start()
 
     try:
         while True:
             now = time.ticks_ms()
-            # SOUND
-            if sound_pin.value() == 1:
-                if time.ticks_diff(now, _burst_last_ms) > DEBOUNCE_MS:
-                    if not _in_burst: _in_burst = True; _sound_count = 0
-                    _sound_count += 1; _burst_last_ms = now; _last_sound_ms = now
-                    if _sound_count >= TB_BURST_MIN:
-                        print("🔴 Detected: TB (>= {} highs)".format(TB_BURST_MIN))
-                        _last_sound_event_ms = now; _last_sound_event_code = SOUND_TB
-                        if _pending_cough: _pending_cough = False; print("↪️ TB overrides pending cough")
-                        _sound_count = 0; _in_burst = False
-            if _in_burst and time.ticks_diff(now, _burst_last_ms) > BURST_GAP_MS: classify_and_reset_burst()
-            if _last_sound_ms and time.ticks_diff(now, _last_sound_ms) >= ASTHMATIC_MS:
-                print("⚠️ Possible Asthmatic (no sound ≥ 10s)")
-                _last_sound_event_ms = now; _last_sound_event_code = SOUND_ASTHMA
-                if _pending_cough: _pending_cough = False; print("↪️ Asthma cancels pending cough")
-                classify_and_reset_burst(); _last_sound_ms = now
-            if _pending_cough and time.ticks_diff(now, _pending_cough_ms) >= COUGH_CONFIRM_MS:
-                _last_sound_event_ms = time.ticks_ms(); _last_sound_event_code = SOUND_COUGH
-                _pending_cough = False; print("🟠 Cough confirmed (no TB within window)")
+            # SOUND (edges stamped by IRQ, classified here in one batch)
+            drain_sound_edges(now)
 
             # CO2 & Alcohol (active-LOW)
             co2Flag = 1 if (co2_pin.value()==0) else 0
@@ -551,9 +468,9 @@ def main():
                 print("❌ Failed to read from DHT11 sensor!")
 
             # Vitals
-            read_max3010x_vitals()
-            finger_present = max30105_ok and (particle.getIR() >= FINGER_IR_THRESHOLD)
-            update_calibration_state(finger_present)
+            read_max3010x_vitals(now)
+            finger_present = max30105_ok and vit.finger_present()
+            cal.update(finger_present, vit, now)
 
             # Serial vitals (latched)
             print_vitals_serial(finger_present)
@@ -579,16 +496,16 @@ def main():
             if time.ticks_diff(now, last_fb_ms) >= FB_CHECK_MS:
                 last_fb_ms = now
                 sound_to_write = SOUND_NONE
-                if _last_sound_event_code != SOUND_NONE:
+                if snd.event_code != SOUND_NONE:
                     allow_same = time.ticks_diff(now, _last_sound_write_ms) >= SOUND_EVENT_MIN_GAP_MS
-                    if _last_sound_event_code != _last_sent_sound or allow_same:
-                        sound_to_write = _last_sound_event_code
+                    if snd.event_code != _last_sent_sound or allow_same:
+                        sound_to_write = snd.event_code
                 temp_i = int(t+0.5) if t is not None else 0
                 hum_i  = int(h+0.5) if h is not None else 0
-                sys_i = systolic_latched if have_latched else 0
-                dia_i = diastolic_latched if have_latched else 0
-                hr_i  = heartRate_latched if have_latched else 0
-                sp_i  = spo2_latched if have_latched else 0
+                sys_i = cal.systolic if cal.have_latched else 0
+                dia_i = cal.diastolic if cal.have_latched else 0
+                hr_i  = cal.hr if cal.have_latched else 0
+                sp_i  = cal.spo2 if cal.have_latched else 0
                 try:
                     push_if_changed(co2Flag, alcFlag, sound_to_write, temp_i, hum_i, sys_i, dia_i, hr_i, sp_i)
                     if sound_to_write != SOUND_NONE:
@@ -91,6 +91,23 @@ def beep_for_ms(total_ms=1200, toggle_ms=150):
         time.sleep_ms(toggle_ms)
     buzzer_off()
 
+def buzzer_set(on):
+    if on: buzzer_on()
+    else:  buzzer_off()
+
+# ---------- Background actuator sequences (Libraries/actuator_timeline.py) ----------
+# Dispense and failure beeps run from a Timer; without the library they block as before.
+try:
+    from actuator_timeline import Timeline, beep_steps
+    act = Timeline(servo_angle, buzzer_set)
+    DISPENSE_STEPS = ((0, 180, None),) + beep_steps(5000, 200) + ((5000, 0, False),)
+except ImportError:
+    act = None
+
+def beep_async(total_ms=1200, toggle_ms=150):
+    if act: act.play(beep_steps(total_ms, toggle_ms))
+    else:   beep_for_ms(total_ms, toggle_ms)
+
 # ---------- Wi-Fi & Firebase ----------
 def wifi_connect():
     wlan = network.WLAN(network.STA_IF)
@@ -146,7 +163,20 @@ def rtdb_get(path, id_token=None, query=None):
         print('RTDB get exception:', e); return None
 
 # ---------- Keypad ----------
+# IRQ wake-up + timer scan + event queue (Libraries/keypad_irq.py); polling scan below if absent
+try:
+    from keypad_irq import Keypad
+    keypad = Keypad(rows, cols, KEYS, debounce_ms=DEBOUNCE_MS)
+except ImportError:
+    keypad = None
+
+def flush_keys():
+    # session boundaries only: leftovers from the last customer must not feed the next one,
+    # while digits typed ahead of a prompt inside a session are kept
+    if keypad: keypad.clear()
+
 def get_key_once():
+    if keypad: return keypad.get()
     key = None
     for ci, _ in enumerate(cols):
         for j, cp in enumerate(cols): cp.value(0 if j == ci else 1)
@@ -271,11 +301,18 @@ def account_type_menu(account_code, id_token, node_key=None):
     """
     account_code: '1' = Savings, '2' = Current
     """
-    rtdb_put_string(ATM_BASE + '/4_Account_Type', str(account_code), id_token=id_token)
+    rtdb_put_string(ACCOUNT_TYPE_PATH, str(account_code), id_token=id_token)
     if node_key is not None:
         rtdb_put_string(ATM_USERS_BASE + '/' + node_key + '/accountType', str(account_code), id_token=id_token)
     print("Account type set to:", "Savings" if account_code == '1' else "Current")
 
+def select_account_type():
+    print('\nAccount Type: 1 = Savings, 2 = Current')
+    while True:
+        k = get_key_once()
+        if k in ('1', '2'): return k
+        time.sleep_ms(5)
+
 
 
 # ---------- Amount flow WITH balance check + full global mirror ----------
@@ -323,7 +360,7 @@ def per_account_withdrawal_amount_flow(id_token, node_key):
                 print('Requested:', amt, 'Available balance:', bal)
 
                 if amt <= 0:
-                    print('Invalid amount.'); beep_for_ms(800, 120)
+                    print('Invalid amount.'); beep_async(800, 120)
                     set_insufficient_flag('1', id_token, node_key)
                     return buf
 
@@ -339,15 +376,18 @@ def per_account_withdrawal_amount_flow(id_token, node_key):
                     # insufficient
                     print('Insufficient balance.')
                     set_insufficient_flag('1', id_token, node_key)
-                    beep_for_ms(1200, 150)
+                    beep_async(1200, 150)
                     # Do NOT dispense; leave Transaction_Completed = 0
                     return buf
 
 def dispense_action(id_token=None, node_key=None):
     print('Dispensing...')
-    servo_angle(180)
-    beep_for_ms(5000, 200)
-    servo_angle(0)
+    if act:
+        act.play(DISPENSE_STEPS)      # servo out, 5 s beep, servo back — completion is written meanwhile
+    else:
+        servo_angle(180)
+        beep_for_ms(5000, 200)
+        servo_angle(0)
     if id_token is not None:
         if node_key:
             rtdb_put_string(ATM_USERS_BASE + '/' + node_key + '/Transaction_Completed', '1', id_token=id_token)
@@ -366,7 +406,7 @@ def local_verify_pin(id_token, node_key):
     }, default='')
     stored = str(stored)
     if pin_entered == stored: print('PIN verification OK.'); return True
-    print('PIN verification FAILED.'); beep_for_ms(1200, 150); return False
+    print('PIN verification FAILED.'); beep_async(1200, 150); return False
 
 def local_verify_pattern(id_token, node_key):
     patt_entered = collect_4_digits('Pattern selected.')
@@ -379,7 +419,7 @@ def local_verify_pattern(id_token, node_key):
     }, default='')
     stored = str(stored)
     if patt_entered == stored: print('Pattern verification OK.'); return True
-    print('Pattern verification FAILED.'); beep_for_ms(1200, 150); return False
+    print('Pattern verification FAILED.'); beep_async(1200, 150); return False
 
 # ---------- 3-attempt wrappers ----------
 def verify_touch_with_retries(id_token, node_key, max_attempts=3):
@@ -396,7 +436,7 @@ def verify_touch_with_retries(id_token, node_key, max_attempts=3):
         else:
             rtdb_put_string(FINGER_PATH, '0', id_token=id_token)
             show_fail_then_idle(id_token, node_key)
-            if attempts < max_attempts: beep_for_ms(600, 120)
+            if attempts < max_attempts: beep_async(600, 120)
     print('Touch verification failed after {} attempts.'.format(max_attempts))
     return False, attempts
 
@@ -412,7 +452,7 @@ def verify_pin_with_retries(id_token, node_key, max_attempts=3):
             return True, attempts
         else:
             show_fail_then_idle(id_token, node_key)
-            if attempts < max_attempts: beep_for_ms(600, 120)
+            if attempts < max_attempts: beep_async(600, 120)
     print('PIN failed after {} attempts.'.format(max_attempts))
     return False, attempts
 
@@ -428,7 +468,7 @@ def verify_pattern_with_retries(id_token, node_key, max_attempts=3):
             return True, attempts
         else:
             show_fail_then_idle(id_token, node_key)
-            if attempts < max_attempts: beep_for_ms(600, 120)
+            if attempts < max_attempts: beep_async(600, 120)
     print('Pattern failed after {} attempts.'.format(max_attempts))
     return False, attempts
 
@@ -455,6 +495,7 @@ def main():
     else:
          print('Welcome flag write failed (no auth?)')
     # Variable-length AC entry; '#' confirms
+    flush_keys()                        # new session
     ac_no = collect_number_until_hash('\nEnter Account Number:', max_len=24, min_len=1, mask=False)
     print('AC_NO entered:', ac_no)
     rtdb_put_string(AC_NO_PATH, ac_no, id_token=id_token)
@@ -464,7 +505,8 @@ def main():
     if not node_key:
         print('Account NOT found under ATMusers. Aborting.')
         show_fail_then_idle(id_token)
-        beep_for_ms(1000, 100)
+        beep_async(1000, 100)
+        if act: act.wait()
         return
 
     print('Account found. Node key =', node_key)
@@ -493,13 +535,14 @@ def main():
                     verified, attempts_used = verify_pattern_with_retries(id_token, node_key, 3)
 
                 if verified:
-                    account_type_menu(id_token, node_key)
+                    account_type_menu(select_account_type(), id_token, node_key)
                     per_account_withdrawal_amount_flow(id_token, node_key)
                 else:
                     print('Not verified; ending attempt.')
                     rtdb_put_string(ATM_USERS_BASE + '/' + node_key + '/Last_Attempt', 'failed', id_token=id_token)
                     rtdb_put_string(ATM_USERS_BASE + '/' + node_key + '/Failed_Attempts', str(attempts_used), id_token=id_token)
 
+                flush_keys()            # attempt over: presses made during it don't pick the next method
                 print_menu()
         time.sleep_ms(5)
 
@@ -2,10 +2,22 @@
 # Servo starts ONLY when Firebase /Baby_Cradlle/servo == "1". Mic is used only for logging/labels.
 # Pins: MIC(AO)->ADC0 GP26, SERVO->GP15, DHT11->GP13, OLED I2C0 SDA=GP4 SCL=GP5, LED builtin.
 
-import network, time, ujson as json
+import network, time, ujson as json, _thread
 import urequests as requests
 from machine import Pin, ADC, PWM, I2C
 import ssd1306, dht, math, gc
+from mic_capture import MicCapture
+from goertzel_bank import GoertzelBank
+from envelope import EnvelopeTracker, FRAC
+try:
+    import cry_model                        # written by cry_train.py; absent -> threshold rules below
+    from cry_features import CryFeatures, predict
+except ImportError:
+    cry_model = None
+try:
+    from ssd1306_dirty import SSD1306_DirtyI2C as OLED_I2C   # draw_oled() runs every 5 ms; skip unchanged frames
+except ImportError:
+    OLED_I2C = ssd1306.SSD1306_I2C
 
 try:
     import usocket as socket
@@ -48,6 +60,7 @@ FB_POLL_MS      = 200
 DHT_INTERVAL_MS = 2000
 STATUS_PRINT_MS = 500
 ADC_PRINT_MS    = 250
+ADC_DEBUG       = True      # False: keep tracking, skip the 4 Hz A0 debug line
 
 # ---------- Globals ----------
 id_token = ""
@@ -69,7 +82,7 @@ SERVO_CENTER, SERVO_LOW, SERVO_HIGH = 90, 65, 115
 # ---------- DHT / OLED / LED ----------
 d = dht.DHT11(Pin(PIN_DHT)); last_temp_c = float("nan"); last_hum = float("nan"); last_dht_ms = 0
 i2c = I2C(0, scl=Pin(PIN_I2C_SCL), sda=Pin(PIN_I2C_SDA), freq=400000)
-oled = ssd1306.SSD1306_I2C(128, 64, i2c)
+oled = OLED_I2C(128, 64, i2c)
 def center_text_y(y, text): oled.text(text, max(0, (128 - len(text)*8)//2), y)
 led = Pin(PIN_LED, Pin.OUT)
 def led_on(): led.value(1)
@@ -87,9 +100,8 @@ last_pushed_active = None
 last_pushed_label  = None
 last_emotion = ""
 
-alpha_base, alpha_env = 0.001, 0.05
-a_base, a_env, a_min_win, a_max_win = 0.0, 0.0, 1023, 0
-last_adc_print_ms = 0
+# A0 baseline/envelope/min-max (debug only): integer EMAs, alpha 2**-10 and 2**-4
+adc_env = EnvelopeTracker(base_shift=10, env_shift=4)
 last_status_ms = 0
 
 # ---------- SOUND (labels only; no servo control) ----------
@@ -100,40 +112,76 @@ HUNGRY_THRESHOLD, PAIN_THRESHOLD = 0.1, 0.1
 SILENCE_RMS_THRESHOLD = 0.3
 CLASSIFY_INTERVAL_MS = 200
 last_classify_ms = 0
-hungry_count, HUNGRY_LIMIT = 0, 5
-
-def goertzel(samples, f, fs):
-    n = len(samples); k = int(0.5 + (n*f)/fs)
-    omega = (2.0*math.pi*k)/n; coeff = 2.0*math.cos(omega)
-    s1=s2=0.0
-    for x in samples:
-        s = x + coeff*s1 - s2
-        s2, s1 = s1, s
-    return (s2*2 + s1*2 - coeff*s1*s2)/n
-
-def sample_audio():
-    buf=[]
-    us = int(1_000_000/ADC_SAMPLE_RATE)
-    for _ in range(SAMPLES):
-        buf.append((adc.read_u16()-32768)/32768.0)
-        time.sleep_us(us)
-    return buf
-
-def compute_rms(samples):
-    s=0.0
-    for x in samples: s += x*x
-    return math.sqrt(s/len(samples))
-
-def classify_frame():
-    s = sample_audio()
-    rms = compute_rms(s)
-    if rms < SILENCE_RMS_THRESHOLD: return "SILENCE"
-    eh = goertzel(s, TARGET_FREQ_HUNGRY, ADC_SAMPLE_RATE)
-    ep = goertzel(s, TARGET_FREQ_PAIN,   ADC_SAMPLE_RATE)
+hungry_count, HUNGRY_LIMIT = 0, 5      # debounce for the threshold rules only
+# Training data: dump non-silent frames (raw int16) for cry_train.py, e.g. "/frames.raw"
+FRAME_DUMP_PATH = None
+FRAME_DUMP_MAX  = 1500                 # ~480 KB
+
+# Timer-paced capture into two alternating array('h') frames; eff_rate_hz is the measured rate
+mic = MicCapture(adc, SAMPLES, ADC_SAMPLE_RATE)
+# Both bins + RMS in one integer pass; coefficients cached per sample rate
+bank = GoertzelBank(SAMPLES, (TARGET_FREQ_HUNGRY, TARGET_FREQ_PAIN), ADC_SAMPLE_RATE)
+# Energy gate: frames whose sum of squares (accumulated in the IRQ) is below this skip Goertzel
+SILENCE_SUMSQ = int((SILENCE_RMS_THRESHOLD * 2048) ** 2 * SAMPLES)
+
+cry_fx = None
+if cry_model:
+    if cry_model.N == SAMPLES: cry_fx = CryFeatures(SAMPLES, cry_model.FREQS, ADC_SAMPLE_RATE)
+    else: print("WARN: cry_model N={} != SAMPLES={}, using thresholds".format(cry_model.N, SAMPLES))
+
+# Per-frame budget: classification must finish within one frame period
+CLASSIFY_BUDGET_US = SAMPLES * 1_000_000 // ADC_SAMPLE_RATE
+cls_us_max = 0; cls_over = 0
+dump_f = None; dump_n = 0
+
+def classify_frame(s, sumsq):
+    if sumsq < SILENCE_SUMSQ: return "SILENCE"
+    if cry_fx:
+        if mic.eff_rate_hz: cry_fx.bank.retune(mic.eff_rate_hz)
+        return cry_model.LABELS[predict(cry_model, cry_fx.extract(s))]
+    if mic.eff_rate_hz: bank.retune(mic.eff_rate_hz)   # bins follow the rate actually achieved
+    bank.process(s)
+    eh, ep = bank.legacy_energy()     # same scale as the float goertzel() the thresholds were tuned on
     if ep > PAIN_THRESHOLD and ep > eh*1.5: return "PAIN"
     if eh > HUNGRY_THRESHOLD: return "HUNGRY"
     return "DISCOMFORT"
 
+# Latest label, written by the audio worker (core1) and read by the main loop
+label_lock = _thread.allocate_lock()
+latest_label = "SILENCE"; latest_seq = 0
+audio_run = True; audio_on_core1 = False
+
+def dump_frame(s):
+    global dump_f, dump_n
+    if dump_n >= FRAME_DUMP_MAX: return
+    if dump_f is None: dump_f = open(FRAME_DUMP_PATH, "wb")
+    dump_f.write(s); dump_n += 1
+    if dump_n == FRAME_DUMP_MAX:
+        dump_f.close(); print("Frame dump complete:", FRAME_DUMP_PATH)
+
+def poll_audio():
+    """Classify the newest complete frame, if any. Returns True if one was processed."""
+    global latest_label, latest_seq, cls_us_max, cls_over
+    f = mic.acquire()
+    if f is None: return False
+    try:
+        if FRAME_DUMP_PATH and f[1] >= SILENCE_SUMSQ: dump_frame(f[0])
+        t0 = time.ticks_us()
+        label = classify_frame(f[0], f[1])
+        dt = time.ticks_diff(time.ticks_us(), t0)
+    finally: mic.release()
+    if dt > cls_us_max: cls_us_max = dt
+    if dt > CLASSIFY_BUDGET_US: cls_over += 1
+    label_lock.acquire(); latest_label = label; latest_seq += 1; label_lock.release()
+    return True
+
+def audio_worker():
+    while audio_run:
+        if not poll_audio(): time.sleep_ms(2)
+
+def get_latest_label():
+    label_lock.acquire(); l = latest_label; label_lock.release(); return l
+
 # ---------- Wi-Fi + DNS ----------
 def _force_public_dns(wlan, prefer_public=False):
     """
@@ -320,21 +368,22 @@ def print_status(now_ms, raw10):
     t_str = "--.-C" if math.isnan(last_temp_c) else "{:.1f}C".format(last_temp_c)
     h_str = "--.-%" if math.isnan(last_hum) else "{:.1f}%".format(last_hum)
     secs = time.ticks_ms()/1000.0
-    print('STATUS t={:.3f}s  A0={}  Audio={}  Cradle={}  Angle={}  Emotion="{}"  T={}  H={}'
+    print('STATUS t={:.3f}s  A0={}  Audio={}  Cradle={}  Angle={}  Emotion="{}"  T={}  H={}  OLED={}B/s  Fs={}Hz'
           .format(secs, raw10, 1 if audio_active else 0,
                   "MOVING" if pattern_active else "STATIC",
-                  angle, emo, t_str, h_str))
+                  angle, emo, t_str, h_str, getattr(oled, "bytes_per_s", "-"), mic.eff_rate_hz)
+          + '  Frames={} Drop={} Cls<={}us Over={}'.format(latest_seq, mic.dropped, cls_us_max, cls_over))
 
 # ---------- Main ----------
 def main():
     global audio_active, audio_label, last_pushed_active, last_pushed_label, last_emotion
-    global a_base, a_env, a_min_win, a_max_win, last_classify_ms, hungry_count
+    global last_classify_ms, hungry_count, audio_on_core1
 
     wifi_connect()
     servo_write(SERVO_CENTER)
 
     # init baseline and DB fields
-    a_base = float(read_adc_10bit())
+    adc_env.reset(read_adc_10bit())
     ensure_auth()
     db_put(PATH_AUDIO, "\"0\"")
     db_put(PATH_AUDIO_LABEL, "\"SILENCE\"")
@@ -342,6 +391,10 @@ def main():
 
     oled.fill(0); oled.text("Booting...", 0, 24); oled.show()
 
+    mic.start_stream()
+    try: _thread.start_new_thread(audio_worker, ()); audio_on_core1 = True
+    except Exception as e: print("WARN: cannot start audio thread, classifying in main loop:", e)
+
     last_fb_poll = 0
     last_adc_dbg = 0
 
@@ -350,24 +403,25 @@ def main():
 
         # ADC smoothing (debug only)
         raw10 = read_adc_10bit()
-        a_base += alpha_base * (raw10 - a_base)
-        dev = abs(raw10 - a_base)
-        a_env += alpha_env * (dev - a_env)
-        if raw10 < a_min_win: a_min_win = raw10
-        if raw10 > a_max_win: a_max_win = raw10
+        adc_env.update(raw10)
 
         if time.ticks_diff(now, last_adc_dbg) >= ADC_PRINT_MS:
             last_adc_dbg = now
-            hh = (now//3600000)%24; mm = (now//60000)%60; ss = (now//1000)%60
-            print("%02d:%02d:%02d -> A0:%4d  base:%7.1f  env:%6.1f  min:%4d  max:%4d" %
-                  (hh, mm, ss, raw10, a_base, a_env, a_min_win, a_max_win))
-            a_min_win, a_max_win = 1023, 0
-
-        # SOUND classification (labels only; NO servo trigger here)
+            adc_env.snapshot()
+            if ADC_DEBUG:
+                hh = (now//3600000)%24; mm = (now//60000)%60; ss = (now//1000)%60
+                b10 = (adc_env.out_base * 10) >> FRAC; e10 = (adc_env.out_env * 10) >> FRAC
+                print("%02d:%02d:%02d -> A0:%4d  base:%5d.%d  env:%4d.%d  min:%4d  max:%4d" %
+                      (hh, mm, ss, raw10, b10 // 10, b10 % 10, e10 // 10, e10 % 10,
+                       adc_env.out_min, adc_env.out_max))
+
+        # SOUND label pick-up (labels only; NO servo trigger here). Frames are
+        # captured and classified continuously; this only reads the latest label.
+        if not audio_on_core1: poll_audio()
         if time.ticks_diff(now, last_classify_ms) >= CLASSIFY_INTERVAL_MS:
             last_classify_ms = now
-            label = classify_frame()
-            if label == "HUNGRY":
+            label = get_latest_label()
+            if label == "HUNGRY" and cry_fx is None:
                 hungry_count = min(hungry_count + 1, HUNGRY_LIMIT)
                 if hungry_count < HUNGRY_LIMIT:
                     label = "DISCOMFORT"
@@ -423,5 +477,7 @@ if __name__ == "__main__":
     try:
         main()
     except KeyboardInterrupt:
+        audio_run = False; mic.stop()
+        if dump_f and dump_n < FRAME_DUMP_MAX: dump_f.close()
         servo_write(SERVO_CENTER); led_off(); print("Stopped.")
 
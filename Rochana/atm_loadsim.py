@@ -0,0 +1,275 @@
+# atm_loadsim.py — N simulated ATM.py terminals against a local RTDB stand-in (CPython)
+#
+# Each terminal is its own copy of ATM.py (loaded with stand-in machine/network/
+# urequests modules) whose main() runs unchanged; only get_key_once() is replaced
+# by a scripted keypad: account number + '#', '3' (PIN), the PIN + '#', account
+# type, amount + '#'. A terminal's session ends when its script runs out.
+# Every HTTP call goes to one in-process RTDB with a simulated round trip.
+#
+#   python3 atm_loadsim.py                                   # 8 terminals x 5 sessions
+#   python3 atm_loadsim.py -t 32 -s 10 --accounts 8 --rtt-ms 120 --scale 0.02
+#
+# Times are device milliseconds: every sleep and round trip is multiplied by
+# --scale in wall time and reported divided back out.
+#
+# Reported:
+#   session latency p50/p90/p99/max   (main() start -> script exhausted)
+#   requests per session              (GET / PUT / POST)
+#   global overwrites                 PUT to a shared /6_ATM path whose previous value was
+#                                     written by another terminal during this session
+#   stale writes                      PUT to a path another terminal wrote after this
+#                                     terminal last read it (read-modify-write race)
+#   balance check                     final balances vs. initial - confirmed debits
+
+import os, sys, json, time, random, types, threading, argparse, importlib.util
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ATM_PY = os.path.join(HERE, "ATM.py")
+SHARED_PREFIXES = ("/6_ATM/1_", "/6_ATM/2_Menu")
+
+# ---------- stand-in device modules ----------
+class _Pin:
+    IN = 0; OUT = 1; PULL_UP = 1; PULL_DOWN = 2; IRQ_FALLING = 4; IRQ_RISING = 8
+    def __init__(self, *a, **k): self._v = k.get("value", 1)
+    def value(self, v=None):
+        if v is None: return self._v
+        self._v = v
+    def irq(self, *a, **k): pass
+
+class _PWM:
+    def __init__(self, pin): pass
+    def freq(self, f): pass
+    def duty_u16(self, d): pass
+
+class _WLAN:
+    def __init__(self, *a): pass
+    def active(self, *a): return True
+    def isconnected(self): return True
+    def connect(self, *a): pass
+    def ifconfig(self): return ("10.0.0.2", "255.255.255.0", "10.0.0.1", "10.0.0.1")
+
+def _install_device_modules():
+    m = types.ModuleType("machine"); m.Pin = _Pin; m.PWM = _PWM
+    n = types.ModuleType("network"); n.STA_IF = 0; n.WLAN = _WLAN
+    u = types.ModuleType("urequests")          # replaced per terminal after load
+    sys.modules.update({"machine": m, "network": n, "urequests": u, "ujson": json})
+
+class SimTime:
+    """MicroPython time API on a scaled wall clock (device ms)."""
+    def __init__(self, scale): self.scale = scale
+    def ticks_ms(self): return int(time.perf_counter() * 1000 / self.scale)
+    def ticks_diff(self, a, b): return a - b
+    def ticks_add(self, a, b): return a + b
+    def sleep_ms(self, ms): time.sleep(ms * self.scale / 1000)
+    def sleep_us(self, us): time.sleep(us * self.scale / 1e6)
+    def sleep(self, s): time.sleep(s * self.scale)
+
+# ---------- RTDB stand-in ----------
+class RTDB:
+    def __init__(self):
+        self.root = {}; self.lock = threading.Lock()
+        self.seq = 0
+        self.last_write = {}          # path -> (seq, terminal)
+        self.reads = {}               # terminal -> {path: seq at read}
+        self.session_start = {}       # terminal -> seq at session start
+        self.global_overwrites = {}   # path -> count
+        self.stale_writes = {}        # path (templated) -> count
+
+    @staticmethod
+    def _parts(path): return [p for p in path.split("/") if p]
+
+    def _get(self, path):
+        node = self.root
+        for p in self._parts(path):
+            if not isinstance(node, dict) or p not in node: return None
+            node = node[p]
+        return node
+
+    def get(self, term, path, shallow=False):
+        with self.lock:
+            self.reads.setdefault(term, {})[path] = self.seq
+            v = self._get(path)
+            if shallow and isinstance(v, dict): return {k: True for k in v}
+            return json.loads(json.dumps(v))
+
+    def put(self, term, path, value):
+        with self.lock:
+            self.seq += 1
+            prev = self.last_write.get(path)
+            if prev and prev[1] != term:
+                if path.startswith(SHARED_PREFIXES) and prev[0] > self.session_start.get(term, 0):
+                    self.global_overwrites[path] = self.global_overwrites.get(path, 0) + 1
+                read_at = self._read_seq(term, path)
+                if read_at is not None and prev[0] > read_at:
+                    key = _template(path)
+                    self.stale_writes[key] = self.stale_writes.get(key, 0) + 1
+            self.last_write[path] = (self.seq, term)
+            parts = self._parts(path); node = self.root
+            for p in parts[:-1]:
+                if not isinstance(node.get(p), dict): node[p] = {}
+                node = node[p]
+            if value is None: node.pop(parts[-1], None)
+            else: node[parts[-1]] = value
+
+    def _read_seq(self, term, path):
+        seen = self.reads.get(term, {}); p = path
+        while p:
+            if p in seen: return seen[p]
+            p = p.rsplit("/", 1)[0]
+        return None
+
+    def begin_session(self, term):
+        with self.lock: self.session_start[term] = self.seq; self.reads[term] = {}
+
+def _template(path):
+    parts = path.split("/")
+    if len(parts) > 3 and parts[2] == "ATMusers": parts[3] = "<user>"
+    return "/".join(parts)
+
+# ---------- per-terminal HTTP client ----------
+class _Resp:
+    def __init__(self, code, body): self.status_code = code; self.text = json.dumps(body); self._b = body
+    def json(self): return self._b
+    def close(self): pass
+
+class SimHttp:
+    def __init__(self, term, db, db_url, rtt_ms, scale, rng):
+        self.term = term; self.db = db; self.db_url = db_url
+        self.rtt_ms = rtt_ms; self.scale = scale; self.rng = rng
+        self.counts = {"GET": 0, "PUT": 0, "POST": 0}
+        self.put_paths = set()
+
+    def _rtt_half(self):
+        ms = max(self.rtt_ms / 4, self.rng.gauss(self.rtt_ms, self.rtt_ms / 4))
+        time.sleep(ms * self.scale / 2000)
+
+    def _path(self, url):
+        base, _, qs = url.partition("?")
+        return base[len(self.db_url):-len(".json")], qs.split("&") if qs else []
+
+    def get(self, url, **k):
+        self.counts["GET"] += 1; self._rtt_half()
+        path, q = self._path(url)
+        v = self.db.get(self.term, path, shallow="shallow=true" in q)
+        self._rtt_half(); return _Resp(200, v)
+
+    def put(self, url, data=None, **k):
+        self.counts["PUT"] += 1; self._rtt_half()
+        path, _ = self._path(url)
+        self.db.put(self.term, path, json.loads(data)); self.put_paths.add(path); self._rtt_half()
+        return _Resp(200, json.loads(data))
+
+    def post(self, url, data=None, **k):
+        self.counts["POST"] += 1; self._rtt_half(); self._rtt_half()
+        return _Resp(200, {"idToken": "sim-token-%d" % self.term})
+
+# ---------- terminal ----------
+class _ScriptDone(Exception): pass
+
+def load_terminal(i, http, scale):
+    spec = importlib.util.spec_from_file_location("atm_term%d" % i, ATM_PY)
+    mod = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mod)
+    mod.requests = http; mod.time = SimTime(scale)
+    mod.print = lambda *a, **k: None
+    return mod
+
+def session_script(ac, pin, amount, rng, bad_pin_rate):
+    keys = list(ac) + ["#", "3"]
+    if rng.random() < bad_pin_rate: keys += list("0000") + ["#"]
+    keys += list(pin) + ["#", rng.choice("12")] + list(str(amount)) + ["#"]
+    return keys
+
+def run_terminal(i, mod, http, db, accounts, sessions, args, rng, out):
+    for _ in range(sessions):
+        ac, node_key, pin = rng.choice(accounts)
+        amount = rng.randint(1, 20) * 100
+        keys = iter(session_script(ac, pin, amount, rng, args.bad_pin_rate))
+        def get_key_once():
+            if args.key_ms: mod.time.sleep_ms(args.key_ms)
+            for k in keys: return k
+            raise _ScriptDone()
+        mod.get_key_once = get_key_once
+        before = dict(http.counts); http.put_paths.clear(); db.begin_session(i)
+        t0 = time.perf_counter(); ok = True
+        try: mod.main()
+        except _ScriptDone: pass
+        except Exception as e:
+            ok = False; out["errors"].append("t%d: %r" % (i, e))
+        dt = (time.perf_counter() - t0) * 1000 / args.scale
+        req = {k: http.counts[k] - before[k] for k in http.counts}
+        with out["lock"]:
+            out["sessions"].append((dt, req, ok))
+            if "/6_ATM/ATMusers/%s/balance" % node_key in http.put_paths:
+                out["debits"].append((node_key, amount))
+
+# ---------- main ----------
+def pct(xs, p):
+    xs = sorted(xs); return xs[min(len(xs) - 1, int(p / 100.0 * len(xs)))] if xs else 0
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Load-test ATM.py against a local RTDB stand-in")
+    ap.add_argument("-t", "--terminals", type=int, default=8)
+    ap.add_argument("-s", "--sessions", type=int, default=5, help="sessions per terminal")
+    ap.add_argument("--accounts", type=int, default=4, help="accounts shared by all terminals")
+    ap.add_argument("--rtt-ms", type=float, default=80.0, help="mean HTTP round trip (device ms)")
+    ap.add_argument("--key-ms", type=int, default=0, help="think time per key press (device ms)")
+    ap.add_argument("--bad-pin-rate", type=float, default=0.1)
+    ap.add_argument("--scale", type=float, default=0.02, help="wall seconds per device second")
+    ap.add_argument("--seed", type=int, default=1)
+    a = ap.parse_args(argv)
+
+    _install_device_modules()
+    db = RTDB(); rng = random.Random(a.seed)
+    accounts = []; start_bal = 1000000
+    for j in range(a.accounts):
+        key = "user%03d" % j; ac = str(4100200300 + j); pin = "%04d" % rng.randint(1000, 9999)
+        db.root.setdefault("6_ATM", {}).setdefault("ATMusers", {})[key] = {
+            "accountNumber": ac, "PIN": pin, "balance": str(start_bal)}
+        accounts.append((ac, key, pin))
+
+    out = {"sessions": [], "debits": [], "errors": [], "lock": threading.Lock()}
+    threads = []
+    for i in range(a.terminals):
+        http = SimHttp(i, db, None, a.rtt_ms, a.scale, random.Random(a.seed * 1000 + i))
+        mod = load_terminal(i, http, a.scale)
+        http.db_url = mod.DB_URL
+        th = threading.Thread(target=run_terminal, args=(i, mod, http, db, accounts, a.sessions, a,
+                                                           random.Random(a.seed * 7919 + i), out))
+        threads.append(th)
+    wall0 = time.perf_counter()
+    for th in threads: th.start()
+    for th in threads: th.join()
+    wall = time.perf_counter() - wall0
+
+    lat = [s[0] for s in out["sessions"]]; reqs = [s[1] for s in out["sessions"]]
+    tot = lambda k: sum(r[k] for r in reqs)
+    n = len(reqs) or 1
+    print("run      : {} terminals x {} sessions, {} accounts, rtt {:.0f} ms, {:.1f} s wall".format(
+        a.terminals, a.sessions, a.accounts, a.rtt_ms, wall))
+    print("latency  : p50 {:.0f}  p90 {:.0f}  p99 {:.0f}  max {:.0f} ms (device)".format(
+        pct(lat, 50), pct(lat, 90), pct(lat, 99), max(lat) if lat else 0))
+    print("requests : {:.1f}/session (GET {:.1f}, PUT {:.1f}, POST {:.1f}), max {}".format(
+        (tot("GET") + tot("PUT") + tot("POST")) / n, tot("GET") / n, tot("PUT") / n, tot("POST") / n,
+        max(sum(r.values()) for r in reqs) if reqs else 0))
+    print("overwrite: {} PUTs to shared paths overwrote another terminal's in-session value".format(
+        sum(db.global_overwrites.values())))
+    for p, c in sorted(db.global_overwrites.items(), key=lambda x: -x[1])[:8]:
+        print("           {:5d}  {}".format(c, p))
+    print("stale    : {} writes after another terminal changed the path since our read".format(
+        sum(db.stale_writes.values())))
+    for p, c in sorted(db.stale_writes.items(), key=lambda x: -x[1])[:8]:
+        print("           {:5d}  {}".format(c, p))
+
+    users = db.root["6_ATM"]["ATMusers"]; bad = 0; created = 0
+    for ac, key, pin in accounts:
+        confirmed = sum(amt for k, amt in out["debits"] if k == key)
+        expected = start_bal - confirmed; actual = int(users[key]["balance"])
+        if actual != expected: bad += 1; created += actual - expected
+    print("balances : {}/{} accounts off, {} more money than debited".format(bad, len(accounts), created))
+    if out["errors"]:
+        print("errors   : {} sessions failed, e.g. {}".format(len(out["errors"]), out["errors"][0]))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
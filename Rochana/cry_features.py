@@ -0,0 +1,68 @@
+# cry_features.py — frame features + integer decision-tree predict for the cradle (MicroPython / CPython)
+#
+# Features of one centred 12-bit frame (array('h') from mic_capture), all 0..255:
+#   [E(f) for f in FREQS] + [frame power, zero-crossing rate]
+# Energies are log-quantised: 1/8 octave per step, a full-scale sine ~ 160.
+# cry_train.py uses this same module on the PC, so both sides quantise identically.
+#
+# The model is a module written by cry_train.py (cry_model.py): flat byte tables
+# FEAT/THR/LEFT/RIGHT, leaf when FEAT[i] == LEAF (THR[i] is then the label index).
+# predict() visits at most DEPTH+1 nodes, so its cost is fixed per frame.
+
+import math
+from goertzel_bank import GoertzelBank
+
+LEAF = 255
+_K = 8.0 / math.log(2.0)          # 8 steps per octave of energy
+_OFF = 160
+
+def qlog(e):
+    if e <= 0.0: return 0
+    q = int(_K * math.log(e)) + _OFF
+    return 0 if q < 0 else 255 if q > 255 else q
+
+# ---------- zero crossings (viper when available) ----------
+try:
+    import micropython
+
+    @micropython.viper
+    def zero_crossings(buf, n: int) -> int:
+        p = ptr16(buf); c = 0; prev = int(p[0]) & 0x8000; i = 1
+        while i < n:
+            s = int(p[i]) & 0x8000
+            if s != prev: c += 1
+            prev = s; i += 1
+        return c
+except (ImportError, AttributeError):
+    def zero_crossings(buf, n):
+        c = 0; prev = buf[0] < 0
+        for i in range(1, n):
+            s = buf[i] < 0
+            if s != prev: c += 1
+            prev = s
+        return c
+
+
+class CryFeatures:
+    def __init__(self, n, freqs, fs):
+        self.n = n
+        self.bank = GoertzelBank(n, freqs, fs)
+        self.nb = len(self.bank.freqs)
+        self.feats = bytearray(self.nb + 2)
+
+    def extract(self, buf):
+        """Fill and return self.feats (reused) for buf[:n]."""
+        f = self.feats; e = self.bank.process(buf)
+        for i in range(self.nb): f[i] = qlog(e[i])
+        f[self.nb] = qlog(self.bank.rms * self.bank.rms)
+        f[self.nb + 1] = zero_crossings(buf, self.n) * 255 // (self.n - 1)
+        return f
+
+
+def predict(model, f):
+    """Label index for feature vector f."""
+    feat = model.FEAT; thr = model.THR; left = model.LEFT; right = model.RIGHT
+    i = 0
+    while feat[i] != LEAF:
+        i = left[i] if f[feat[i]] <= thr[i] else right[i]
+    return thr[i]
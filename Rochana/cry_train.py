@@ -0,0 +1,151 @@
+# cry_train.py — train the cradle cry classifier on the PC and export cry_model.py (CPython)
+#
+# Data layout (one folder per label, any number of files):
+#   data/HUNGRY/*.wav   data/PAIN/*.raw   data/DISCOMFORT/*.wav ...
+#   .wav : mono 16-bit PCM (resampled to --fs if needed)
+#   .raw : frames dumped by Baby.py (FRAME_DUMP_PATH), int16 little-endian,
+#          already centred 12-bit
+#
+#   python3 cry_train.py data                 # train, report holdout accuracy, write cry_model.py
+#   python3 cry_train.py data --depth 5 --out /tmp/cry_model.py
+#
+# Frames below the firmware's silence gate are skipped (Baby.py labels them
+# SILENCE before the model runs). Every 5th frame is held out for the report.
+# Copy cry_model.py next to Baby.py on the board to enable it.
+
+import os, sys, wave, math, time, argparse
+from array import array
+from cry_features import CryFeatures, LEAF
+
+N, FS = 160, 8000
+FREQS = (300, 450, 600, 800, 1000, 1400, 2000, 2800)
+SILENCE_RMS = 0.3                        # keep in step with Baby.SILENCE_RMS_THRESHOLD
+
+# ---------- loading ----------
+def _resample(x, src, dst):
+    if src == dst: return x
+    out = []; step = src / dst; t = 0.0
+    while t < len(x) - 1:
+        i = int(t); a = t - i
+        out.append(x[i] * (1 - a) + x[i + 1] * a); t += step
+    return out
+
+def load_wav(path, fs):
+    with wave.open(path, "rb") as w:
+        if w.getsampwidth() != 2: raise ValueError("%s: need 16-bit PCM" % path)
+        ch = w.getnchannels(); rate = w.getframerate()
+        pcm = array('h', w.readframes(w.getnframes()))
+    if sys.byteorder != "little": pcm.byteswap()
+    if ch > 1: pcm = pcm[::ch]
+    x = _resample(pcm, rate, fs)
+    return array('h', [int(v) >> 4 for v in x])          # 16-bit -> centred 12-bit
+
+def load_raw(path):
+    a = array('h')
+    with open(path, "rb") as f: a.frombytes(f.read())
+    if sys.byteorder != "little": a.byteswap()
+    return a
+
+def load_dataset(root, fs):
+    labels = sorted(d for d in os.listdir(root) if os.path.isdir(os.path.join(root, d)))
+    data = []                                              # (features tuple, label index)
+    fx = CryFeatures(N, FREQS, fs)
+    gate = (SILENCE_RMS * 2048) ** 2 * N; skipped = 0
+    for li, lab in enumerate(labels):
+        for name in sorted(os.listdir(os.path.join(root, lab))):
+            p = os.path.join(root, lab, name); ext = name.lower().rsplit(".", 1)[-1]
+            if ext == "wav": x = load_wav(p, fs)
+            elif ext == "raw": x = load_raw(p)
+            else: continue
+            for k in range(0, len(x) - N + 1, N):
+                fr = x[k:k + N]
+                if sum(v * v for v in fr) < gate: skipped += 1; continue
+                data.append((tuple(fx.extract(fr)), li))
+    return labels, data, skipped
+
+# ---------- CART with integer thresholds ----------
+def _gini(counts, n):
+    return 1.0 - sum((c / n) ** 2 for c in counts) if n else 0.0
+
+def _majority(rows, nl):
+    c = [0] * nl
+    for _, y in rows: c[y] += 1
+    return c.index(max(c))
+
+def _best_split(rows, nl, min_leaf):
+    n = len(rows); best = None
+    for f in range(len(rows[0][0])):
+        srt = sorted(rows, key=lambda r: r[0][f])
+        left = [0] * nl; right = [0] * nl
+        for _, y in srt: right[y] += 1
+        for i in range(n - 1):
+            y = srt[i][1]; left[y] += 1; right[y] -= 1
+            v, nv = srt[i][0][f], srt[i + 1][0][f]
+            if v == nv or i + 1 < min_leaf or n - i - 1 < min_leaf: continue
+            g = ((i + 1) * _gini(left, i + 1) + (n - i - 1) * _gini(right, n - i - 1)) / n
+            if best is None or g < best[0]: best = (g, f, v)
+    return best
+
+def build_tree(rows, nl, depth, min_leaf):
+    """Returns nodes as [feat, thr, left, right]; leaf: [LEAF, label, 0, 0]."""
+    nodes = []
+    def grow(rows, d):
+        i = len(nodes); nodes.append(None)
+        ys = set(y for _, y in rows)
+        split = None if (d >= depth or len(ys) == 1) else _best_split(rows, nl, min_leaf)
+        if split is None or split[0] >= _gini([sum(1 for _, y in rows if y == k) for k in range(nl)], len(rows)):
+            nodes[i] = [LEAF, _majority(rows, nl), 0, 0]; return i
+        _, f, t = split
+        l = grow([r for r in rows if r[0][f] <= t], d + 1)
+        r = grow([r for r in rows if r[0][f] > t], d + 1)
+        nodes[i] = [f, t, l, r]; return i
+    grow(rows, 0)
+    return nodes
+
+class _Model:
+    def __init__(self, nodes):
+        self.FEAT = bytes(n[0] for n in nodes); self.THR = bytes(n[1] for n in nodes)
+        self.LEFT = bytes(n[2] for n in nodes); self.RIGHT = bytes(n[3] for n in nodes)
+
+# ---------- export ----------
+def export(path, labels, nodes, depth, fs, acc):
+    m = _Model(nodes)
+    with open(path, "w") as f:
+        f.write("# cry_model.py — generated by cry_train.py on {}; do not edit\n".format(time.strftime("%Y-%m-%d %H:%M")))
+        f.write("# {} nodes, depth <= {}, holdout accuracy {:.1f}%\n".format(len(nodes), depth, acc * 100))
+        f.write("N = {}\nFS = {}\nFREQS = {!r}\nSILENCE_RMS = {!r}\n".format(N, fs, FREQS, SILENCE_RMS))
+        f.write("LABELS = {!r}\nDEPTH = {}\n".format(tuple(labels), depth))
+        for k in ("FEAT", "THR", "LEFT", "RIGHT"):
+            f.write("{} = {!r}\n".format(k, getattr(m, k)))
+
+def main(argv=None):
+    from cry_features import predict
+    ap = argparse.ArgumentParser(description="Train the cradle cry decision tree")
+    ap.add_argument("data"); ap.add_argument("--out", default="cry_model.py")
+    ap.add_argument("--depth", type=int, default=4, help="max tree depth (<= 7)")
+    ap.add_argument("--min-leaf", type=int, default=5)
+    ap.add_argument("--fs", type=int, default=FS)
+    a = ap.parse_args(argv)
+    if not 1 <= a.depth <= 7: ap.error("--depth must be 1..7 (node tables are bytes)")
+
+    labels, data, skipped = load_dataset(a.data, a.fs)
+    if len(labels) < 2 or not data: print("need >= 2 label folders with audio"); return 1
+    train = [r for i, r in enumerate(data) if i % 5]; test = [r for i, r in enumerate(data) if not i % 5]
+    print("frames  : {} ({} train / {} holdout), {} below silence gate skipped".format(
+        len(data), len(train), len(test), skipped))
+    nodes = build_tree(train, len(labels), a.depth, a.min_leaf)
+    m = _Model(nodes)
+
+    conf = [[0] * len(labels) for _ in labels]
+    for x, y in test: conf[y][predict(m, x)] += 1
+    acc = sum(conf[i][i] for i in range(len(labels))) / len(test) if test else 0.0
+    print("holdout : {:.1f}% over {} frames, {} nodes".format(acc * 100, len(test), len(nodes)))
+    w = max(len(l) for l in labels)
+    for i, l in enumerate(labels):
+        print("  {:>{w}} -> {}".format(l, " ".join("{:5d}".format(c) for c in conf[i]), w=w))
+    export(a.out, labels, nodes, a.depth, a.fs, acc)
+    print("wrote   :", a.out)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
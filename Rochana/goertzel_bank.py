@@ -0,0 +1,110 @@
+# goertzel_bank.py — single-pass fixed-point Goertzel filter bank (MicroPython / CPython)
+#
+# One pass over an integer sample buffer (array('h'), centred 12-bit from mic_capture)
+# updates every bin's Goertzel state and the sum of squares. Coefficients are
+# computed once per sample rate as Q10 integers and the input is shifted right by
+# SHIFT before it enters the state. The state peak is bounded by
+# max|x >> SHIFT| * sum(|sin(j*w)|, j=1..n) / sin(w), about 2**18.8 at 300 Hz,
+# N=160, fs=8000, so c * s1 stays below 2**30: a 31-bit small int (no bigints) and
+# a 32-bit viper int. The constructor checks this bound (peak_bits).
+#
+#   bank = GoertzelBank(160, (600, 2000), 8000)
+#   bank.process(buf)          # -> bank.energy[i] (0..~1, a full-scale on-bin sine ~ 1.0)
+#   bank.rms                   # 0..1 of full scale
+#   bank.legacy_energy()       # per-bin values on Baby.py's original float scale
+
+import math
+from array import array
+
+Q = 10                       # coefficient fraction bits
+SHIFT = 1                    # input bits dropped before the state update
+FULL_SCALE = 2048            # |sample| of a full-scale input
+PEAK_LIMIT_BITS = 30         # c * s1 must stay below 2**30 (31-bit small int)
+
+# ---------- kernel (viper when available) ----------
+try:
+    import micropython
+
+    @micropython.viper
+    def _run(buf, n: int, coef, st, nb: int) -> int:
+        # st = [s1_0, s2_0, s1_1, s2_1, ...] (int32), zeroed by caller; returns sum(x*x)
+        # literal shifts: 1 is SHIFT, 10 is Q
+        px = ptr16(buf); pc = ptr32(coef); ps = ptr32(st)
+        acc = 0; i = 0
+        while i < n:
+            x = px[i]
+            if x & 0x8000: x -= 0x10000          # ptr16 is unsigned
+            acc += x * x
+            x >>= 1
+            b = 0
+            while b < nb:
+                s1 = ps[2 * b]
+                s = x + ((pc[b] * s1) >> 10) - ps[2 * b + 1]
+                ps[2 * b + 1] = s1; ps[2 * b] = s
+                b += 1
+            i += 1
+        return acc
+except (ImportError, AttributeError):
+    def _run(buf, n, coef, st, nb):
+        acc = 0
+        for i in range(n):
+            x = buf[i]; acc += x * x; x >>= SHIFT
+            for b in range(nb):
+                j = 2 * b; s1 = st[j]
+                st[j] = x + ((coef[b] * s1) >> Q) - st[j + 1]; st[j + 1] = s1
+        return acc
+
+
+class GoertzelBank:
+    def __init__(self, n, freqs, fs):
+        self.n = n; self.freqs = tuple(freqs); nb = len(self.freqs)
+        self.coef  = array('i', [0] * nb)
+        self._st   = array('i', [0] * (2 * nb))
+        self.energy = [0.0] * nb
+        self.rms = 0.0
+        self.fs = 0
+        self.peak_bits = 0.0
+        self.retune(fs)
+        if self.peak_bits >= PEAK_LIMIT_BITS:
+            raise ValueError("Goertzel state overflows for N={} at {} Hz".format(n, min(self.freqs)))
+
+    def retune(self, fs, tol=0.005):
+        """Recompute coefficients only if fs moved by more than tol (fraction)."""
+        if self.fs and abs(fs - self.fs) <= self.fs * tol: return False
+        self.fs = fs; n = self.n; pb = 0.0
+        for i, f in enumerate(self.freqs):
+            k = int(0.5 + (n * f) / fs)
+            self.coef[i] = int(round(2.0 * math.cos(2.0 * math.pi * k / n) * (1 << Q)))
+            pb = max(pb, peak_bits(n, k, self.coef[i]))
+        self.peak_bits = pb
+        return True
+
+    def process(self, buf):
+        """One pass over buf[:n]; fills self.energy and self.rms. Returns self.energy."""
+        st = self._st; n = self.n
+        for j in range(len(st)): st[j] = 0
+        acc = _run(buf, n, self.coef, st, len(self.freqs))
+        self.rms = math.sqrt(acc / n) / FULL_SCALE
+        # |X_k|^2 = s1^2 + s2^2 - c*s1*s2 ; normalised by (n/2 * FULL_SCALE >> SHIFT)^2
+        norm = (n * FULL_SCALE / 2.0 / (1 << SHIFT)) ** 2
+        for b in range(len(self.freqs)):
+            s1 = st[2 * b]; s2 = st[2 * b + 1]; c = self.coef[b] / (1 << Q)
+            self.energy[b] = (s1 * s1 + s2 * s2 - c * s1 * s2) / norm
+        return self.energy
+
+    def legacy_energy(self):
+        """Per-bin (2*s2 + 2*s1 - c*s1*s2) / n with states in full-scale units, i.e.
+        the values the old float goertzel() returned, for thresholds tuned on it."""
+        st = self._st; n = self.n; u = (1 << SHIFT) / FULL_SCALE; out = []
+        for b in range(len(self.freqs)):
+            s1 = st[2 * b] * u; s2 = st[2 * b + 1] * u; c = self.coef[b] / (1 << Q)
+            out.append((s2 * 2 + s1 * 2 - c * s1 * s2) / n)
+        return out
+
+
+def peak_bits(n, k, coef):
+    """log2 of the worst-case |coef * s1| for bin k of an n-point frame."""
+    w = 2.0 * math.pi * k / n; sw = abs(math.sin(w))
+    if sw < 1e-9: return float(PEAK_LIMIT_BITS)      # DC / Nyquist bin: unbounded growth
+    gain = sum(abs(math.sin(j * w)) for j in range(1, n + 1)) / sw
+    return math.log(abs(coef) * (FULL_SCALE >> SHIFT) * gain, 2) if coef else 0.0
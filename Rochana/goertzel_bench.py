@@ -0,0 +1,98 @@
+# goertzel_bench.py — old per-bin float Goertzel vs GoertzelBank (Pico W or CPython)
+# Upload goertzel_bank.py + this file, then:  import goertzel_bench
+# Prints us/frame for both paths on the same synthetic 160-sample frame, then checks
+# the state headroom (worst-case bound and full-scale on-bin sines) for Baby.py's bins
+# and cry_train's, and that legacy_energy() matches the old float values.
+
+import math, gc
+from array import array
+from goertzel_bank import GoertzelBank, FULL_SCALE, Q, SHIFT, PEAK_LIMIT_BITS
+
+try:
+    from time import ticks_us, ticks_diff
+except ImportError:
+    import time
+    def ticks_us(): return int(time.perf_counter() * 1_000_000)
+    def ticks_diff(a, b): return a - b
+
+FS, N = 8000, 160
+FREQS = (600, 2000)
+CRY_FREQS = (300, 450, 600, 800, 1000, 1400, 2000, 2800)   # cry_train.FREQS
+ROUNDS = 50
+
+# ---------- the Baby.py implementation being replaced ----------
+def goertzel(samples, f, fs):
+    n = len(samples); k = int(0.5 + (n*f)/fs)
+    omega = (2.0*math.pi*k)/n; coeff = 2.0*math.cos(omega)
+    scale = 1.0/FULL_SCALE
+    s1=s2=0.0
+    for x in samples:
+        s = x*scale + coeff*s1 - s2
+        s2, s1 = s1, s
+    return (s2*2 + s1*2 - coeff*s1*s2)/n
+
+def compute_rms(samples):
+    s=0
+    for x in samples: s += x*x
+    return math.sqrt(s/len(samples))/FULL_SCALE
+
+def old_frame(buf):
+    rms = compute_rms(buf)
+    return rms, goertzel(buf, FREQS[0], FS), goertzel(buf, FREQS[1], FS)
+
+# ---------- bench ----------
+def make_frame():
+    buf = array('h', [0] * N)
+    for i in range(N):
+        v = 0.5 * math.sin(2 * math.pi * 600 * i / FS) + 0.2 * math.sin(2 * math.pi * 2000 * i / FS)
+        buf[i] = int(v * (FULL_SCALE - 1))
+    return buf
+
+def timeit(fn, buf):
+    gc.collect()
+    t0 = ticks_us()
+    for _ in range(ROUNDS): fn(buf)
+    return ticks_diff(ticks_us(), t0) / ROUNDS
+
+def run():
+    buf = make_frame()
+    bank = GoertzelBank(N, FREQS, FS)
+    t_old = timeit(old_frame, buf)
+    t_new = timeit(bank.process, buf)
+    rms, eh, ep = old_frame(buf)
+    print("old : {:8.0f} us/frame  rms={:.3f} bins=({:.3f}, {:.3f})".format(t_old, rms, eh, ep))
+    print("bank: {:8.0f} us/frame  rms={:.3f} bins=({:.3f}, {:.3f})".format(
+        t_new, bank.rms, bank.energy[0], bank.energy[1]))
+    print("speedup x{:.1f}".format(t_old / t_new if t_new else 0))
+    le = bank.legacy_energy()
+    for a, b in ((eh, le[0]), (ep, le[1])):
+        assert abs(a - b) <= 0.01 * abs(a) + 1e-3, "legacy_energy {} != old {}".format(b, a)
+    print("legacy bins=({:.3f}, {:.3f}) match".format(le[0], le[1]))
+    headroom(FREQS); headroom(CRY_FREQS)
+
+# ---------- headroom ----------
+def peak_run(bank, buf):
+    # Python copy of the kernel that records the largest |c * s1|
+    top = 0; st = [0] * (2 * len(bank.freqs))
+    for x in buf:
+        x >>= SHIFT
+        for b in range(len(bank.freqs)):
+            s1 = st[2 * b]; p = bank.coef[b] * s1
+            if abs(p) > top: top = abs(p)
+            st[2 * b] = x + (p >> Q) - st[2 * b + 1]; st[2 * b + 1] = s1
+    return top
+
+def headroom(freqs):
+    bank = GoertzelBank(N, freqs, FS); top = 0
+    for f in freqs:
+        k = int(0.5 + N * f / FS)
+        for ph in (0.0, 0.25, 0.5):
+            buf = array('h', [int((FULL_SCALE - 1) * math.sin(2 * math.pi * (k * i / N + ph)))
+                              for i in range(N)])
+            top = max(top, peak_run(bank, buf))
+    bits = math.log(top, 2)
+    print("headroom {}: bound 2**{:.1f}, sines 2**{:.1f} (< 2**{})".format(
+        freqs, bank.peak_bits, bits, PEAK_LIMIT_BITS))
+    assert bank.peak_bits < PEAK_LIMIT_BITS and bits < PEAK_LIMIT_BITS
+
+run()
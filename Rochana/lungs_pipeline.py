@@ -0,0 +1,267 @@
+# lungs_pipeline.py — hardware-free vitals + sound pipeline for 3_Health_Lungs.py
+# Runs unchanged on the Pico (MicroPython) and on a PC (CPython, see vitals_replay.py).
+# Every step takes the timestamp (ticks_ms) explicitly, so a capture file can be
+# replayed through exactly the same code faster than real time.
+#
+# Capture format (little-endian):
+#   header : b"VCAP" | u8 version | u32 finger_ir_threshold
+#   record : u8 type | u32 ticks_ms | payload
+#            REC_SAMPLE (1): u32 red, u32 ir
+#            REC_EDGE   (2): (none) — one rising edge on the sound pin
+#            REC_TICK   (3): (none) — loop pass without a new MAX3010x sample
+
+import struct
+try:
+    from time import ticks_diff
+except ImportError:
+    # CPython: same 30-bit wrap-around as MicroPython's ticks_ms()
+    _TICKS_HALF = 1 << 29; _TICKS_MASK = (1 << 30) - 1
+    def ticks_diff(a, b):
+        return ((a - b + _TICKS_HALF) & _TICKS_MASK) - _TICKS_HALF
+
+# ===================== ALGORITHM CONSTANTS =====================
+# Sound thresholds & codes
+COUGH_BURST_COUNT = 1
+TB_BURST_MIN      = 6
+ASTHMATIC_MS      = 10000
+BURST_GAP_MS      = 1200
+DEBOUNCE_MS       = 80
+COUGH_CONFIRM_MS  = 6000
+
+SOUND_NONE  = 0
+SOUND_COUGH = 1
+SOUND_TB    = 2
+SOUND_ASTHMA= 3
+
+# HR limits & calibration window
+HR_MIN = 60
+HR_MAX = 130
+CAL_WINDOW_MS = 10000
+
+# ===================== HR / SpO2 / BP =====================
+class VitalsEstimator:
+    """Per-sample HR (peak detection), SpO2 (ratio-of-ratios) and simulated BP."""
+    def __init__(self, finger_threshold):
+        self.finger_threshold = finger_threshold
+        self.ir = 0; self.red = 0
+        self.hr = 0; self.spo2 = 0; self.systolic = 0; self.diastolic = 0
+        self._last_ir = 0; self._peak = False; self._last_beat_ms = 0; self._temp_hr = 80
+        self._last_bp_ms = 0; self._target_sys = 118; self._target_dia = 78
+        self._cur_sys = 120; self._cur_dia = 80
+        self._rng = 1234567
+
+    def finger_present(self):
+        return self.ir >= self.finger_threshold
+
+    def no_sensor(self):
+        self.hr = 0; self.spo2 = 0
+
+    def update(self, red, ir, now):
+        self.red, self.ir = red, ir
+        if ir < self.finger_threshold:
+            self.hr = 0; self.spo2 = 0; self._last_ir = ir; return
+
+        # Simple peak detection -> HR
+        if ir > self._last_ir and not self._peak:
+            self._peak = True
+        elif ir < self._last_ir and self._peak:
+            ibi = ticks_diff(now, self._last_beat_ms)
+            if 300 < ibi < 2000:
+                new_hr = int(60000 / ibi)
+                if HR_MIN <= new_hr <= HR_MAX:
+                    self._temp_hr = new_hr
+            self._last_beat_ms = now; self._peak = False
+        self._last_ir = ir
+
+        self.hr = self._temp_hr if (HR_MIN <= self._temp_hr <= HR_MAX) else 0
+
+        # Rough SpO2 (ratio-of-ratios)
+        self.spo2 = 0
+        if ir > 0:
+            est = 110 - int(25.0 * (red / ir))
+            if est < 90: est = 90
+            if est > 99: est = 99
+            self.spo2 = est
+
+        self._simulate_bp(now)
+
+    def _rand_range(self, a, b):
+        self._rng = (1103515245*self._rng + 12345) & 0x7FFFFFFF
+        return a + (self._rng % (b - a + 1))
+
+    def _simulate_bp(self, now):
+        if ticks_diff(now, self._last_bp_ms) > 10000:
+            hr_adj = 0
+            if self.hr > 0:
+                hr_adj = max(-20, min(55, self.hr - 75))
+            self._target_sys = 118 + (hr_adj // 6) + self._rand_range(-3, 3)
+            self._target_dia = 78  + self._rand_range(-2, 2)
+            self._last_bp_ms = now
+        if self._cur_sys < self._target_sys: self._cur_sys += 1
+        elif self._cur_sys > self._target_sys: self._cur_sys -= 1
+        if self._cur_dia < self._target_dia: self._cur_dia += 1
+        elif self._cur_dia > self._target_dia: self._cur_dia -= 1
+        self.systolic = self._cur_sys; self.diastolic = self._cur_dia
+
+# ===================== CALIBRATION FSM =====================
+class VS: NO_FINGER=0; CALIBRATING=1; FROZEN=2
+
+class CalibrationFSM:
+    """10 s averaging window started by a finger; results latched until the next finger."""
+    def __init__(self, log=print):
+        self.log = log
+        self.state = VS.NO_FINGER; self.cal_start_ms = 0; self.have_latched = False
+        self.hr = 0; self.spo2 = 0; self.systolic = 0; self.diastolic = 0
+        self._reset_sums()
+
+    def _reset_sums(self):
+        self._sum_hr=self._cnt_hr=self._sum_sp=self._cnt_sp=0
+        self._sum_sy=self._cnt_sy=self._sum_di=self._cnt_di=0
+
+    def update(self, finger_present, vit, now):
+        if self.state == VS.NO_FINGER:
+            if finger_present:
+                self.state = VS.CALIBRATING; self.cal_start_ms = now
+                self._reset_sums()
+                self.log("⏱️ Calibration started (10s)...")
+        elif self.state == VS.CALIBRATING:
+            if not finger_present:
+                self.state = VS.NO_FINGER; self.log("⚠️ Finger removed — calibration aborted.")
+            else:
+                if vit.hr>0:   self._sum_hr += vit.hr;   self._cnt_hr += 1
+                if vit.spo2>0: self._sum_sp += vit.spo2; self._cnt_sp += 1
+                if vit.systolic>0 and vit.diastolic>0:
+                    self._sum_sy += vit.systolic;  self._cnt_sy += 1
+                    self._sum_di += vit.diastolic; self._cnt_di += 1
+                if ticks_diff(now, self.cal_start_ms) >= CAL_WINDOW_MS:
+                    self._latch()
+                    self.have_latched = True; self.state = VS.FROZEN
+                    self.log("✅ Calibration complete — values latched.")
+        elif self.state == VS.FROZEN:
+            if not finger_present:
+                self.state = VS.NO_FINGER; self.log("👆 Finger removed — holding last calibrated values.")
+
+    def _latch(self):
+        n = self._cnt_hr
+        self.hr = (self._sum_hr + (n//2))//n if n>0 else 0
+        if not (HR_MIN <= self.hr <= HR_MAX): self.hr = 0
+        n = self._cnt_sp
+        self.spo2 = (self._sum_sp + (n//2))//n if n>0 else 0
+        if self._cnt_sy>0 and self._cnt_di>0:
+            self.systolic  = (self._sum_sy + (self._cnt_sy//2))//self._cnt_sy
+            self.diastolic = (self._sum_di + (self._cnt_di//2))//self._cnt_di
+        else:
+            self.systolic = self.diastolic = 0
+
+# ===================== SOUND CLASSIFICATION =====================
+class SoundClassifier:
+    """Cough / TB / asthma rules over debounced rising-edge timestamps."""
+    def __init__(self, log=print):
+        self.log = log
+        self.count = 0; self.in_burst = False; self.burst_last_ms = 0; self.last_sound_ms = 0
+        self.event_ms = 0; self.event_code = SOUND_NONE
+        self.pending_cough = False; self.pending_cough_ms = 0
+        self.on_event = None    # optional callback(code, t) — used by the replay runner
+
+    def _event(self, code, t):
+        self.event_ms = t; self.event_code = code
+        if self.on_event: self.on_event(code, t)
+
+    def classify_and_reset_burst(self, t):
+        if not self.in_burst: return
+        if self.count >= TB_BURST_MIN:
+            self.log("🔴 Detected: TB (>= {} highs)".format(TB_BURST_MIN))
+            self._event(SOUND_TB, t)
+            if self.pending_cough: self.pending_cough = False; self.log("↪️ TB overrides pending cough")
+        elif self.count == COUGH_BURST_COUNT:
+            if not self.pending_cough:
+                self.pending_cough = True; self.pending_cough_ms = t
+                self.log("🟠 Cough candidate ({} highs) — checking for TB...".format(COUGH_BURST_COUNT))
+        elif self.count == 1 or (self.count>COUGH_BURST_COUNT and self.count<TB_BURST_MIN):
+            self.log("ℹ️ Sound burst: {} highs (no label)".format(self.count))
+        self.count = 0; self.in_burst = False
+
+    def timeouts(self, t):
+        """Gap / asthma / cough-confirm rules evaluated at time t (edge stamp or now)."""
+        if self.in_burst and ticks_diff(t, self.burst_last_ms) > BURST_GAP_MS: self.classify_and_reset_burst(t)
+        if self.last_sound_ms and ticks_diff(t, self.last_sound_ms) >= ASTHMATIC_MS:
+            self.log("⚠️ Possible Asthmatic (no sound ≥ 10s)")
+            self._event(SOUND_ASTHMA, t)
+            if self.pending_cough: self.pending_cough = False; self.log("↪️ Asthma cancels pending cough")
+            self.classify_and_reset_burst(t); self.last_sound_ms = t
+        if self.pending_cough and ticks_diff(t, self.pending_cough_ms) >= COUGH_CONFIRM_MS:
+            self._event(SOUND_COUGH, t)
+            self.pending_cough = False; self.log("🟠 Cough confirmed (no TB within window)")
+
+    def edge(self, t):
+        """Count one captured rising edge stamped at t (debounced)."""
+        self.timeouts(t)
+        if ticks_diff(t, self.burst_last_ms) <= DEBOUNCE_MS: return
+        if not self.in_burst: self.in_burst = True; self.count = 0
+        self.count += 1; self.burst_last_ms = t; self.last_sound_ms = t
+        if self.count >= TB_BURST_MIN:
+            self.log("🔴 Detected: TB (>= {} highs)".format(TB_BURST_MIN))
+            self._event(SOUND_TB, t)
+            if self.pending_cough: self.pending_cough = False; self.log("↪️ TB overrides pending cough")
+            self.count = 0; self.in_burst = False
+
+# ===================== CAPTURE FILE =====================
+CAP_MAGIC   = b"VCAP"
+CAP_VERSION = 1
+REC_SAMPLE  = 1
+REC_EDGE    = 2
+REC_TICK   = 3
+_HDR = "<4sBI"
+_REC = "<BI"
+_SMP = "<BIII"
+
+class CaptureWriter:
+    """Buffered binary recorder; flushes to flash every len(buf) bytes, stops at max_bytes."""
+    def __init__(self, path, finger_threshold, max_bytes=512*1024, buf_size=512):
+        self._f = open(path, "wb")
+        self._buf = bytearray(buf_size); self._n = 0
+        self.max_bytes = max_bytes
+        self._f.write(struct.pack(_HDR, CAP_MAGIC, CAP_VERSION, finger_threshold))
+        self.written = struct.calcsize(_HDR)
+        self.full = False
+
+    def _room(self, need):
+        if self._n + need > len(self._buf): self.flush()
+        if self.written + self._n + need > self.max_bytes:
+            if not self.full: self.flush(); self.full = True
+            return False
+        return True
+
+    def sample(self, t, red, ir):
+        if self.full or not self._room(13): return
+        struct.pack_into(_SMP, self._buf, self._n, REC_SAMPLE, t, red, ir); self._n += 13
+
+    def mark(self, kind, t):
+        if self.full or not self._room(5): return
+        struct.pack_into(_REC, self._buf, self._n, kind, t); self._n += 5
+
+    def flush(self):
+        if self._n:
+            self._f.write(memoryview(self._buf)[:self._n])
+            self.written += self._n; self._n = 0
+
+    def close(self):
+        self.flush(); self._f.close()
+
+def read_capture(data):
+    """Parse a capture (bytes) -> (finger_threshold, [(type, t, red, ir), ...])."""
+    magic, ver, thr = struct.unpack_from(_HDR, data, 0)
+    if magic != CAP_MAGIC or ver != CAP_VERSION:
+        raise ValueError("not a VCAP v{} file".format(CAP_VERSION))
+    out = []; off = struct.calcsize(_HDR); end = len(data)
+    while off + 5 <= end:
+        kind, t = struct.unpack_from(_REC, data, off)
+        if kind == REC_SAMPLE:
+            if off + 13 > end: break
+            _, t, red, ir = struct.unpack_from(_SMP, data, off); off += 13
+            out.append((kind, t, red, ir))
+        elif kind in (REC_EDGE, REC_TICK):
+            off += 5; out.append((kind, t, 0, 0))
+        else:
+            raise ValueError("bad record type {} at offset {}".format(kind, off))
+    return thr, out
@@ -0,0 +1,107 @@
+# mic_capture.py — timer-paced ADC capture into a reusable array('h') (Pico W, MicroPython)
+# A hardware Timer IRQ reads the ADC at exactly rate_hz; nothing is allocated per
+# frame. Samples are stored as centred 12-bit values (read_u16() >> 4, minus 2048),
+# i.e. -2048..2047, and the measured effective sample rate is kept in eff_rate_hz.
+#
+# Streaming: start_stream() keeps the timer running and ping-pongs between two
+# buffers. The consumer (another core or the main loop) calls acquire() to get
+# the latest complete frame and release() when done; the IRQ never writes into
+# an acquired buffer (a frame is dropped instead). The IRQ also accumulates the
+# frame's sum of squares, so a silent frame can be rejected without a pass.
+
+import time, micropython
+from array import array
+from machine import Timer
+
+micropython.alloc_emergency_exception_buf(100)
+
+MIC_FULL_SCALE = 2048        # divide a sample by this to get -1.0..1.0
+
+class MicCapture:
+    def __init__(self, adc, n, rate_hz):
+        self.adc = adc; self.n = n; self.rate_hz = rate_hz
+        self.buf = array('h', [0] * n)
+        self.eff_rate_hz = 0
+        self.frames = 0; self.dropped = 0
+        self._i = n; self._t0 = 0; self._t1 = 0
+        self._timer = Timer()
+        self._cb = self._isr            # bind once: the IRQ must not allocate
+        # streaming state (second buffer allocated on first start_stream())
+        self.bufs = None
+        self.energy = array('i', [0, 0])  # sum(x*x) of each buffer's last frame
+        self._w = 0; self._ready = -1; self._busy = -1; self._acc = 0
+
+    def _isr(self, t):
+        i = self._i
+        if i >= self.n: return
+        self.buf[i] = (self.adc.read_u16() >> 4) - 2048
+        if i == 0: self._t0 = time.ticks_us()
+        i += 1; self._i = i
+        if i == self.n:
+            self._t1 = time.ticks_us(); self._timer.deinit()
+
+    def _isr_stream(self, t):
+        i = self._i; w = self._w
+        x = (self.adc.read_u16() >> 4) - 2048
+        self.bufs[w][i] = x; self._acc += x * x
+        i += 1
+        if i < self.n:
+            self._i = i; return
+        self.energy[w] = self._acc; self._acc = 0; self._i = 0
+        self._t0 = self._t1; self._t1 = time.ticks_us()
+        if self._busy == (w ^ 1):       # consumer still on the other buffer: overwrite this one
+            self.dropped += 1
+        else:
+            self._ready = w; self._w = w ^ 1
+
+    def _arm(self, cb):
+        try:
+            self._timer.init(freq=self.rate_hz, mode=Timer.PERIODIC, callback=cb, hard=True)
+        except TypeError:
+            self._timer.init(freq=self.rate_hz, mode=Timer.PERIODIC, callback=cb)
+
+    def start(self):
+        """Arm the timer for one frame; returns immediately."""
+        self._i = 0
+        self._arm(self._cb)
+
+    def start_stream(self):
+        """Capture continuously into two alternating buffers."""
+        if self.bufs is None: self.bufs = (self.buf, array('h', [0] * self.n))
+        self._w = 0; self._i = 0; self._acc = 0; self._ready = -1; self._busy = -1
+        self._t1 = time.ticks_us()
+        self._arm(self._isr_stream)
+
+    def acquire(self):
+        """Latest complete frame as (buffer, sum_sq), or None. Call release() after use."""
+        r = self._ready
+        if r < 0: return None
+        self._busy = r; self._ready = -1
+        if self._w == r:                # IRQ flipped onto it before _busy was seen
+            self._busy = -1; return None
+        dt = time.ticks_diff(self._t1, self._t0)
+        if dt > 0: self.eff_rate_hz = self.n * 1_000_000 // dt
+        self.frames += 1
+        return self.bufs[r], self.energy[r]
+
+    def release(self):
+        self._busy = -1
+
+    def done(self):
+        return self._i >= self.n
+
+    def finish(self):
+        """Update eff_rate_hz from the first/last sample stamps of a completed frame."""
+        dt = time.ticks_diff(self._t1, self._t0)
+        if dt > 0: self.eff_rate_hz = (self.n - 1) * 1_000_000 // dt
+        self.frames += 1
+        return self.buf
+
+    def capture(self):
+        """Blocking: capture one frame (n / rate_hz seconds) and return the shared buffer."""
+        self.start()
+        while self._i < self.n: time.sleep_ms(1)
+        return self.finish()
+
+    def stop(self):
+        self._timer.deinit(); self._i = self.n
@@ -0,0 +1,190 @@
+# vitals_replay.py — run a 3_Health_Lungs.py capture through the vitals pipeline on a PC (CPython)
+#
+# 1) On the Pico set CAPTURE_PATH = "/vitals.cap" in 3_Health_Lungs.py, run a session,
+#    stop with Ctrl+C (the file is flushed in cleanup()), copy /vitals.cap off the board.
+# 2) On the PC, next to lungs_pipeline.py:
+#       python3 vitals_replay.py vitals.cap                     # summary + throughput
+#       python3 vitals_replay.py vitals.cap --save base.json    # store results
+#       python3 vitals_replay.py vitals.cap --expect base.json  # exit 1 if results changed
+#       python3 vitals_replay.py vitals.cap --repeat 20 -v      # benchmark, print pipeline logs
+#       python3 vitals_replay.py [vitals.cap] --push-check      # firmware Firebase push path
+#
+# The loop order mirrors main(): sound edges are fed first (in timestamp order),
+# then each sample/tick steps the sound timeouts, the vitals estimator and the
+# calibration FSM with the recorded ticks_ms — the same functions the firmware runs.
+#
+# --push-check loads 3_Health_Lungs.py itself with stand-in device modules (no
+# sensors, an HTTP recorder for urequests) and drives its push_if_changed() /
+# fb_set(): first push writes every value, repeats write nothing, a new latch
+# writes only the vitals that changed, a sound code always goes out.
+
+import os, sys, io, json, time, types, argparse, contextlib, importlib.util
+import lungs_pipeline as lp
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+FIRMWARE = os.path.join(HERE, "3_Health_Lungs.py")
+
+SOUND_NAMES = {lp.SOUND_COUGH: "COUGH", lp.SOUND_TB: "TB", lp.SOUND_ASTHMA: "ASTHMA"}
+
+def replay(finger_threshold, records, log=None):
+    log = log or (lambda *a: None)
+    vit = lp.VitalsEstimator(finger_threshold)
+    cal = lp.CalibrationFSM(log=log)
+    snd = lp.SoundClassifier(log=log)
+    events = []; latches = []
+    snd.on_event = lambda code, t: events.append((t, SOUND_NAMES.get(code, str(code))))
+
+    for kind, t, red, ir in records:
+        if kind == lp.REC_EDGE:
+            snd.edge(t); continue
+        snd.timeouts(t)
+        if kind == lp.REC_SAMPLE:
+            vit.update(red, ir, t)
+        was = cal.state
+        cal.update(vit.finger_present(), vit, t)
+        if was == lp.VS.CALIBRATING and cal.state == lp.VS.FROZEN:
+            latches.append((t, cal.hr, cal.spo2, cal.systolic, cal.diastolic))
+
+    return {
+        "sound_events": events,
+        "latches": latches,
+        "final": {"state": cal.state, "have_latched": cal.have_latched, "hr": cal.hr,
+                  "spo2": cal.spo2, "systolic": cal.systolic, "diastolic": cal.diastolic},
+    }
+
+# ---------- firmware push check ----------
+class _Dev:
+    """Any device class (Pin, I2C, WLAN, DHT11, SSD1306): calls are no-ops, I2C chips are absent."""
+    IN = 0; OUT = 1; PULL_UP = 1; IRQ_RISING = 1; IRQ_FALLING = 2
+    def __init__(self, *a, **k): pass
+    def __getattr__(self, name): return lambda *a, **k: None
+    def scan(self): return []
+    def value(self, *a): return 1
+    def isconnected(self): return True
+    def writeto_mem(self, *a): raise OSError(19, "no device")
+    readfrom_mem = writeto_mem
+
+class _Resp:
+    status_code = 200
+    def json(self): return None
+    def close(self): pass
+
+def load_firmware(path=FIRMWARE):
+    """Import the firmware on CPython; returns (module, puts) with puts = [(url, value)]."""
+    puts = []
+    mods = {
+        "machine": dict(Pin=_Dev, I2C=_Dev),
+        "network": dict(WLAN=_Dev, STA_IF=0),
+        "dht": dict(DHT11=_Dev),
+        "ssd1306": dict(SSD1306_I2C=_Dev),
+        "micropython": dict(alloc_emergency_exception_buf=lambda n: None),
+        "urequests": dict(put=lambda url, data=None, **k: (puts.append((url, json.loads(data))), _Resp())[1],
+                          get=lambda url, **k: _Resp(), post=lambda url, **k: _Resp()),
+    }
+    saved = {k: sys.modules.get(k) for k in mods}
+    for name, attrs in mods.items():
+        m = types.ModuleType(name); m.__dict__.update(attrs); sys.modules[name] = m
+    try:
+        spec = importlib.util.spec_from_file_location("health_lungs_fw", path)
+        mod = importlib.util.module_from_spec(spec)
+        with contextlib.redirect_stdout(io.StringIO()):
+            spec.loader.exec_module(mod)
+    finally:
+        for k, v in saved.items():
+            if v is None: sys.modules.pop(k, None)
+            else: sys.modules[k] = v
+    mod._id_token = "host"; mod._token_obtained_s = time.time()     # no sign-in
+    return mod, puts
+
+def push_check(latches, path=FIRMWARE):
+    mod, puts = load_firmware(path)
+    base = "{}/{}/".format(mod.DATABASE_URL.rstrip("/"), mod.FB_ROOT.strip("/"))
+    fails = []
+
+    def step(what, args, want):
+        del puts[:]
+        try:
+            mod.push_if_changed(*args)
+        except Exception as e:
+            fails.append(what); print("push    : FAIL {}: {!r}".format(what, e)); return
+        got = {u[len(base):u.index(".json")]: v for u, v in puts}
+        if got != want:
+            fails.append(what); print("push    : FAIL {}: wrote {} expected {}".format(what, got, want))
+
+    none = lp.SOUND_NONE
+    step("first push", (0, 0, none, 27, 60, 0, 0, 0, 0),
+         {"1_co2": "0", "2_alcohol": "0", "3_temp": "27", "4_hum": "60", "5_bp/1_diastolic": "0",
+          "5_bp/2_systolic": "0", "6_hr": "0", "7_spo2": "0"})
+    step("repeat", (0, 0, none, 27, 60, 0, 0, 0, 0), {})
+    step("gas flags", (1, 1, none, 27, 60, 0, 0, 0, 0), {"1_co2": "1", "2_alcohol": "1"})
+    last = (0, 0, 0, 0)
+    for i, (t, hr, sp, sy, di) in enumerate(latches or [(0, 72, 97, 118, 78)]):
+        want = {}
+        for key, old, new in (("5_bp/1_diastolic", last[3], di), ("5_bp/2_systolic", last[2], sy),
+                              ("6_hr", last[0], hr), ("7_spo2", last[1], sp)):
+            if new != old: want[key] = str(new)
+        step("latch {}".format(i + 1), (1, 1, none, 27, 60, sy, di, hr, sp), want)
+        last = (hr, sp, sy, di)
+    hr, sp, sy, di = last
+    step("sound", (1, 1, lp.SOUND_COUGH, 27, 60, sy, di, hr, sp), {"8_sound": str(lp.SOUND_COUGH)})
+    step("sound again", (1, 1, lp.SOUND_COUGH, 27, 60, sy, di, hr, sp), {"8_sound": str(lp.SOUND_COUGH)})
+    print("push    : {} ({} latch(es) pushed through {})".format(
+        "FAIL" if fails else "OK", len(latches) or 1, os.path.basename(path)))
+    return not fails
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Replay a VCAP capture through lungs_pipeline")
+    ap.add_argument("capture", nargs="?")
+    ap.add_argument("--repeat", type=int, default=1, help="replay N times for throughput")
+    ap.add_argument("--save", help="write results as JSON")
+    ap.add_argument("--expect", help="compare results with a saved JSON, exit 1 on mismatch")
+    ap.add_argument("-v", "--verbose", action="store_true", help="print pipeline log lines")
+    ap.add_argument("--push-check", action="store_true",
+                    help="run the firmware's Firebase push path (with the capture's latches), exit 1 on failure")
+    a = ap.parse_args(argv)
+    if a.capture is None:
+        if not a.push_check: ap.error("a capture file is required (or --push-check alone)")
+        return 0 if push_check([]) else 1
+
+    with open(a.capture, "rb") as f:
+        thr, records = lp.read_capture(f.read())
+    if not records:
+        print("empty capture"); return 1
+    n_smp = sum(1 for r in records if r[0] == lp.REC_SAMPLE)
+    n_edge = sum(1 for r in records if r[0] == lp.REC_EDGE)
+    span_ms = lp.ticks_diff(records[-1][1], records[0][1])
+
+    t0 = time.perf_counter()
+    for i in range(max(1, a.repeat)):
+        res = replay(thr, records, log=print if (a.verbose and i == 0) else None)
+    wall = time.perf_counter() - t0
+
+    total = len(records) * max(1, a.repeat)
+    print("capture : {} records ({} samples, {} edges), {:.1f} s recorded, finger thr {}".format(
+        len(records), n_smp, n_edge, span_ms / 1000.0, thr))
+    print("replay  : {:.3f} s wall for {} pass(es) -> {:.0f} records/s, {:.0f}x real time".format(
+        wall, max(1, a.repeat), total / wall if wall else 0,
+        (span_ms / 1000.0 * max(1, a.repeat)) / wall if wall else 0))
+    for t, hr, sp, sy, di in res["latches"]:
+        print("latched : t={} ms  HR={} SpO2={} BP={}/{}".format(t, hr, sp, sy, di))
+    for t, name in res["sound_events"]:
+        print("sound   : t={} ms  {}".format(t, name))
+    print("final   :", res["final"])
+
+    out = json.loads(json.dumps(res))          # tuples -> lists, same shape as a loaded file
+    if a.save:
+        with open(a.save, "w") as f: json.dump(out, f, indent=1)
+        print("saved   :", a.save)
+    if a.expect:
+        with open(a.expect) as f: ref = json.load(f)
+        if ref != out:
+            for k in out:
+                if ref.get(k) != out[k]: print("MISMATCH:", k)
+            return 1
+        print("expect  : OK (matches {})".format(a.expect))
+    if a.push_check and not push_check([tuple(l) for l in res["latches"]]):
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())